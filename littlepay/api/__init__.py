@@ -1,9 +1,18 @@
-from dataclasses import dataclass
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import datetime
+from functools import lru_cache
 from inspect import signature
 import logging
-from typing import Generator, Protocol, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Protocol, TypeVar, get_args
 
-from authlib.integrations.requests_client import OAuth2Session
+if TYPE_CHECKING:
+    # only needed for annotations, avoid importing authlib (and requests) until a Client is created
+    from authlib.integrations.requests_client import OAuth2Session
+
+    from littlepay.checkpoint import Checkpoint
 
 
 logger = logging.getLogger(__name__)
@@ -12,33 +21,133 @@ logger = logging.getLogger(__name__)
 # Generic type parameter, used to represent the result of an API call.
 TResponse = TypeVar("TResponse")
 
+# Generic type parameter, used to represent the input to an API call made concurrently.
+TItem = TypeVar("TItem")
+
+# Default number of concurrent API calls for batch operations.
+MAX_WORKERS = 8
+
+
+def map_concurrent(
+    func: Callable[[TItem], TResponse], items: Iterable[TItem], max_workers: int = MAX_WORKERS
+) -> Generator[tuple[TItem, TResponse | Exception], None, None]:
+    """Call func for each of items using a pool of threads, yielding (item, result) tuples in the order of items.
+
+    If func raises an Exception for an item, the Exception is yielded as the item's result instead. Each call runs in a
+    copy of the caller's context, so context variables (like a participant override) carry over to the threads.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(item, executor.submit(copy_context().run, func, item)) for item in items]
+        for item, future in futures:
+            try:
+                yield item, future.result()
+            except Exception as ex:
+                yield item, ex
+
+
+@lru_cache(maxsize=None)
+def _class_fields(cls) -> frozenset[str]:
+    """The names of the parameters of the constructor of cls, inspected once per class."""
+    return frozenset(signature(cls).parameters)
+
+
+# (class, field name) of each unexpected field logged already, so a new API field is reported once rather than per item
+_unexpected_fields: set[tuple[type, str]] = set()
+
 
 def from_kwargs(cls, **kwargs):
     """
     Helper function meant to be used as a @classmethod
     for instantiating a dataclass and allowing unexpected fields
 
+    Unexpected fields are ignored, and logged the first time they are seen for each class.
+
     See https://stackoverflow.com/a/55101438
     """
-    # fetch the constructor's signature
-    class_fields = {field for field in signature(cls).parameters}
+    # fetch the constructor's fields
+    class_fields = _class_fields(cls)
+
+    # most items have no unexpected fields, pass them straight through
+    if class_fields.issuperset(kwargs):
+        return cls(**kwargs)
 
     # split the kwargs into native ones and new ones
-    native_args, new_args = {}, {}
+    native_args = {}
     for name, val in kwargs.items():
         if name in class_fields:
             native_args[name] = val
-        else:
-            new_args[name] = val
+        elif (cls, name) not in _unexpected_fields:
+            # ... and log any unexpected args
+            _unexpected_fields.add((cls, name))
+            logger.info(f"Ran into an unexpected {cls.__name__} arg: {name} = {val}")
+
+    # use the native ones to create the class
+    return cls(**native_args)
+
+
+def parse_datetime(value: str | None) -> datetime | None:
+    """Parse an API datetime string into a Python datetime object, or None for a missing or empty value.
+
+    Includes a workaround for Python 3.10 where datetime.fromisoformat() can only parse the format output
+    by datetime.isoformat(), i.e. without a trailing 'Z' offset character and with UTC offset expressed
+    as +/-HH:mm
+
+    https://docs.python.org/3.12/library/datetime.html#datetime.datetime.fromisoformat
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00", 1))
+
+
+@lru_cache(maxsize=None)
+def projection(cls, fields: tuple[str, ...]) -> type[tuple]:
+    """Get a namedtuple type holding only the given fields of the response dataclass cls.
+
+    Records are created from a decoded API item with the type's from_item(item) classmethod, which parses the datetime
+    fields in the projection and skips every field not in it. Types are cached, so each is created once per projection.
+
+    Args:
+        cls (type): A response dataclass, e.g. GroupResponse.
 
-    # use the native ones to create the class ...
-    instance = cls(**native_args)
+        fields (tuple[str, ...]): The names of the fields of cls to include, in order.
 
-    # ... and log any unexpected args
-    for new_name, new_val in new_args.items():
-        logger.info(f"Ran into an unexpected arg: {new_name} = {new_val}")
+    Returns (type[tuple]):
+        A namedtuple type named like "GroupResponseRecord", with the given fields.
+    """
+    known = {field.name: field for field in dataclass_fields(cls)}
+    unknown = [name for name in fields if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown {cls.__name__} fields: {', '.join(unknown)}")
+    dates = {name for name in fields if known[name].type is datetime or datetime in get_args(known[name].type)}
+
+    def from_item(record_cls, item: dict):
+        return record_cls._make(parse_datetime(item.get(name)) if name in dates else item.get(name) for name in fields)
+
+    name = f"{cls.__name__}Record"
+    return type(name, (namedtuple(name, fields),), {"__slots__": (), "from_item": classmethod(from_item)})
+
+
+def item_decoder(cls, raw: bool = False, fields: Iterable[str] = None) -> Callable[[dict], Any]:
+    """Get a function creating the objects a generator yields from decoded API items.
+
+    By default, items are built into cls with from_kwargs(), so fields added to the API are ignored rather than failing.
 
-    return instance
+    Args:
+        cls (type): The response dataclass for the items, e.g. GroupResponse.
+
+        raw (bool): True to yield the decoded items as-is.
+
+        fields (Iterable[str]): The names of the fields of cls to include in lightweight records, see projection(). Takes
+        precedence over raw.
+
+    Returns (Callable[[dict], Any]):
+        A function taking a decoded item.
+    """
+    if fields is not None:
+        return projection(cls, tuple(fields)).from_item
+    if raw:
+        return lambda item: item
+    return lambda item: from_kwargs(cls, **item)
 
 
 @dataclass
@@ -53,11 +162,19 @@ class ListResponse:
         return from_kwargs(cls, **kwargs)
 
 
+class RawResponse(dict):
+    """An API response as its decoded JSON object, without building a model from it."""
+
+    @classmethod
+    def from_kwargs(cls, **kwargs):
+        return cls(kwargs)
+
+
 class ClientProtocol(Protocol):
     """Protocol describing key functionality for an API connection."""
 
     headers: dict
-    oauth: OAuth2Session
+    oauth: "OAuth2Session"
 
     def _delete(self, endpoint: str) -> bool:
         """Make a DELETE request to an endpoint.
@@ -89,7 +206,7 @@ class ClientProtocol(Protocol):
         """
         pass
 
-    def _get_list(self, endpoint: str, **kwargs: dict) -> Generator[dict, None, None]:
+    def _get_list(self, endpoint: str, checkpoint: "Checkpoint" = None, **kwargs: dict) -> Generator[dict, None, None]:
         """Make a GET request to a JSON endpoint returning a ListResponse, yielding items from the resulting list.
 
         Args:
@@ -97,6 +214,9 @@ class ClientProtocol(Protocol):
 
             endpoint (str): The fully-formed endpoint where the GET request should be made.
 
+            checkpoint (Checkpoint): Saves each page as it is fetched, so an interrupted listing resumes from the next page,
+            replaying the pages saved already. Cleared once the listing completes.
+
             Extra kwargs are passed as querystring params.
 
         Returns (TResponse):
@@ -104,6 +224,16 @@ class ClientProtocol(Protocol):
         """
         pass
 
+    def _invalidate(self, *endpoints: str) -> None:
+        """Remove any cached GET responses and snapshot items for endpoints, e.g. after a mutation changes them.
+
+        Args:
+            self (ClientProtocol): The current ClientProtocol reference.
+
+            *endpoints tuple[str]: The fully-formed endpoints whose cached responses are no longer current.
+        """
+        pass
+
     def _make_endpoint(self, *parts: str) -> str:
         """Create a complete API URL from the endpoint-specific parts.
 
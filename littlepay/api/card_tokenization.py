@@ -1,11 +1,37 @@
+from threading import Lock
+
 from authlib.oauth2.rfc6749 import OAuth2Token
 
 from littlepay.api import ClientProtocol
+from littlepay.api.tokens import TokenProvider
+
+
+# guards creating a client's token provider, so concurrent first callers share one provider and one token request
+_provider_lock = Lock()
 
 
 class CardTokenizationMixin(ClientProtocol):
     """Mixin implements APIs for card tokenization."""
 
+    # seconds before its expiry that a card tokenization token is no longer handed out
+    CARD_TOKENIZATION_REFRESH_MARGIN = 60
+    # seconds before its expiry that a new card tokenization token is requested in the background
+    CARD_TOKENIZATION_BACKGROUND_REFRESH = 5 * 60
+
+    @property
+    def card_tokenization_token_provider(self) -> TokenProvider:
+        """Provider of card tokenization access tokens, shared by callers of this client."""
+        if "_card_tokenization_token_provider" not in self.__dict__:
+            with _provider_lock:
+                # another thread may have created the provider while this one waited
+                if "_card_tokenization_token_provider" not in self.__dict__:
+                    self._card_tokenization_token_provider = TokenProvider(
+                        self.request_card_tokenization_access,
+                        refresh_margin=self.CARD_TOKENIZATION_REFRESH_MARGIN,
+                        background_refresh=self.CARD_TOKENIZATION_BACKGROUND_REFRESH,
+                    )
+        return self._card_tokenization_token_provider
+
     def card_tokenization_request_access_endpoint(self) -> str:
         """Endpoint to acquire a card tokenization access token."""
         return self._make_endpoint("cardtokenisation", "requestaccess")
@@ -17,3 +43,11 @@ class CardTokenizationMixin(ClientProtocol):
 
         response_dict = self._post(endpoint, request_body)
         return OAuth2Token.from_dict(response_dict)
+
+    def get_card_tokenization_access(self) -> OAuth2Token:
+        """Get an access token for card tokenization, reusing a previous token until shortly before it expires.
+
+        Concurrent callers share a single request for a new token, and a token close to its expiry is refreshed in the
+        background while it is still handed out.
+        """
+        return self.card_tokenization_token_provider.get()
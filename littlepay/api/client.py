@@ -1,17 +1,53 @@
 import json
+import logging
+from threading import Lock, Thread
+import time
 from typing import Generator
 
 from authlib.common.urls import url_decode
 from authlib.integrations.requests_client import OAuth2Session
 from authlib.oauth2.rfc6749 import OAuth2Token
+from requests import HTTPError
 
 from littlepay import __version__
 from littlepay.api import ClientProtocol, ListResponse, TResponse
 from littlepay.api.card_tokenization import CardTokenizationMixin
+from littlepay.api.decoders import JSONDecoder, get_decoder
+from littlepay.api.dependencies import ANY, dependent_endpoints, match_resource
 from littlepay.api.groups import GroupsMixin
 from littlepay.api.products import ProductsMixin
 from littlepay.api.funding_sources import FundingSourcesMixin
+from littlepay.checkpoint import Checkpoint
 from littlepay.config import Config
+from littlepay.response_cache import ResponseCache
+from littlepay.snapshot import Snapshot
+
+
+logger = logging.getLogger(__name__)
+
+# the fastest JSON decoder installed, shared by Clients created without a decoder
+_default_decoder = get_decoder()
+
+# Clients kept warm by a long-running process (e.g. `littlepay serve`), keyed by their connection details.
+# None when reuse is disabled (the default), so that each call creates a new Client.
+_warm_clients: dict | None = None
+
+
+def reuse_clients(enabled: bool = True) -> bool:
+    """Enable or disable reusing Clients created from the active config, for the rest of this process.
+
+    Reused Clients keep their connection pool and access token between commands.
+
+    Returns (bool):
+        Whether reuse was enabled before this call, e.g. to restore it afterwards.
+    """
+    global _warm_clients
+    previous = _warm_clients is not None
+    if not enabled:
+        _warm_clients = None
+    elif not previous:
+        _warm_clients = {}
+    return previous
 
 
 def _client_from_active_config(config: Config):
@@ -22,12 +58,26 @@ def _client_from_active_config(config: Config):
     Args:
         config (Config): The Config instance from which to read initialization values.
     """
-    return Client(
+    kwargs = dict(
         base_url=config.active_env["url"],
         version=config.active_env.get("version", "v1"),
-        token=config.active_token,
+        http2=config.active_env.get("http2", False),
         **config.active_credentials,
     )
+    response_cache = config.active_env.get("response_cache", False)
+
+    def _create():
+        cache = ResponseCache.from_active_config(config) if response_cache else None
+        snapshot = Snapshot.from_active_config(config)
+        return Client(token=config.active_token, response_cache=cache, snapshot=snapshot, **kwargs)
+
+    if _warm_clients is None:
+        return _create()
+
+    key = (*sorted(kwargs.items()), ("response_cache", response_cache))
+    if key not in _warm_clients:
+        _warm_clients[key] = _create()
+    return _warm_clients[key]
 
 
 def _fix_bearer_token_header(url, headers, body):
@@ -59,18 +109,46 @@ def _json_post_credentials(client, method, uri, headers, body) -> tuple:
     """
     data = dict(url_decode(body))
     json_data = json.dumps(data)
-    headers["Content-Length"] = len(json_data)
+    headers["Content-Length"] = str(len(json_data))
 
     return uri, headers, json_data
 
 
+def _http2_session(**kwargs):
+    """Create an OAuth2 session using httpx over HTTP/2, multiplexing concurrent requests over one connection.
+
+    This function should not be called directly, it is used by Client(http2=True).
+    """
+    try:
+        from authlib.integrations.httpx_client import OAuth2Client
+    except ImportError as ex:
+        raise ImportError("HTTP/2 requires httpx, install with: pip install calitp-littlepay[http2]") from ex
+
+    return OAuth2Client(http2=True, **kwargs)
+
+
 class Client(FundingSourcesMixin, CardTokenizationMixin, ProductsMixin, GroupsMixin, ClientProtocol):
     """Represents an API connection to an environment."""
 
     from_active_config = staticmethod(_client_from_active_config)
 
+    # seconds before its expiry that an access token is treated as expired, as Authlib's session does from 1.3.2
+    TOKEN_EXPIRY_LEEWAY = 60
+    # seconds before its expiry that a new access token is requested in the background, while the current one is used
+    TOKEN_BACKGROUND_REFRESH = 5 * 60
+
     def __init__(
-        self, base_url: str, client_id: str, client_secret: str, audience: str, token: dict = None, version: str = "v1"
+        self,
+        base_url: str,
+        client_id: str,
+        client_secret: str,
+        audience: str,
+        token: dict = None,
+        version: str = "v1",
+        http2: bool = False,
+        response_cache: ResponseCache = None,
+        json_decoder: JSONDecoder = None,
+        snapshot: Snapshot = None,
     ):
         """Initialize a new Client to connect to an API environment.
 
@@ -86,12 +164,26 @@ class Client(FundingSourcesMixin, CardTokenizationMixin, ProductsMixin, GroupsMi
             token (dict): Access token acquired previously, granting access to protected API resources.
 
             version (str): The API version to target.
+
+            http2 (bool): True to send requests with httpx over HTTP/2, rather than with requests over HTTP/1.1.
+
+            response_cache (ResponseCache): Caches GET responses, revalidating them when the server supports it. If None,
+            every GET downloads the full response.
+
+            json_decoder (JSONDecoder): Decodes JSON response bodies. If None, the fastest installed decoder is used.
+
+            snapshot (Snapshot): Local snapshot of listings, whose items a mutation affects are invalidated. If None, no
+            snapshot is invalidated.
         """
         self.credentials = dict(
             audience=audience, client_id=client_id, client_secret=client_secret, grant_type="client_credentials"
         )
         self.base_url = base_url
         self.version = version
+        self.http2 = http2
+        self.response_cache = response_cache
+        self.json_decoder = json_decoder if json_decoder is not None else _default_decoder
+        self.snapshot = snapshot
 
         self.headers = {
             "Accept": "application/json",
@@ -99,13 +191,16 @@ class Client(FundingSourcesMixin, CardTokenizationMixin, ProductsMixin, GroupsMi
             "User-Agent": f"cal-itp/littlepay:{__version__}",
         }
 
-        if token is None or OAuth2Token.from_dict(token).is_expired():
+        if token is None or self._expires_within(token, self.TOKEN_EXPIRY_LEEWAY):
             token = None
 
-        self.oauth = OAuth2Session(
+        session = _http2_session if http2 else OAuth2Session
+        self.oauth = session(
             token_endpoint=self.token_endpoint, token_endpoint_auth_method=_json_post_credentials, token=token
         )
         self.oauth.register_compliance_hook("protected_request", _fix_bearer_token_header)
+        # held while requesting a new access token, so concurrent callers share a single request
+        self._token_lock = Lock()
 
     @property
     def token_endpoint(self) -> str:
@@ -114,58 +209,196 @@ class Client(FundingSourcesMixin, CardTokenizationMixin, ProductsMixin, GroupsMi
 
     @property
     def token(self) -> OAuth2Token:
-        """This client's API access token."""
-        if self.oauth.token is None or self.oauth.token.is_expired():
-            self.oauth.token = self.oauth.fetch_token(headers=self.headers, **self.credentials)
-        return self.oauth.token
+        """This client's API access token.
+
+        A missing or expired token is requested once for all threads, which wait for the result. A token close to its
+        expiry is refreshed in the background, while it is still used.
+        """
+        token = self.oauth.token
+        if token is None or self._expires_within(token, self.TOKEN_EXPIRY_LEEWAY):
+            with self._token_lock:
+                # another thread may have requested a new token while this one waited
+                token = self.oauth.token
+                if token is None or self._expires_within(token, self.TOKEN_EXPIRY_LEEWAY):
+                    self.oauth.token = self._fetch_token()
+                token = self.oauth.token
+        elif self._expires_within(token, self.TOKEN_BACKGROUND_REFRESH) and self._token_lock.acquire(blocking=False):
+            Thread(target=self._refresh_token_in_background, daemon=True).start()
+        return token
+
+    @staticmethod
+    def _expires_within(token: dict, seconds: float) -> bool:
+        """Whether token expires within seconds from now. A token without an expiry never does.
+
+        Computed from expires_at rather than with OAuth2Token.is_expired, which only takes a leeway from Authlib 1.3.2.
+        """
+        expires_at = token.get("expires_at")
+        return expires_at is not None and expires_at - seconds < time.time()
+
+    def _ensure_token(self) -> None:
+        """Make sure this client has a valid access token before a request, acquiring it through the token property.
+
+        The session's own check would raise InvalidTokenError for a token within its expiry leeway, rather than request a
+        new one, and would bypass the single request shared by concurrent callers.
+        """
+        self.token
+
+    def _fetch_token(self) -> OAuth2Token:
+        return self.oauth.fetch_token(headers=self.headers, **self.credentials)
+
+    def _refresh_token_in_background(self) -> None:
+        """Request a new access token, releasing the token lock acquired by the caller when done."""
+        try:
+            self.oauth.token = self._fetch_token()
+        except Exception as ex:
+            # the current token is still valid, the next caller needing a new one will try again
+            logger.warning(f"Background access token refresh failed: {ex}")
+        finally:
+            self._token_lock.release()
 
     def _delete(self, endpoint: str) -> bool:
-        response = self.oauth.delete(endpoint, headers=self.headers)
-        response.raise_for_status()
+        self._ensure_token()
+        try:
+            response = self.oauth.delete(endpoint, headers=self.headers)
+        finally:
+            self._mutated("DELETE", endpoint)
+        self._raise_for_status(response)
         return True
 
     def _get(self, endpoint: str, response_cls: TResponse, **kwargs) -> TResponse:
-        response = self.oauth.get(endpoint, headers=self.headers, params=kwargs)
-        response.raise_for_status()
+        # requests drops None params but httpx sends them as empty values, e.g. an empty status filter
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        cache = self.response_cache
+        if cache is None:
+            self._ensure_token()
+            response = self.oauth.get(endpoint, headers=self.headers, params=kwargs)
+            self._raise_for_status(response)
+            return response_cls.from_kwargs(**self.json_decoder(response.content))
+
+        cached = cache.get(endpoint, kwargs)
+        if cached is not None and cache.fresh(cached):
+            return response_cls.from_kwargs(**cached.data)
+
+        headers = {**self.headers, **cached.conditional_headers} if cached is not None else self.headers
+        self._ensure_token()
+        response = self.oauth.get(endpoint, headers=headers, params=kwargs)
+        if cached is not None and response.status_code == 304:
+            cached = cache.touch(endpoint, kwargs, cached)
+        else:
+            self._raise_for_status(response)
+            cached = cache.set(
+                endpoint,
+                kwargs,
+                self.json_decoder(response.content),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+
+        return response_cls.from_kwargs(**cached.data)
+
+    def _invalidate(self, *endpoints: str) -> None:
+        if not endpoints:
+            return
+        if self.response_cache is not None:
+            self.response_cache.invalidate(*endpoints)
+        if self.snapshot is not None:
+            # snapshot keys mirror the API endpoints the items are fetched from
+            self.snapshot.invalidate(*("/".join(self._resource_parts(endpoint)) for endpoint in endpoints))
+        for endpoint in endpoints:
+            # linked concession groups are also cached in memory, by funding source ID
+            ids = match_resource(("fundingsources", ANY, "concession_groups"), self._resource_parts(endpoint))
+            if ids is not None:
+                self.funding_source_groups_cache.pop(ids[0])
+
+    def _mutated(self, method: str, endpoint: str, data: dict = None) -> None:
+        """Invalidate the cached responses affected by a mutation of endpoint, from the client's resource dependency map.
+
+        Called whether or not the mutation succeeded, since a failed request may still have changed the resource. Failing to
+        invalidate is logged rather than raised, so it doesn't replace the outcome of the mutation.
+        """
+        try:
+            self._invalidate(*dependent_endpoints(self, method, self._resource_parts(endpoint), data))
+        except Exception as ex:
+            logger.warning(f"Invalidating cached responses after {method} {endpoint} failed: {ex}")
+
+    def _resource_parts(self, endpoint: str) -> list[str]:
+        """The path segments of endpoint after the API version, e.g. ["concession_groups", "1234"]."""
+        prefix = self._make_endpoint() + "/"
+        if not endpoint.startswith(prefix):
+            return []
+        return endpoint.removeprefix(prefix).split("/")
+
+    def _raise_for_status(self, response) -> None:
+        """Raise requests.HTTPError for an error response, from either transport, so callers handle errors alike."""
+        if not self.http2:
+            response.raise_for_status()
+            return
 
-        return response_cls.from_kwargs(**response.json())
+        import httpx
 
-    def _get_list(self, endpoint: str, **kwargs) -> Generator[dict, None, None]:
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as ex:
+            raise HTTPError(str(ex), response=response) from ex
+
+    def _get_list(self, endpoint: str, checkpoint: Checkpoint = None, **kwargs) -> Generator[dict, None, None]:
         params = dict(page=1, per_page=100)
         params.update(kwargs)
         total = 0
-
-        data = self._get(endpoint, ListResponse, **params)
-        queue = list(data.list)
-        while len(queue):
-            total += len(queue)
-            for _ in range(len(queue)):
-                yield queue.pop(0)
-            if total < int(data.total_count):
-                params["page"] += 1
-                data = self._get(endpoint, ListResponse, **params)
-                queue.extend(data.list)
+        total_count = None
+
+        state = checkpoint.load() if checkpoint is not None else {}
+        if state:
+            # replay the pages fetched before the listing was interrupted, then continue from the next page
+            for item in checkpoint.items(state["count"]):
+                total += 1
+                yield item
+            params["page"] = state["page"] + 1
+            total_count = int(state["total_count"])
+
+        while total_count is None or total < total_count:
+            data = self._get(endpoint, ListResponse, **params)
+            total_count = int(data.total_count)
+            if not data.list:
+                break
+            total += len(data.list)
+            if checkpoint is not None:
+                checkpoint.append(data.list)
+                checkpoint.save(page=params["page"], total_count=total_count, count=total)
+            yield from data.list
+            params["page"] += 1
+
+        if checkpoint is not None:
+            checkpoint.clear()
 
     def _make_endpoint(self, *parts: str) -> str:
         parts = (p.strip("/") for p in parts if p)
         return "/".join((self.base_url, "api", self.version, *parts))
 
     def _post(self, endpoint: str, data: dict, response_cls: TResponse = dict, **kwargs) -> TResponse:
-        response = self.oauth.post(endpoint, headers=self.headers, json=data, **kwargs)
-        response.raise_for_status()
+        self._ensure_token()
+        try:
+            response = self.oauth.post(endpoint, headers=self.headers, json=data, **kwargs)
+        finally:
+            self._mutated("POST", endpoint, data)
+        self._raise_for_status(response)
         try:
             # response body may be empty, cannot be decoded
-            data = response.json()
-        except json.JSONDecodeError:
+            data = self.json_decoder(response.content)
+        except ValueError:
             data = {"status_code": response.status_code}
         return response_cls(**data)
 
     def _put(self, endpoint: str, data: dict, response_cls: TResponse = ListResponse, **kwargs) -> TResponse:
-        response = self.oauth.put(endpoint, headers=self.headers, json=data, **kwargs)
-        response.raise_for_status()
+        self._ensure_token()
+        try:
+            response = self.oauth.put(endpoint, headers=self.headers, json=data, **kwargs)
+        finally:
+            self._mutated("PUT", endpoint, data)
+        self._raise_for_status(response)
         try:
             # response body may be empty, cannot be decoded
-            data = response.json()
-        except json.JSONDecodeError:
+            data = self.json_decoder(response.content)
+        except ValueError:
             data = {"status_code": response.status_code}
         return response_cls(**data)
@@ -0,0 +1,44 @@
+import json
+from typing import Any, Callable
+
+
+# Decodes a JSON document from the bytes of a response body.
+JSONDecoder = Callable[[bytes], Any]
+
+
+def _orjson() -> JSONDecoder:
+    import orjson
+
+    return orjson.loads
+
+
+def _msgspec() -> JSONDecoder:
+    import msgspec
+
+    return msgspec.json.Decoder().decode
+
+
+def _stdlib() -> JSONDecoder:
+    return json.loads
+
+
+# JSON decoders in order of preference, by name
+DECODERS: dict[str, Callable[[], JSONDecoder]] = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+
+
+def get_decoder(name: str = None) -> JSONDecoder:
+    """Get a JSON decoder by name, or the fastest installed decoder: orjson, then msgspec, then the standard library.
+
+    Args:
+        name (str): One of the DECODERS, e.g. "json". If None, the fastest installed decoder is used.
+
+    Returns (JSONDecoder):
+        A function decoding a JSON document from bytes. It raises a ValueError for an invalid (e.g. empty) document.
+    """
+    if name is not None:
+        return DECODERS[name]()
+    for load in DECODERS.values():
+        try:
+            return load()
+        except ImportError:
+            continue
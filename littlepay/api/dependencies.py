@@ -0,0 +1,102 @@
+from typing import TYPE_CHECKING, Callable, Iterable
+
+if TYPE_CHECKING:
+    from littlepay.api.client import Client
+
+
+# Matches any single path segment of a resource pattern, e.g. an ID.
+ANY = "*"
+
+# Returns the endpoints whose cached responses a mutation affects, given the client, the IDs matched by the resource
+# pattern, and the request data.
+Dependents = Callable[["Client", list[str], dict | None], Iterable[str]]
+
+
+def _groups(client: "Client", ids: list[str], data: dict | None) -> list[str]:
+    return [client.concession_groups_endpoint()]
+
+
+def _group(client: "Client", ids: list[str], data: dict | None) -> list[str]:
+    return [client.concession_groups_endpoint(), client.concession_groups_endpoint(ids[0])]
+
+
+def _group_and_links(client: "Client", ids: list[str], data: dict | None) -> list[str]:
+    return [
+        *_group(client, ids, data),
+        client.concession_group_products_endpoint(ids[0]),
+        client.concession_group_funding_source_endpoint(ids[0]),
+    ]
+
+
+def _group_products(client: "Client", ids: list[str], data: dict | None) -> list[str]:
+    return [client.concession_group_products_endpoint(ids[0])]
+
+
+def _group_funding_sources(client: "Client", ids: list[str], data: dict | None) -> list[str]:
+    # the funding source is in the path, or in the data when linking
+    funding_source_id = ids[1] if len(ids) > 1 else (data or {}).get("id")
+    endpoints = [client.concession_group_funding_source_endpoint(ids[0])]
+    if funding_source_id:
+        endpoints.append(client.funding_source_concession_groups_endpoint(funding_source_id))
+    return endpoints
+
+
+# (HTTP method, resource pattern) of each mutation the client makes -> the endpoints whose cached responses it affects
+#
+# This is the one map of what a mutation invalidates: the client's response cache and in-memory caches by endpoint, and the
+# local snapshots by key, since snapshot keys mirror the endpoints (e.g. littlepay.snapshot.group_products_key).
+RESOURCE_DEPENDENCIES: dict[tuple[str, tuple[str, ...]], Dependents] = {
+    # create_concession_group
+    ("POST", ("concession_groups",)): _groups,
+    # remove_concession_group
+    ("DELETE", ("concession_groups", ANY)): _group_and_links,
+    # migrate_concession_group
+    ("POST", ("concession_groups", ANY, "migrate")): _group,
+    # link_concession_group_funding_source
+    ("POST", ("concession_groups", ANY, "fundingsources")): _group_funding_sources,
+    # update_concession_group_funding_source_expiry
+    ("PUT", ("concession_groups", ANY, "fundingsources", ANY)): _group_funding_sources,
+    # unlink_concession_group_funding_source
+    ("DELETE", ("concession_groups", ANY, "fundingsources", ANY)): _group_funding_sources,
+    # link_concession_group_product
+    ("POST", ("concession_groups", ANY, "products")): _group_products,
+    # unlink_concession_group_product
+    ("DELETE", ("concession_groups", ANY, "products", ANY)): _group_products,
+}
+
+
+def match_resource(pattern: tuple[str, ...], parts: list[str]) -> list[str] | None:
+    """The IDs in the path parts matched by ANY in pattern, or None if the parts don't match the pattern."""
+    if len(pattern) != len(parts):
+        return None
+    ids = []
+    for expected, part in zip(pattern, parts):
+        if expected == ANY:
+            ids.append(part)
+        elif expected != part:
+            return None
+    return ids
+
+
+def dependent_endpoints(client: "Client", method: str, parts: list[str], data: dict = None) -> list[str]:
+    """The endpoints whose cached responses a mutation of the resource at parts affects.
+
+    Args:
+        client (Client): The client making the mutation, to create endpoints.
+
+        method (str): The HTTP method of the mutation, e.g. "POST".
+
+        parts (list[str]): The path segments of the mutated resource after the API version, e.g. ["concession_groups", "1"].
+
+        data (dict): The request data of the mutation.
+
+    Returns (list[str]):
+        The endpoints from RESOURCE_DEPENDENCIES, or an empty list for a mutation not in the map, e.g. requesting card
+        tokenization access, which affects no cached listing.
+    """
+    for (dependency_method, pattern), dependents in RESOURCE_DEPENDENCIES.items():
+        if dependency_method == method:
+            ids = match_resource(pattern, parts)
+            if ids is not None:
+                return list(dependents(client, ids, data))
+    return []
@@ -1,8 +1,19 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Generator, List, Optional
+from typing import Generator, Iterable, List, Optional
 
-from littlepay.api import ClientProtocol
+from requests import HTTPError
+
+from littlepay.api import (
+    MAX_WORKERS,
+    ClientProtocol,
+    RawResponse,
+    item_decoder,
+    map_concurrent,
+    parse_datetime,
+    projection,
+)
+from littlepay.cache import MISSING, TTLCache
 
 from . import from_kwargs
 
@@ -33,20 +44,11 @@ class FundingSourceResponse:
         return from_kwargs(cls, **kwargs)
 
     def __post_init__(self):
-        """Parses any date parameters into Python datetime objects.
+        """Parses any date parameters into Python datetime objects, see parse_datetime().
 
         For @dataclasses with a generated __init__ function, this function is called automatically.
-
-        Includes a workaround for Python 3.10 where datetime.fromisoformat() can only parse the format output
-        by datetime.isoformat(), i.e. without a trailing 'Z' offset character and with UTC offset expressed
-        as +/-HH:mm
-
-        https://docs.python.org/3.12/library/datetime.html#datetime.datetime.fromisoformat
         """
-        if self.created_date:
-            self.created_date = datetime.fromisoformat(self.created_date.replace("Z", "+00:00", 1))
-        else:
-            self.created_date = None
+        self.created_date = parse_datetime(self.created_date)
 
 
 @dataclass
@@ -58,28 +60,13 @@ class FundingSourceDateFields:
     expiry_date: datetime | None = None
 
     def __post_init__(self):
-        """Parses any date parameters into Python datetime objects.
+        """Parses any date parameters into Python datetime objects, see parse_datetime().
 
         For @dataclasses with a generated __init__ function, this function is called automatically.
-
-        Includes a workaround for Python 3.10 where datetime.fromisoformat() can only parse the format output
-        by datetime.isoformat(), i.e. without a trailing 'Z' offset character and with UTC offset expressed
-        as +/-HH:mm
-
-        https://docs.python.org/3.12/library/datetime.html#datetime.datetime.fromisoformat
         """
-        if self.created_date:
-            self.created_date = datetime.fromisoformat(self.created_date.replace("Z", "+00:00", 1))
-        else:
-            self.created_date = None
-        if self.updated_date:
-            self.updated_date = datetime.fromisoformat(self.updated_date.replace("Z", "+00:00", 1))
-        else:
-            self.updated_date = None
-        if self.expiry_date:
-            self.expiry_date = datetime.fromisoformat(self.expiry_date.replace("Z", "+00:00", 1))
-        else:
-            self.expiry_date = None
+        self.created_date = parse_datetime(self.created_date)
+        self.updated_date = parse_datetime(self.updated_date)
+        self.expiry_date = parse_datetime(self.expiry_date)
 
 
 @dataclass(kw_only=True)
@@ -98,6 +85,34 @@ class FundingSourcesMixin(ClientProtocol):
 
     FUNDING_SOURCES = "fundingsources"
 
+    # card tokens map to the same funding source for as long as the card is valid
+    FUNDING_SOURCE_BY_TOKEN_TTL = 60 * 60
+    # a card token without a funding source may get one soon, e.g. after the rider's first tap
+    FUNDING_SOURCE_BY_TOKEN_NEGATIVE_TTL = 60
+
+    @property
+    def funding_source_by_token_cache(self) -> TTLCache:
+        """Cache of funding sources by card token, for batch lookups."""
+        if "_funding_source_by_token_cache" not in self.__dict__:
+            self._funding_source_by_token_cache = TTLCache(maxsize=10_000, ttl=self.FUNDING_SOURCE_BY_TOKEN_TTL)
+        return self._funding_source_by_token_cache
+
+    @property
+    def funding_source_by_token_negative_cache(self) -> TTLCache:
+        """Cache of card tokens without a funding source, for batch lookups."""
+        if "_funding_source_by_token_negative_cache" not in self.__dict__:
+            self._funding_source_by_token_negative_cache = TTLCache(
+                maxsize=10_000, ttl=self.FUNDING_SOURCE_BY_TOKEN_NEGATIVE_TTL
+            )
+        return self._funding_source_by_token_negative_cache
+
+    @property
+    def funding_source_groups_cache(self) -> TTLCache:
+        """Cache of linked concession groups by funding source ID, for batch lookups."""
+        if "_funding_source_groups_cache" not in self.__dict__:
+            self._funding_source_groups_cache = TTLCache(maxsize=10_000, ttl=5 * 60)
+        return self._funding_source_groups_cache
+
     def funding_source_by_token_endpoint(self, card_token) -> str:
         """Endpoint for a funding source by card token."""
         return self._make_endpoint(self.FUNDING_SOURCES, "bytoken", card_token)
@@ -106,15 +121,78 @@ class FundingSourcesMixin(ClientProtocol):
         """Endpoint for a funding source's concession groups."""
         return self._make_endpoint(self.FUNDING_SOURCES, funding_source_id, "concession_groups")
 
-    def get_funding_source_by_token(self, card_token) -> FundingSourceResponse:
-        """Return a FundingSourceResponse object from the funding source by token endpoint."""
+    def get_funding_source_by_token(self, card_token, fields: Iterable[str] = None) -> FundingSourceResponse | tuple:
+        """Return a FundingSourceResponse object from the funding source by token endpoint.
+
+        Optionally return a lightweight record with only the given fields instead, see projection().
+        """
         endpoint = self.funding_source_by_token_endpoint(card_token)
+        if fields is not None:
+            return projection(FundingSourceResponse, tuple(fields)).from_item(self._get(endpoint, RawResponse))
         return self._get(endpoint, FundingSourceResponse)
 
+    def get_funding_sources_by_token(
+        self, card_tokens: Iterable[str], max_workers: int = MAX_WORKERS
+    ) -> dict[str, FundingSourceResponse | None | Exception]:
+        """Get the funding sources for many card tokens, making concurrent API calls.
+
+        Duplicate card tokens are looked up once, and results are cached for later batches. Card tokens without a funding
+        source are cached separately, for a shorter time.
+
+        Returns (dict):
+            A FundingSourceResponse for each card token, in the order given; None if the card token has no funding source;
+            or the Exception raised when looking it up.
+        """
+        cache, negative_cache = self.funding_source_by_token_cache, self.funding_source_by_token_negative_cache
+        results = {}
+        for card_token in card_tokens:
+            results[card_token] = None if card_token in negative_cache else cache.get(card_token)
+        missing = [card_token for card_token, funding_source in results.items() if funding_source is MISSING]
+
+        for card_token, funding_source in map_concurrent(self.get_funding_source_by_token, missing, max_workers):
+            if isinstance(funding_source, HTTPError) and getattr(funding_source.response, "status_code", None) == 404:
+                negative_cache.set(card_token, None)
+                funding_source = None
+            elif not isinstance(funding_source, Exception):
+                cache.set(card_token, funding_source)
+            results[card_token] = funding_source
+
+        return results
+
     def get_funding_source_linked_concession_groups(
-        self, funding_source_id: str
-    ) -> Generator[FundingSourceGroupResponse, None, None]:
-        """Yield FundingSourceGroupResponse objects representing linked concession groups."""
+        self, funding_source_id: str, raw: bool = False, fields: Iterable[str] = None
+    ) -> Generator[FundingSourceGroupResponse | dict | tuple, None, None]:
+        """Yield FundingSourceGroupResponse objects representing linked concession groups.
+
+        Optionally yield the decoded dicts instead with raw=True, skipping building the FundingSourceGroupResponse objects
+        and parsing their dates. Or optionally yield lightweight records with only the given fields, see projection().
+        """
         endpoint = self.funding_source_concession_groups_endpoint(funding_source_id)
+        decode = item_decoder(FundingSourceGroupResponse, raw, fields)
         for item in self._get_list(endpoint, per_page=100):
-            yield FundingSourceGroupResponse(**item)
+            yield decode(item)
+
+    def get_funding_sources_linked_concession_groups(
+        self, funding_source_ids: Iterable[str], max_workers: int = MAX_WORKERS
+    ) -> dict[str, List[FundingSourceGroupResponse] | Exception]:
+        """Get the linked concession groups for many funding sources, making concurrent API calls.
+
+        Duplicate funding source IDs are looked up once, and results are cached for later batches.
+
+        Returns (dict):
+            A list of FundingSourceGroupResponse objects for each funding source ID, in the order given, or the Exception
+            raised when looking it up.
+        """
+        cache = self.funding_source_groups_cache
+        results = {funding_source_id: cache.get(funding_source_id) for funding_source_id in funding_source_ids}
+        missing = [funding_source_id for funding_source_id, groups in results.items() if groups is MISSING]
+
+        def _lookup(funding_source_id):
+            return list(self.get_funding_source_linked_concession_groups(funding_source_id))
+
+        for funding_source_id, groups in map_concurrent(_lookup, missing, max_workers):
+            if not isinstance(groups, Exception):
+                cache.set(funding_source_id, groups)
+            results[funding_source_id] = groups
+
+        return results
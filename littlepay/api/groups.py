@@ -1,9 +1,20 @@
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Generator
+from typing import Generator, Iterable
 
-from littlepay.api import ClientProtocol, from_kwargs
+from littlepay.api import MAX_WORKERS, ClientProtocol, from_kwargs, item_decoder, map_concurrent
 from littlepay.api.funding_sources import FundingSourceDateFields, FundingSourcesMixin
+from littlepay.checkpoint import Checkpoint
+
+
+def normalize_expiry(expiry: datetime) -> datetime:
+    """Normalize an expiry to an "aware" datetime in UTC with whole seconds, the way it is sent to the API.
+
+    A "naive" expiry (without time zone information) is assumed to be in UTC.
+    """
+    if expiry.tzinfo is None or expiry.tzinfo.utcoffset(expiry) is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry.astimezone(timezone.utc).replace(microsecond=0)
 
 
 @dataclass
@@ -76,11 +87,18 @@ class GroupsMixin(ClientProtocol):
         data = {"label": group_label}
         return self._post(endpoint, data, dict)
 
-    def get_concession_groups(self) -> Generator[GroupResponse, None, None]:
-        """Yield GroupResponse objects from the concession_groups endpoint."""
+    def get_concession_groups(
+        self, raw: bool = False, fields: Iterable[str] = None
+    ) -> Generator[GroupResponse | dict | tuple, None, None]:
+        """Yield GroupResponse objects from the concession_groups endpoint.
+
+        Optionally yield the decoded dicts instead with raw=True, skipping building the GroupResponse objects. Or optionally
+        yield lightweight records with only the given fields, see projection().
+        """
         endpoint = self.concession_groups_endpoint()
+        decode = item_decoder(GroupResponse, raw, fields)
         for item in self._get_list(endpoint):
-            yield GroupResponse(**item)
+            yield decode(item)
 
     def remove_concession_group(self, group_id) -> bool:
         """Remove an existing concession group."""
@@ -92,11 +110,34 @@ class GroupsMixin(ClientProtocol):
         endpoint = self.concession_groups_endpoint(group_id, "migrate")
         return self._post(endpoint, None, dict)
 
-    def get_concession_group_linked_funding_sources(self, group_id) -> Generator[GroupFundingSourceResponse, None, None]:
-        """Yield GroupFundingSourceResponse objects representing linked funding sources from the concession_groups endpoint."""
+    def get_concession_group_linked_funding_sources(
+        self, group_id, checkpoint: Checkpoint = None, raw: bool = False, fields: Iterable[str] = None
+    ) -> Generator[GroupFundingSourceResponse | dict | tuple, None, None]:
+        """Yield GroupFundingSourceResponse objects representing linked funding sources from the concession_groups endpoint.
+
+        Optionally provide a Checkpoint to resume an interrupted listing. Optionally yield the decoded dicts instead with
+        raw=True, skipping building the GroupFundingSourceResponse objects and parsing their dates. Or optionally yield
+        lightweight records with only the given fields, see projection().
+        """
         endpoint = self.concession_group_funding_source_endpoint(group_id)
-        for item in self._get_list(endpoint):
-            yield GroupFundingSourceResponse(**item)
+        decode = item_decoder(GroupFundingSourceResponse, raw, fields)
+        for item in self._get_list(endpoint, checkpoint=checkpoint):
+            yield decode(item)
+
+    def get_concession_groups_linked_funding_sources(
+        self, group_ids: Iterable[str], max_workers: int = MAX_WORKERS
+    ) -> dict[str, list[GroupFundingSourceResponse] | Exception]:
+        """Get the linked funding sources for many concession groups, making concurrent API calls.
+
+        Returns (dict):
+            A list of GroupFundingSourceResponse objects for each distinct group ID, in the order given, or the Exception
+            raised when looking it up.
+        """
+
+        def _lookup(group_id):
+            return list(self.get_concession_group_linked_funding_sources(group_id))
+
+        return dict(map_concurrent(_lookup, dict.fromkeys(group_ids), max_workers))
 
     def link_concession_group_funding_source(self, group_id: str, funding_source_id: str, expiry: datetime = None) -> dict:
         """Link a funding source to a concession group."""
@@ -113,9 +154,41 @@ class GroupsMixin(ClientProtocol):
         endpoint = self.concession_group_funding_source_endpoint(group_id, funding_source_id)
         return self._delete(endpoint)
 
+    def unlink_concession_group_funding_sources(
+        self, group_id: str, funding_source_ids: Iterable[str], max_workers: int = MAX_WORKERS
+    ) -> dict[str, bool | Exception]:
+        """Unlink many funding sources from a concession group, making concurrent API calls.
+
+        Returns (dict):
+            True for each distinct funding source ID that was unlinked, in the order given, or the Exception raised when
+            unlinking it.
+        """
+
+        def _unlink(funding_source_id):
+            return self.unlink_concession_group_funding_source(group_id, funding_source_id)
+
+        return dict(map_concurrent(_unlink, dict.fromkeys(funding_source_ids), max_workers))
+
     def update_concession_group_funding_source_expiry(self, group_id: str, funding_source_id: str, expiry: datetime) -> dict:
         """Update the expiry of a funding source already linked to a concession group."""
         endpoint = self.concession_group_funding_source_endpoint(group_id, funding_source_id)
         data = {"expiry": self._format_expiry(expiry)}
 
         return self._put(endpoint, data, dict)
+
+    def update_concession_group_funding_sources_expiry(
+        self, updates: Iterable[tuple[str, str, datetime]], max_workers: int = MAX_WORKERS
+    ) -> dict[tuple[str, str, datetime], dict | Exception]:
+        """Update the expiry of many funding sources already linked to concession groups, making concurrent API calls.
+
+        Args:
+            updates (Iterable[tuple[str, str, datetime]]): (group_id, funding_source_id, expiry) for each update.
+
+        Returns (dict):
+            The response for each update, in the order given, or the Exception raised when making it.
+        """
+
+        def _update(update):
+            return self.update_concession_group_funding_source_expiry(*update)
+
+        return dict(map_concurrent(_update, updates, max_workers))
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
-from typing import Generator
+from typing import Generator, Iterable
 
-from littlepay.api import ClientProtocol, from_kwargs
+from littlepay.api import MAX_WORKERS, ClientProtocol, RawResponse, from_kwargs, item_decoder, map_concurrent
 from littlepay.api.groups import GroupsMixin
 
 
@@ -47,12 +47,42 @@ class ProductsMixin(GroupsMixin, ClientProtocol):
             for product in self.get_products(item["id"]):
                 yield product
 
-    def get_products(self, product_id: str = None, status: str = None) -> Generator[ProductResponse, None, None]:
-        """Yield ProductResponse objects from the products endpoint."""
+    def get_concession_group_product_ids(self, group_id: str) -> Generator[str, None, None]:
+        """Yield the IDs of the concession_group's products, without looking up each product's details."""
+        endpoint = self.concession_group_products_endpoint(group_id)
+        for item in self._get_list(endpoint):
+            yield item["id"]
+
+    def get_concession_groups_product_ids(
+        self, group_ids: Iterable[str], max_workers: int = MAX_WORKERS
+    ) -> dict[str, list[str] | Exception]:
+        """Get the IDs of the linked products for many concession groups, making concurrent API calls.
+
+        Returns (dict):
+            A list of product IDs for each distinct group ID, in the order given, or the Exception raised when looking
+            it up.
+        """
+
+        def _lookup(group_id):
+            return list(self.get_concession_group_product_ids(group_id))
+
+        return dict(map_concurrent(_lookup, dict.fromkeys(group_ids), max_workers))
+
+    def get_products(
+        self, product_id: str = None, status: str = None, raw: bool = False, fields: Iterable[str] = None
+    ) -> Generator[ProductResponse | dict | tuple, None, None]:
+        """Yield ProductResponse objects from the products endpoint.
+
+        Optionally yield the decoded dicts instead with raw=True, skipping building the ProductResponse objects. Or
+        optionally yield lightweight records with only the given fields, see projection().
+        """
         endpoint = self.products_endpoint(product_id)
+        decode = item_decoder(ProductResponse, raw, fields)
         if product_id is None:
             for item in self._get_list(endpoint, status=status, perPage=100):
-                yield ProductResponse(**item)
+                yield decode(item)
+        elif raw or fields is not None:
+            yield decode(self._get(endpoint, RawResponse))
         else:
             yield self._get(endpoint, ProductResponse)
 
@@ -0,0 +1,107 @@
+from concurrent.futures import Future
+import logging
+from threading import Lock, Thread
+import time
+from typing import Callable
+
+from authlib.oauth2.rfc6749 import OAuth2Token
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenProvider:
+    """Thread-safe provider of an access token, reusing a token until shortly before it expires.
+
+    Concurrent callers needing a new token share a single in-flight request for it. With background refresh enabled, a
+    token close to its expiry is still handed out while a new one is requested in a background thread. A failed
+    background refresh isn't retried in the background for retry_after seconds.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], OAuth2Token],
+        refresh_margin: float = 60,
+        background_refresh: float | None = None,
+        retry_after: float = 30,
+    ):
+        """Initialize a new TokenProvider.
+
+        Args:
+            fetch (Callable[[], OAuth2Token]): Requests a new token.
+
+            refresh_margin (float): Seconds before its expiry that a token is no longer handed out.
+
+            background_refresh (float): Seconds before its expiry that a new token is requested in the background, while
+            the current token is still handed out. If None, tokens are only requested when needed.
+
+            retry_after (float): Seconds after a failed token request before another is started in the background. A
+            caller needing a new token still requests one right away.
+        """
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+        self.retry_after = retry_after
+        self._token: OAuth2Token | None = None
+        self._pending: Future | None = None
+        # monotonic time before which no background refresh is started, after a failed request
+        self._retry_at = 0.0
+        self._lock = Lock()
+
+    def _remaining(self, token: OAuth2Token) -> float:
+        """Seconds until token expires, or infinity for a token without an expiry."""
+        expires_at = token.get("expires_at")
+        return float("inf") if expires_at is None else expires_at - time.time()
+
+    def _claim(self) -> tuple[Future, bool]:
+        """Get the Future for the token request in flight, starting one if there is none.
+
+        Returns (tuple[Future, bool]):
+            The Future, and True if the caller started the request and must complete it.
+        """
+        with self._lock:
+            leader = self._pending is None
+            if leader:
+                self._pending = Future()
+            return self._pending, leader
+
+    def _complete(self, future: Future) -> None:
+        """Request a new token, resolving the Future for callers waiting on it."""
+        try:
+            token = self.fetch()
+        except Exception as ex:
+            with self._lock:
+                self._pending = None
+                self._retry_at = time.monotonic() + self.retry_after
+            logger.warning(f"Token request failed: {ex}")
+            future.set_exception(ex)
+        else:
+            with self._lock:
+                self._token, self._pending, self._retry_at = token, None, 0.0
+            future.set_result(token)
+
+    def get(self) -> OAuth2Token:
+        """Get a token valid for at least refresh_margin seconds, requesting a new one only if needed."""
+        token = self._token
+        if token is not None:
+            remaining = self._remaining(token)
+            if remaining > self.refresh_margin:
+                if (
+                    self.background_refresh is not None
+                    and remaining <= self.background_refresh
+                    and time.monotonic() >= self._retry_at
+                ):
+                    future, leader = self._claim()
+                    if leader:
+                        Thread(target=self._complete, args=(future,), daemon=True).start()
+                return token
+
+        future, leader = self._claim()
+        if leader:
+            self._complete(future)
+        return future.result()
+
+    def clear(self) -> None:
+        """Forget the current token, e.g. if it was revoked, so the next call to get requests a new one."""
+        with self._lock:
+            self._token = None
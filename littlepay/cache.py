@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+from typing import Any, Hashable
+
+
+# Sentinel returned by TTLCache.get for keys that are missing or expired.
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe, in-memory LRU cache where each entry expires after a time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60 * 60):
+        """Initialize a new TTLCache.
+
+        Args:
+            maxsize (int): The maximum number of entries to keep. The least recently used entry is evicted when full.
+
+            ttl (float): The default number of seconds an entry remains in the cache.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Get the value cached for key, or default if the key is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """Cache value for key, for ttl seconds or the default TTL."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove any value cached for key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all cached values."""
+        with self._lock:
+            self._entries.clear()
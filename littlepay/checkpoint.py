@@ -0,0 +1,113 @@
+from hashlib import sha256
+from itertools import islice
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Generator, Iterable
+
+from littlepay.config import CONFIG_DIR, Config
+
+
+CHECKPOINT_FILE = CONFIG_DIR / "checkpoints.json"
+
+# guards reading and writing the checkpoint file from threads in this process
+_lock = Lock()
+
+
+def _checkpoint_from_active_config(config: Config, job: str):
+    """Create a Checkpoint for a job against the active config targets.
+
+    This function should not be called directly, use the static method Checkpoint.from_active_config(Config, str) instead.
+
+    Args:
+        config (Config): The Config instance from which to read the active env and participant.
+
+        job (str): A name for the job, e.g. "groups sweep".
+    """
+    return Checkpoint(job=job, env=config.active_env_name, participant=config.active_participant_id)
+
+
+class Checkpoint:
+    """Progress of a long-running job for an env and participant, persisted to a local JSON file so the job can resume."""
+
+    from_active_config = staticmethod(_checkpoint_from_active_config)
+
+    def __init__(self, job: str, env: str, participant: str, path: str | Path = None):
+        """Initialize a new Checkpoint for the given job, env and participant.
+
+        Args:
+            job (str): A name for the job, e.g. "groups sweep".
+
+            env (str): The name of the environment the job runs against.
+
+            participant (str): The participant_id the job runs against.
+
+            path (str|Path): Path to the JSON file. If None, the default is used.
+        """
+        self.job = job
+        self.env = env
+        self.participant = participant
+        self.path = Path(path if path is not None else CHECKPOINT_FILE)
+
+    @property
+    def key(self) -> str:
+        return f"{self.env}/{self.participant}/{self.job}"
+
+    @property
+    def items_path(self) -> Path:
+        """Path to the JSON Lines file of items saved for this job, next to the checkpoint file."""
+        digest = sha256(self.key.encode()).hexdigest()[:16]
+        return self.path.with_name(f"{self.path.stem}.{digest}.jsonl")
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text())
+        except json.JSONDecodeError:
+            # a corrupt file can't be resumed from, start over
+            return {}
+
+    def _write(self, checkpoints: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file and swap it in, so an interruption never leaves a partial file behind
+        temp = self.path.with_name(f"{self.path.name}.tmp")
+        temp.write_text(json.dumps(checkpoints, indent=2))
+        os.replace(temp, self.path)
+
+    def load(self) -> dict:
+        """Get the state saved for this job, or an empty dict if there is none."""
+        with _lock:
+            return self._read().get(self.key, {})
+
+    def save(self, **state) -> dict:
+        """Update the state saved for this job with the given values, returning the updated state."""
+        with _lock:
+            checkpoints = self._read()
+            current = checkpoints.setdefault(self.key, {})
+            current.update(state)
+            self._write(checkpoints)
+            return current
+
+    def append(self, items: Iterable[dict]) -> None:
+        """Save items produced by this job so far, e.g. a page of a listing, to be replayed when resuming."""
+        self.items_path.parent.mkdir(parents=True, exist_ok=True)
+        with _lock, self.items_path.open("a") as f:
+            f.writelines(json.dumps(item) + "\n" for item in items)
+
+    def items(self, count: int = None) -> Generator[dict, None, None]:
+        """Yield the items saved for this job in the order they were appended, optionally only the first count items."""
+        if not self.items_path.exists():
+            return
+        with self.items_path.open() as f:
+            for line in islice(f, count):
+                yield json.loads(line)
+
+    def clear(self) -> None:
+        """Remove the state and items saved for this job, e.g. once it completes."""
+        with _lock:
+            checkpoints = self._read()
+            if checkpoints.pop(self.key, None) is not None:
+                self._write(checkpoints)
+            self.items_path.unlink(missing_ok=True)
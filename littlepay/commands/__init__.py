@@ -1,12 +1,123 @@
+from hashlib import sha256
+import json
+from pathlib import Path
+import sys
+from typing import TYPE_CHECKING, Callable, Sequence, TypeVar
+
+from littlepay.checkpoint import Checkpoint
 from littlepay.config import ENV_PROD, Config
 
+if TYPE_CHECKING:
+    # only needed for annotations, avoid importing the API client until a command creates one
+    from authlib.oauth2.rfc6749 import OAuth2Token
+
+    from littlepay.api.client import Client
+
 
 RESULT_SUCCESS = 0
 RESULT_FAILURE = 1
 
+# Generic type parameter, used to represent the items processed by a bulk command.
+TItem = TypeVar("TItem")
+
 
 def print_active_message(config: Config, message: str, postfix: str = None):
     """Print a message including information about the active configuration."""
     alert = "⚠️  " if config.active_env_name == ENV_PROD else ""
     line = f"{message}: {alert}{config.active_env_name}, {config.active_participant_id}{' ' + postfix if postfix else ''}"
     print(line.strip())
+
+
+def acquire_token(config: Config, client: "Client") -> "OAuth2Token":
+    """Get the client's access token, saving it as the active token only if it isn't already saved.
+
+    With a saved token that is still valid, this requests no new token and writes no config.
+    """
+    token = client.token
+    if config.active_token != token:
+        config.active_token = token
+    return token
+
+
+def read_lines(path: str | Path) -> list[str]:
+    """Read the non-empty lines from a file, or from stdin if path is "-", with surrounding whitespace removed."""
+    if str(path) == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = Path(path).read_text().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def _item_key(item) -> str:
+    """The key identifying an item of a bulk command: its ID for an API response, or the item itself."""
+    return str(getattr(item, "id", item))
+
+
+def _items_digest(items: Sequence[TItem], key: Callable[[TItem], str]) -> str:
+    """A digest of the ordered keys of items, changing when any item is added, removed, replaced or moved."""
+    return sha256(json.dumps([key(item) for item in items]).encode()).hexdigest()
+
+
+def resumable(
+    config: Config,
+    job: str,
+    items: Sequence[TItem],
+    process: Callable[[TItem], int],
+    resume: bool = False,
+    key: Callable[[TItem], str] = None,
+) -> int:
+    """Process items for a bulk command, saving progress after each item so an interrupted run can resume.
+
+    The keys of items that failed to process are saved too, and a resumed run retries them before the items an
+    interrupted run didn't get to. The checkpoint is only cleared once every item was processed successfully.
+
+    Args:
+        config (Config): The Config instance from which to read the active env and participant.
+
+        job (str): A name for the command and its target, e.g. "groups link <product_id>".
+
+        items (Sequence[TItem]): The items to process, in the same order on each run.
+
+        process (Callable[[TItem], int]): Processes an item, returning RESULT_SUCCESS or RESULT_FAILURE.
+
+        resume (bool): True to skip the items processed successfully by an earlier run. Otherwise start over. A run whose
+        items changed since the earlier run starts over.
+
+        key (Callable[[TItem], str]): Identifies each item, to detect changed items and save failed items. If None, an
+        item's id attribute or the item itself is used.
+
+    Returns (int):
+        RESULT_SUCCESS if every item was processed successfully, otherwise RESULT_FAILURE.
+    """
+    key = key or _item_key
+    checkpoint = Checkpoint.from_active_config(config, job)
+    state = checkpoint.load() if resume else {}
+    offset = state.get("offset", 0)
+    failed = set(state.get("failed", []))
+    digest = _items_digest(items, key)
+
+    if (offset or failed) and (state.get("total") != len(items) or state.get("digest") != digest):
+        print("⚠️  Items changed since the interrupted run, starting over")
+        offset, failed = 0, set()
+    elif offset:
+        print(f"Resuming after {offset} of {len(items)}{f', retrying {len(failed)} failed' if failed else ''}")
+
+    def _process(item: TItem, processed: int) -> None:
+        if process(item) == RESULT_SUCCESS:
+            failed.discard(key(item))
+        else:
+            failed.add(key(item))
+        checkpoint.save(offset=processed, failed=sorted(failed), total=len(items), digest=digest)
+
+    # items that failed in the earlier run are retried first
+    for item in [item for item in items[:offset] if key(item) in failed]:
+        _process(item, offset)
+    for i in range(offset, len(items)):
+        _process(items[i], i + 1)
+
+    if failed:
+        print(f"Run again with --resume to retry the {len(failed)} failed")
+        return RESULT_FAILURE
+
+    checkpoint.clear()
+    return RESULT_SUCCESS
@@ -0,0 +1,131 @@
+from argparse import Namespace
+from datetime import datetime
+from itertools import groupby
+import json
+import shlex
+
+from littlepay.api import MAX_WORKERS, map_concurrent, parse_datetime
+from littlepay.api.client import Client, reuse_clients
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, acquire_token, print_active_message, read_lines
+from littlepay.config import Config
+
+
+# commands that can't run from a batch file
+UNSUPPORTED_COMMANDS = ("batch", "serve")
+
+
+def _expiry(op: dict) -> datetime | None:
+    return parse_datetime(op.get("expiry"))
+
+
+# JSON operation name -> function calling the API
+# the client invalidates the snapshots each operation changes, see littlepay.api.dependencies.RESOURCE_DEPENDENCIES
+OPERATIONS = {
+    "create_group": lambda client, op: client.create_concession_group(op["label"]),
+    "link_product": lambda client, op: client.link_concession_group_product(op["group_id"], op["product_id"]),
+    "unlink_product": lambda client, op: client.unlink_concession_group_product(op["group_id"], op["product_id"]),
+    "link_funding_source": lambda client, op: client.link_concession_group_funding_source(
+        op["group_id"], op["funding_source_id"], _expiry(op)
+    ),
+    "unlink_funding_source": lambda client, op: client.unlink_concession_group_funding_source(
+        op["group_id"], op["funding_source_id"]
+    ),
+    "update_expiry": lambda client, op: client.update_concession_group_funding_source_expiry(
+        op["group_id"], op["funding_source_id"], _expiry(op)
+    ),
+}
+
+
+def batch(args: Namespace = None) -> int:
+    config = Config()
+    max_workers = getattr(args, "workers", MAX_WORKERS)
+    lines = [(number, line) for number, line in enumerate(read_lines(args.file), start=1) if not line.startswith("#")]
+
+    # commands in the batch share this process' Client (and its token and connection pool)
+    reused = reuse_clients()
+    try:
+        client = Client.from_active_config(config)
+        acquire_token(config, client)
+
+        print_active_message(config, f"📦 Running batch ({len(lines)})")
+
+        succeeded, failed = 0, 0
+        # consecutive JSON operations run concurrently, command lines run one at a time, in order
+        for is_operation, group in groupby(lines, key=lambda line: line[1].startswith("{")):
+            if is_operation:
+                results = run_operations(client, list(group), max_workers)
+            else:
+                results = [run_command(number, line) for number, line in group]
+            succeeded += results.count(RESULT_SUCCESS)
+            failed += results.count(RESULT_FAILURE)
+    finally:
+        reuse_clients(reused)
+
+    print_active_message(config, f"📦 Batch complete ({succeeded} succeeded, {failed} failed)")
+
+    return RESULT_SUCCESS if failed == 0 else RESULT_FAILURE
+
+
+def run_command(number: int, line: str) -> int:
+    """Run a command line like `groups -f label link product_id` from a batch file."""
+    # imported here since littlepay.main imports this module when running the batch command
+    from littlepay.main import run
+
+    try:
+        argv = shlex.split(line)
+    except ValueError as err:
+        print(f"❌ Error: line {number}: {err}")
+        return RESULT_FAILURE
+
+    if argv[0] in UNSUPPORTED_COMMANDS:
+        print(f"❌ Error: line {number}: {argv[0]} is not supported in a batch")
+        return RESULT_FAILURE
+
+    try:
+        result = run(argv)
+    except SystemExit as ex:
+        # from argparse, for invalid arguments
+        result = RESULT_SUCCESS if not ex.code else RESULT_FAILURE
+
+    return RESULT_SUCCESS if result == RESULT_SUCCESS else RESULT_FAILURE
+
+
+def run_operations(client: Client, lines: list[tuple[int, str]], max_workers: int = MAX_WORKERS) -> list:
+    """Run JSON operations like {"op": "link_product", "group_id": "...", "product_id": "..."} from a batch file."""
+    results = []
+    operations = []
+
+    for number, line in lines:
+        try:
+            op = json.loads(line)
+            if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+                raise ValueError(f"Unsupported op, must be one of: {', '.join(OPERATIONS)}")
+            operations.append((f"line {number}", op))
+        except ValueError as err:
+            print(f"❌ Error: line {number}: {err}")
+            results.append(RESULT_FAILURE)
+
+    return results + apply_operations(client, operations, max_workers)
+
+
+def apply_operations(client: Client, operations: list[tuple[str, dict]], max_workers: int = MAX_WORKERS) -> list:
+    """Apply (label, operation) pairs concurrently, printing the outcome of each by its label, in order.
+
+    Returns (list):
+        RESULT_SUCCESS or RESULT_FAILURE for each operation.
+    """
+    results = []
+    outcomes = map_concurrent(lambda item: OPERATIONS[item[1]["op"]](client, item[1]), operations, max_workers)
+
+    for (label, op), result in outcomes:
+        if isinstance(result, KeyError):
+            print(f"❌ Error: {label}: {op['op']}: missing {result}")
+            results.append(RESULT_FAILURE)
+        elif isinstance(result, Exception):
+            print(f"❌ Error: {label}: {op['op']}: {result}")
+            results.append(RESULT_FAILURE)
+        else:
+            print(f"✅ {label}: {op['op']}")
+            results.append(RESULT_SUCCESS)
+
+    return results
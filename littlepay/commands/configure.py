@@ -2,7 +2,7 @@ import datetime
 from pathlib import Path
 
 from littlepay.api.client import Client
-from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, print_active_message
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, acquire_token, print_active_message
 from littlepay.config import Config
 
 
@@ -38,7 +38,7 @@ def configure(config_path: str | Path = None) -> int:
         return RESULT_FAILURE
 
     # save the active token for reuse in later commands
-    config.active_token = Client.from_active_config(config).token
+    acquire_token(config, Client.from_active_config(config))
 
     if config.active_token is None or config.active_token == {}:
         print_active_message(config, "❌ Active", "[misconfigured credentials]")
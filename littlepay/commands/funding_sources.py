@@ -0,0 +1,83 @@
+from argparse import Namespace
+
+from littlepay.api import MAX_WORKERS
+from littlepay.api.client import Client
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, acquire_token, print_active_message, read_lines
+from littlepay.config import Config
+
+
+def funding_sources(args: Namespace = None) -> int:
+    return_code = RESULT_SUCCESS
+    config = Config()
+    client = Client.from_active_config(config)
+
+    acquire_token(config, client)
+
+    csv_output = hasattr(args, "csv") and args.csv
+
+    if hasattr(args, "funding_source_command"):
+        command = args.funding_source_command
+    else:
+        command = None
+
+    if command == "groups":
+        values = read_lines(args.file)
+        tokens = getattr(args, "tokens", False)
+        max_workers = getattr(args, "workers", MAX_WORKERS)
+        return_code += linked_groups(client, values, tokens, csv_output, max_workers)
+
+    return RESULT_SUCCESS if return_code == RESULT_SUCCESS else RESULT_FAILURE
+
+
+def linked_groups(
+    client: Client, values: list[str], tokens: bool = False, csv_output: bool = False, max_workers: int = MAX_WORKERS
+) -> int:
+    config = Config()
+    return_code = RESULT_SUCCESS
+
+    # de-duplicate while keeping the input order
+    values = list(dict.fromkeys(values))
+
+    if tokens:
+        # resolve card tokens to funding source IDs first
+        funding_source_ids = {}
+        for card_token, result in client.get_funding_sources_by_token(values, max_workers).items():
+            if result is None:
+                print(f"❌ Error: {card_token}: no funding source for card token")
+                return_code = RESULT_FAILURE
+            elif isinstance(result, Exception):
+                print(f"❌ Error: {card_token}: {result}")
+                return_code = RESULT_FAILURE
+            else:
+                funding_source_ids[card_token] = result.id
+    else:
+        funding_source_ids = {value: value for value in values}
+
+    results = client.get_funding_sources_linked_concession_groups(funding_source_ids.values(), max_workers)
+
+    if csv_output:
+        print(f"{'card_token,' if tokens else ''}funding_source_id,group_id,label,expiry_date")
+    else:
+        print_active_message(config, f"💵 Funding sources ({len(funding_source_ids)})")
+
+    for value, funding_source_id in funding_source_ids.items():
+        groups = results[funding_source_id]
+        prefix = f"{value},{funding_source_id}" if tokens else funding_source_id
+
+        if isinstance(groups, Exception):
+            print(f"❌ Error: {funding_source_id}: {groups}")
+            return_code = RESULT_FAILURE
+        elif csv_output:
+            for group in groups:
+                expiry = group.expiry_date.isoformat() if group.expiry_date else ""
+                label = f'"{group.label}"' if "," in group.label else group.label
+                print(f"{prefix},{group.group_id},{label},{expiry}")
+            if not groups:
+                print(f"{prefix},,,")
+        else:
+            print(f"{value} ({funding_source_id})" if tokens else funding_source_id)
+            print(f"  👥 Linked groups ({len(groups)})")
+            for group in groups:
+                print(" ", group)
+
+    return return_code
@@ -1,11 +1,24 @@
 from argparse import Namespace
+import csv
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
 
 from requests import HTTPError
 
+from littlepay.api import MAX_WORKERS, map_concurrent, parse_datetime
 from littlepay.api.client import Client
-from littlepay.api.groups import GroupResponse
-from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, print_active_message
+from littlepay.api.groups import GroupFundingSourceResponse, GroupResponse, normalize_expiry
+from littlepay.api.products import ProductResponse
+from littlepay.checkpoint import Checkpoint
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, acquire_token, print_active_message, read_lines, resumable
 from littlepay.config import Config
+from littlepay.search import MATCH_SUBSTRING
+from littlepay.snapshot import CONCESSION_GROUPS, Snapshot, group_funding_sources_key, group_products_key
+from littlepay.sync import FundingSourceEvent, sync_group_funding_sources
+
+
+# subcommands that change groups or their links, choosing the groups to change from a live listing rather than the snapshot
+MUTATING_COMMANDS = ["create", "remove", "link", "unlink", "migrate", "expiry", "sweep"]
 
 
 def groups(args: Namespace = None) -> int:
@@ -13,8 +26,7 @@ def groups(args: Namespace = None) -> int:
     config = Config()
     client = Client.from_active_config(config)
 
-    client.oauth.ensure_active_token(client.token)
-    config.active_token = client.token
+    acquire_token(config, client)
 
     csv_output = hasattr(args, "csv") and args.csv
 
@@ -23,36 +35,60 @@ def groups(args: Namespace = None) -> int:
     else:
         command = None
 
+    snapshot = Snapshot.from_active_config(config)
+    refresh = getattr(args, "refresh", False) or command in MUTATING_COMMANDS
+
     if command == "create":
         return_code += create_group(client, args.group_label)
     elif command == "remove":
         return_code += remove_group(client, args.group_id, getattr(args, "force", False))
 
-    groups = client.get_concession_groups()
+    groups = snapshot.load(CONCESSION_GROUPS, GroupResponse, client.get_concession_groups, refresh)
 
     if hasattr(args, "group_terms") and args.group_terms is not None:
-        terms = [t.lower() for t in args.group_terms if t]
-        groups = filter(
-            lambda g: any([term in g.id.lower() or term in g.label.lower() for term in terms]),
-            groups,
-        )
+        match = getattr(args, "match", MATCH_SUBSTRING)
+        groups = snapshot.search(CONCESSION_GROUPS, groups, args.group_terms, match)
 
-    groups = list(groups)
+    resume = getattr(args, "resume", False)
 
     if command == "link":
-        for group in groups:
-            return_code += link_product(client, group.id, args.product_id)
+        return_code += resumable(
+            config, f"groups link {args.product_id}", groups, lambda g: link_product(client, g.id, args.product_id), resume
+        )
     elif command == "unlink" and getattr(args, "product", None):
-        for group in groups:
-            return_code += unlink_product(client, group.id, args.product)
+        return_code += resumable(
+            config, f"groups unlink -p {args.product}", groups, lambda g: unlink_product(client, g.id, args.product), resume
+        )
     elif command == "unlink" and getattr(args, "source", None):
-        for group in groups:
-            return_code += unlink_funding_source(client, group.id, args.source)
+        return_code += resumable(
+            config,
+            f"groups unlink -s {args.source}",
+            groups,
+            lambda g: unlink_funding_source(client, g.id, args.source),
+            resume,
+        )
     elif command == "migrate":
-        for group in groups:
-            return_code += migrate_group(client, group.id, getattr(args, "force", False))
+        force = getattr(args, "force", False)
+        return_code += resumable(config, "groups migrate", groups, lambda g: migrate_group(client, g.id, force), resume)
+    elif command == "expiry":
+        rows = list(csv.reader(read_lines(args.file)))
+        max_workers = getattr(args, "workers", MAX_WORKERS)
+        return_code += update_expiry(client, [group.id for group in groups], rows, max_workers)
+    elif command == "sweep":
+        return_code += sweep(
+            client,
+            [group.id for group in groups],
+            getattr(args, "grace", 0),
+            getattr(args, "dry_run", False),
+            resume,
+            getattr(args, "workers", MAX_WORKERS),
+        )
+
+    sync = command == "funding_sources" and getattr(args, "sync", False)
 
-    if csv_output and command != "products":
+    if csv_output and sync:
+        print(FundingSourceEvent.csv_header())
+    elif csv_output and command != "products":
         print(GroupResponse.csv_header())
     elif csv_output and command == "products":
         # print a custom CSV header for group<>product associations
@@ -64,7 +100,12 @@ def groups(args: Namespace = None) -> int:
         if not csv_output:
             print(group)
         if command == "products":
-            products = list(client.get_concession_group_products(group.id))
+            products = snapshot.load(
+                group_products_key(group.id),
+                ProductResponse,
+                lambda: client.get_concession_group_products(group.id),
+                refresh,
+            )
             if not csv_output:
                 print(f"  🛒 Linked products ({len(products)})")
             for product in products:
@@ -72,8 +113,10 @@ def groups(args: Namespace = None) -> int:
                     print(f"{group.id},{product.id},{group.participant_id}")
                 else:
                     print(" ", product)
+        elif sync:
+            return_code += sync_funding_sources(client, snapshot, group.id, csv_output)
         elif command == "funding_sources":
-            return_code += funding_sources(client, group.id)
+            return_code += funding_sources(client, group.id, refresh, resume)
         elif csv_output:
             print(group.csv())
 
@@ -194,12 +237,22 @@ def migrate_group(client: Client, group_id: str, force: bool = False) -> int:
     return return_code
 
 
-def funding_sources(client: Client, group_id: str) -> int:
+def funding_sources(client: Client, group_id: str, refresh: bool = False, resume: bool = False) -> int:
+    config = Config()
     return_code = RESULT_SUCCESS
 
+    # save each page of a long listing, to resume it if interrupted
+    checkpoint = Checkpoint.from_active_config(config, f"groups funding_sources {group_id}")
+    if not resume:
+        checkpoint.clear()
+
     try:
-        funding_sources = client.get_concession_group_linked_funding_sources(group_id)
-        funding_sources = list(funding_sources)
+        funding_sources = Snapshot.from_active_config(config).load(
+            group_funding_sources_key(group_id),
+            GroupFundingSourceResponse,
+            lambda: client.get_concession_group_linked_funding_sources(group_id, checkpoint),
+            refresh,
+        )
         print(f"  💵 Linked funding sources ({len(funding_sources)})")
         for funding_source in funding_sources:
             print(" ", funding_source)
@@ -208,3 +261,156 @@ def funding_sources(client: Client, group_id: str) -> int:
         return_code = RESULT_FAILURE
 
     return return_code
+
+
+def sync_funding_sources(client: Client, snapshot: Snapshot, group_id: str, csv_output: bool = False) -> int:
+    return_code = RESULT_SUCCESS
+
+    try:
+        events = list(sync_group_funding_sources(client, snapshot, group_id))
+        if not csv_output:
+            print(f"  🔄 Changed funding sources ({len(events)})")
+        for event in events:
+            if csv_output:
+                print(event.csv())
+            else:
+                print(" ", event)
+    except HTTPError as err:
+        print(f"❌ Error: {err}")
+        return_code = RESULT_FAILURE
+
+    return return_code
+
+
+def update_expiry(client: Client, group_ids: Iterable[str], rows: list[list[str]], max_workers: int = MAX_WORKERS) -> int:
+    config = Config()
+    return_code = RESULT_SUCCESS
+    group_ids = set(group_ids)
+
+    # (group_id, funding_source_id) -> expiry, the last row for a link wins
+    expiries = {}
+    not_matched = 0
+    for number, row in enumerate(rows, start=1):
+        if number == 1 and row[:1] == ["group_id"]:
+            # skip the header
+            continue
+        try:
+            group_id, funding_source_id, expiry = (value.strip() for value in row)
+            expiry = parse_datetime(expiry)
+            if expiry is None:
+                raise ValueError("missing expiry")
+        except ValueError as err:
+            print(f"❌ Error: row {number}: {err}")
+            return_code = RESULT_FAILURE
+            continue
+        if group_id in group_ids:
+            expiries[(group_id, funding_source_id)] = expiry
+        else:
+            not_matched += 1
+
+    print_active_message(config, f"📅 Updating funding source expiry ({len(expiries)})")
+
+    linked = client.get_concession_groups_linked_funding_sources([group_id for group_id, _ in expiries], max_workers)
+    linked = {
+        group_id: funding_sources if isinstance(funding_sources, Exception) else {fs.id: fs for fs in funding_sources}
+        for group_id, funding_sources in linked.items()
+    }
+
+    updates = []
+    unchanged, failed = 0, 0
+    for (group_id, funding_source_id), expiry in expiries.items():
+        funding_sources = linked[group_id]
+        if isinstance(funding_sources, Exception):
+            print(f"❌ Error: {group_id}: {funding_sources}")
+            failed += 1
+        elif funding_source_id not in funding_sources:
+            print(f"❌ Error: {group_id}: funding source {funding_source_id} is not linked")
+            failed += 1
+        elif (current := funding_sources[funding_source_id].expiry_date) and normalize_expiry(current) == normalize_expiry(
+            expiry
+        ):
+            unchanged += 1
+        else:
+            updates.append((group_id, funding_source_id, expiry))
+
+    updated = 0
+    results = client.update_concession_group_funding_sources_expiry(updates, max_workers)
+    for (group_id, funding_source_id, _), result in results.items():
+        if isinstance(result, Exception):
+            print(f"❌ Error: {group_id}: {funding_source_id}: {result}")
+            failed += 1
+        else:
+            updated += 1
+
+    print(f"✅ Updated: {updated}, unchanged: {unchanged}, not matched: {not_matched}, failed: {failed}")
+    if failed:
+        return_code = RESULT_FAILURE
+
+    return return_code
+
+
+def sweep(
+    client: Client,
+    group_ids: list[str],
+    grace: int = 0,
+    dry_run: bool = False,
+    resume: bool = False,
+    max_workers: int = MAX_WORKERS,
+) -> int:
+    config = Config()
+    return_code = RESULT_SUCCESS
+    cutoff = datetime.now(timezone.utc) - timedelta(days=grace)
+    checkpoint = Checkpoint.from_active_config(config, "groups sweep")
+
+    # groups swept completely by an earlier, interrupted run are skipped when resuming
+    state = checkpoint.load() if resume else {}
+    swept = set(state.get("groups", []))
+    unlinked, expired_count, failed = state.get("unlinked", 0), 0, 0
+    pending = [group_id for group_id in group_ids if group_id not in swept]
+
+    print_active_message(
+        config,
+        f"🧹 {'Dry run: sweeping' if dry_run else 'Sweeping'} links expired before {cutoff.isoformat(timespec='seconds')}",
+        f"({len(pending)} groups{', resuming' if swept else ''})",
+    )
+
+    def _expired(group_id):
+        funding_sources = client.get_concession_group_linked_funding_sources(group_id)
+        return [fs for fs in funding_sources if fs.expiry_date and normalize_expiry(fs.expiry_date) < cutoff]
+
+    for group_id, expired in map_concurrent(_expired, pending, max_workers):
+        if isinstance(expired, Exception):
+            print(f"❌ Error: {group_id}: {expired}")
+            failed += 1
+            continue
+
+        expired_count += len(expired)
+        for funding_source in expired:
+            print(f"  {group_id}: {funding_source.id} expired {funding_source.expiry_date.isoformat()}")
+        if dry_run:
+            continue
+
+        results = client.unlink_concession_group_funding_sources(group_id, [fs.id for fs in expired], max_workers)
+        errors = {funding_source_id: r for funding_source_id, r in results.items() if isinstance(r, Exception)}
+        for funding_source_id, err in errors.items():
+            print(f"❌ Error: {group_id}: {funding_source_id}: {err}")
+        failed += len(errors)
+        unlinked += len(results) - len(errors)
+
+        if not errors:
+            swept.add(group_id)
+            checkpoint.save(groups=sorted(swept), unlinked=unlinked)
+
+    if dry_run:
+        print(f"✅ Expired: {expired_count}, failed: {failed}")
+    else:
+        print(f"✅ Unlinked: {unlinked}, failed: {failed}")
+
+    if failed:
+        if not dry_run:
+            print("Run again with --resume to retry the failed groups")
+        return_code = RESULT_FAILURE
+    elif not dry_run:
+        checkpoint.clear()
+
+    return return_code
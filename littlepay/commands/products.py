@@ -2,9 +2,15 @@ from argparse import Namespace
 
 from littlepay.api.client import Client
 from littlepay.api.products import ProductResponse
-from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, print_active_message
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, acquire_token, print_active_message, resumable
 from littlepay.commands.groups import link_product, unlink_product
 from littlepay.config import Config
+from littlepay.search import MATCH_SUBSTRING
+from littlepay.snapshot import Snapshot, products_key
+
+
+# subcommands that change links, choosing the products to link or unlink from a live listing rather than the snapshot
+MUTATING_COMMANDS = ["link", "unlink"]
 
 
 def products(args: Namespace = None) -> int:
@@ -12,8 +18,7 @@ def products(args: Namespace = None) -> int:
     config = Config()
     client = Client.from_active_config(config)
 
-    client.oauth.ensure_active_token(client.token)
-    config.active_token = client.token
+    acquire_token(config, client)
 
     csv_output = hasattr(args, "csv") and args.csv
 
@@ -27,18 +32,14 @@ def products(args: Namespace = None) -> int:
     else:
         status = None
 
-    products = client.get_products(status=status)
+    snapshot = Snapshot.from_active_config(config)
+    refresh = getattr(args, "refresh", False) or command in MUTATING_COMMANDS
+    key = products_key(status)
+    products = snapshot.load(key, ProductResponse, lambda: client.get_products(status=status), refresh)
 
     if hasattr(args, "product_terms") and args.product_terms is not None:
-        terms = [t.lower() for t in args.product_terms if t]
-        products = filter(
-            lambda p: any(
-                [any((term in p.id.lower(), term in p.code.lower(), term in p.description.lower())) for term in terms]
-            ),
-            products,
-        )
-
-    products = list(products)
+        match = getattr(args, "match", MATCH_SUBSTRING)
+        products = snapshot.search(key, products, args.product_terms, match)
     if csv_output:
         print(ProductResponse.csv_header())
     else:
@@ -50,11 +51,15 @@ def products(args: Namespace = None) -> int:
         else:
             print(product)
 
+    resume = getattr(args, "resume", False)
+
     if command == "link":
-        for product in products:
-            return_code += link_product(client, args.group_id, product.id)
+        return_code += resumable(
+            config, f"products link {args.group_id}", products, lambda p: link_product(client, args.group_id, p.id), resume
+        )
     elif command == "unlink":
-        for product in products:
-            return_code += unlink_product(client, args.group_id, product.id)
+        return_code += resumable(
+            config, f"products unlink {args.group_id}", products, lambda p: unlink_product(client, args.group_id, p.id), resume
+        )
 
     return RESULT_SUCCESS if return_code == RESULT_SUCCESS else RESULT_FAILURE
@@ -0,0 +1,67 @@
+from argparse import Namespace
+import json
+
+from littlepay.api import MAX_WORKERS
+from littlepay.api.client import Client
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, acquire_token, print_active_message
+from littlepay.commands.batch import apply_operations
+from littlepay.config import Config
+from littlepay.reconcile import load_desired_state, plan_funding_sources, plan_products
+
+
+def reconcile(args: Namespace = None) -> int:
+    return_code = RESULT_SUCCESS
+    config = Config()
+    client = Client.from_active_config(config)
+
+    acquire_token(config, client)
+
+    max_workers = getattr(args, "workers", MAX_WORKERS)
+    apply = getattr(args, "apply", False)
+
+    try:
+        desired = load_desired_state(args.file)
+    except (OSError, ValueError) as err:
+        print(f"❌ Error: {err}")
+        return RESULT_FAILURE
+
+    print_active_message(config, f"🔍 Comparing desired and live state for groups ({len(desired)})")
+
+    # fetch the live state of the groups and kinds of links being managed, with concurrent listings
+    live_products = client.get_concession_groups_product_ids(
+        [group.group_id for group in desired if group.products is not None], max_workers
+    )
+    live_funding_sources = client.get_concession_groups_linked_funding_sources(
+        [group.group_id for group in desired if group.funding_sources is not None], max_workers
+    )
+
+    ops = []
+    for group in desired:
+        for live, desired_links, plan in (
+            (live_products, group.products, plan_products),
+            (live_funding_sources, group.funding_sources, plan_funding_sources),
+        ):
+            if desired_links is None:
+                continue
+            if isinstance(live[group.group_id], Exception):
+                print(f"❌ Error: {group.group_id}: {live[group.group_id]}")
+                return_code = RESULT_FAILURE
+                continue
+            ops.extend(plan(group.group_id, desired_links, live[group.group_id]))
+
+    print_active_message(config, f"📋 Planned operations ({len(ops)})")
+    for op in ops:
+        print(json.dumps(op))
+
+    if not apply:
+        if ops:
+            print("Run again with --apply to make these changes")
+        return return_code
+
+    results = apply_operations(client, [(op["group_id"], op) for op in ops], max_workers)
+    print(f"✅ Applied: {results.count(RESULT_SUCCESS)}, failed: {results.count(RESULT_FAILURE)}")
+
+    if RESULT_FAILURE in results:
+        return_code = RESULT_FAILURE
+
+    return return_code
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from littlepay.api.client import reuse_clients
+from littlepay.commands import RESULT_SUCCESS
+from littlepay.config import CONFIG_DIR
+from littlepay.daemon import SOCKET_ENV, DaemonServer
+
+
+DEFAULT_SOCKET = CONFIG_DIR / "littlepay.sock"
+
+
+def serve(socket_path: str | Path = None) -> int:
+    """Run a daemon that keeps API clients warm, running commands sent over a Unix domain socket.
+
+    Returns:
+        A value indicating the daemon shut down cleanly.
+    """
+    if socket_path is None:
+        socket_path = DEFAULT_SOCKET
+
+    reuse_clients()
+
+    with DaemonServer(socket_path) as server:
+        print(f"Serving on: {server.socket_path}")
+        print(f"Forward commands with: export {SOCKET_ENV}={server.socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopping...")
+        finally:
+            reuse_clients(False)
+
+    return RESULT_SUCCESS
@@ -1,7 +1,25 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 import os
 from pathlib import Path
+from threading import RLock
+from types import MappingProxyType
+from typing import Any, Callable, Generator, Mapping
 import yaml
 
+try:
+    # locks the config file for other processes, e.g. commands running in parallel shells
+    import fcntl
+except ImportError:  # pragma: no cover, Windows
+    fcntl = None
+
+try:
+    # the libyaml C loader and dumper, much faster than pure Python
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover, PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader
+
 
 CONFIG_DIR = Path(os.environ.get("LP_CONFIG_DIR", "~/.littlepay")).expanduser()
 CONFIG_FILE_CURRENT = CONFIG_DIR / ".current"
@@ -19,6 +37,22 @@ DEFAULT_CONFIG = {
     "participants": {"cst": {ENV_QA: DEFAULT_CREDENTIALS, ENV_PROD: DEFAULT_CREDENTIALS}},
 }
 
+# guards reading and writing config files from threads in this process, e.g. commands running for many participants
+_lock = RLock()
+
+# participant_id used instead of the active participant in the current context (e.g. a thread), without saving it
+_participant_override: ContextVar[str | None] = ContextVar("participant_override", default=None)
+
+
+@contextmanager
+def override_participant(participant_id: str) -> Generator[None, None, None]:
+    """Use participant_id as the active participant in the current context, without changing the saved active selection."""
+    token = _participant_override.set(participant_id)
+    try:
+        yield
+    finally:
+        _participant_override.reset(token)
+
 
 def _ensure_current_exists() -> bool:
     """
@@ -53,24 +87,193 @@ def _update_current_path(new_path: str | Path):
     CONFIG_FILE_CURRENT.write_text(new_path)
 
 
+class NoAliasDumper(SafeDumper):
+    """Forces pyyaml to write without aliases.
+
+    See https://github.com/yaml/pyyaml/issues/103.
+    """
+
+    def ignore_aliases(self, _):
+        return True
+
+
 def _read_config(config_file: Path) -> dict:
     """Reads configuration data from config_file."""
-    return yaml.safe_load(config_file.read_text())
+    with _lock:
+        return yaml.load(config_file.read_text(), Loader=SafeLoader)
 
 
 def _write_config(config: dict, config_file: Path) -> None:
     """Writes configuration data to config_file."""
+    data = yaml.dump(config, Dumper=NoAliasDumper)
+    with _lock:
+        # write to a temporary file and swap it in, so the config is never read partially written
+        temp = config_file.with_name(f"{config_file.name}.tmp")
+        temp.write_text(data)
+        os.replace(temp, config_file)
+
+
+def _freeze(value: Any) -> Any:
+    """A read-only copy of value, with nested dicts as read-only mappings and lists as tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """A mutable copy of a value made read-only by _freeze, e.g. to write it back to a config file."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _mapping(value: Any, name: str) -> Mapping:
+    """value as a mapping, with None (e.g. an empty YAML key) as an empty mapping.
+
+    Raises:
+        ValueError: If value is not a mapping.
+    """
+    if value is None:
+        return MappingProxyType({})
+    if not isinstance(value, Mapping):
+        raise ValueError(f"Invalid config: {name} must be a mapping")
+    return value
+
+
+@dataclass(frozen=True)
+class Target:
+    """The precomputed configuration of a participant in an environment."""
+
+    env_name: str
+    participant_id: str
+    # the environment's config, or None if the environment is not configured
+    env: Mapping | None
+    participant: Mapping
+    # None if any of the credentials are missing
+    credentials: Mapping | None
+    token: Mapping | None
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """A parsed, validated and read-only view of configuration data."""
+
+    data: Mapping[str, Any]
+    active: Mapping
+    envs: Mapping
+    participants: Mapping
+    # (env_name, participant_id) -> Target
+    targets: Mapping[tuple[str, str], Target]
+
+    @staticmethod
+    def parse(data: Mapping | None) -> "ConfigSnapshot":
+        """Parse and validate configuration data, precomputing a Target for each participant's environments.
+
+        Args:
+            data (Mapping): The configuration data, e.g. as read from a config file.
 
-    class NoAliasDumper(yaml.SafeDumper):
-        """Forces pyyaml to write without aliases.
+        Returns (ConfigSnapshot):
+            The read-only snapshot of data.
 
-        See https://github.com/yaml/pyyaml/issues/103.
+        Raises:
+            ValueError: If data is not valid configuration data.
         """
+        data = _freeze(_mapping(data, "the config"))
+        active = _mapping(data.get("active"), "active")
+        envs = {name: _mapping(env, f"envs.{name}") for name, env in _mapping(data.get("envs"), "envs").items()}
+
+        participants, targets = {}, {}
+        for participant_id, participant in _mapping(data.get("participants"), "participants").items():
+            participant_envs = participants[participant_id] = {}
+            for env_name, config in _mapping(participant, f"participants.{participant_id}").items():
+                config = participant_envs[env_name] = _mapping(config, f"participants.{participant_id}.{env_name}")
+                credentials = {key: config[key] for key in DEFAULT_CREDENTIALS.keys() if key in config}
+                targets[(env_name, participant_id)] = Target(
+                    env_name=env_name,
+                    participant_id=participant_id,
+                    env=envs.get(env_name),
+                    participant=config,
+                    credentials=MappingProxyType(credentials) if credentials.keys() == DEFAULT_CREDENTIALS.keys() else None,
+                    token=config.get("token"),
+                )
+
+        participants = {participant_id: MappingProxyType(envs) for participant_id, envs in participants.items()}
+        return ConfigSnapshot(
+            data=data,
+            active=active,
+            envs=MappingProxyType(envs),
+            participants=MappingProxyType(participants),
+            targets=MappingProxyType(targets),
+        )
+
+    def replace(self, **changes) -> "ConfigSnapshot":
+        """A new snapshot of this snapshot's data, with the given top-level keys replaced."""
+        return ConfigSnapshot.parse({**self.data, **changes})
+
+    def to_dict(self) -> dict:
+        """A mutable copy of this snapshot's data."""
+        return _thaw(self.data)
+
+
+# parsed config files, by resolved path, with the (mtime, size, inode) of the file when it was parsed
+_snapshots: dict[Path, tuple[tuple[int, int, int], ConfigSnapshot]] = {}
+
+
+def _file_key(config_file: Path) -> tuple[int, int, int]:
+    stat = config_file.stat()
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _load_snapshot(config_file: Path) -> ConfigSnapshot:
+    """Parse config_file, or reuse the snapshot parsed from it before if the file is unchanged."""
+    path = config_file.resolve()
+    with _lock:
+        key = _file_key(path)
+        cached = _snapshots.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        snapshot = ConfigSnapshot.parse(Config.read(path))
+        _snapshots[path] = (key, snapshot)
+        return snapshot
+
+
+@contextmanager
+def _locked(config_file: Path) -> Generator[None, None, None]:
+    """Hold the lock on config_file for threads in this process and, where supported, for other processes."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(config_file.with_name(f"{config_file.name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _update_snapshot(config_file: Path, update: Callable[[ConfigSnapshot], ConfigSnapshot]) -> ConfigSnapshot:
+    """Apply update to the latest contents of config_file and write the result, holding the lock on the file throughout.
+
+    Changes written by other threads or processes since this one read the file are kept, unless update replaces them.
+    """
+    path = config_file.resolve()
+    with _locked(path):
+        snapshot = update(_load_snapshot(path))
+        _save_snapshot(snapshot, path)
+        return snapshot
 
-        def ignore_aliases(self, _):
-            return True
 
-    config_file.write_text(yaml.dump(config, Dumper=NoAliasDumper))
+def _save_snapshot(snapshot: ConfigSnapshot, config_file: Path) -> None:
+    """Write snapshot to config_file, caching it as the parsed contents of the file."""
+    path = config_file.resolve()
+    with _lock:
+        Config.write(snapshot.to_dict(), path)
+        _snapshots[path] = (_file_key(path), snapshot)
 
 
 class Config:
@@ -98,14 +301,67 @@ class Config:
 
         Config.update_path(config_file_path)
 
-        data = Config.read(config_file_path)
-        for key, value in data.items():
-            setattr(self, key, value)
+        # parse and validate once, so a malformed config fails here rather than when it's used
+        self.snapshot = _load_snapshot(config_file_path)
+
+    def __getattr__(self, name: str) -> Any:
+        # other top-level config keys are readable as attributes
+        snapshot = self.__dict__.get("snapshot")
+        if snapshot is None or name not in snapshot.data:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return snapshot.data[name]
+
+    def _save(self, **changes) -> None:
+        """Replace the given top-level keys in the current config file, keeping the rest of the file as saved."""
+        self._merge(lambda latest: latest.replace(**changes))
+
+    def _merge(self, update: Callable[[ConfigSnapshot], ConfigSnapshot]) -> None:
+        """Write the config returned by update, given the latest contents of the current config file, holding the lock on
+        the file throughout so changes written concurrently can be merged rather than lost."""
+        self.snapshot = _update_snapshot(Config.current_path(), update)
 
     @property
-    def active_env(self) -> dict:
+    def active(self) -> Mapping:
+        """The active selection of env and participant."""
+        return self.snapshot.active
+
+    @active.setter
+    def active(self, value: Mapping):
+        self.snapshot = self.snapshot.replace(active=value)
+
+    @property
+    def envs(self) -> Mapping:
+        """Configuration data for each environment, by name."""
+        return self.snapshot.envs
+
+    @envs.setter
+    def envs(self, value: Mapping):
+        self.snapshot = self.snapshot.replace(envs=value)
+
+    @property
+    def participants(self) -> Mapping:
+        """Configuration data for each participant's environments, by participant_id."""
+        return self.snapshot.participants
+
+    @participants.setter
+    def participants(self, value: Mapping):
+        self.snapshot = self.snapshot.replace(participants=value)
+
+    @property
+    def active_target(self) -> Target:
+        """
+        Returns (Target):
+            The precomputed configuration of the active participant in the active environment.
+        """
+        target = self.snapshot.targets.get((self.active_env_name, self.active_participant_id))
+        if target is None:
+            raise ValueError("Missing an active participant")
+        return target
+
+    @property
+    def active_env(self) -> Mapping:
         """
-        Returns (dict):
+        Returns (Mapping):
             Configuration data for the active environment.
         """
         active_env_name = self.active_env_name
@@ -114,21 +370,18 @@ class Config:
         return self.envs[active_env_name]
 
     @property
-    def active_participant(self) -> dict:
+    def active_participant(self) -> Mapping:
         """
-        Returns (dict):
+        Returns (Mapping):
             Configuration data for the active participant.
         """
-        active_participant = self.participants.get(self.active_participant_id)
-        if active_participant is None:
-            raise ValueError("Missing an active participant")
-        return active_participant[self.active_env_name]
+        return self.active_target.participant
 
     @property
-    def active_credentials(self) -> dict:
+    def active_credentials(self) -> Mapping:
         """Get credentials from the active participant's environment config."""
-        credentials = {key: value for key, value in self.active_participant.items() if key in DEFAULT_CREDENTIALS.keys()}
-        if credentials.keys() != DEFAULT_CREDENTIALS.keys():
+        credentials = self.active_target.credentials
+        if credentials is None:
             raise ValueError("Missing credentials")
         return credentials
 
@@ -142,12 +395,14 @@ class Config:
         if value not in self.envs:
             raise ValueError(f"Unsupported env: {value}, must be one of: {', '.join(self.envs.keys())}")
 
-        self.active["env"] = value
-        Config.write(self.__dict__, Config.current_path())
+        self._save(active={**self.active, "env": value})
 
     @property
     def active_participant_id(self) -> str:
-        """The active participant's participant_id."""
+        """The active participant's participant_id, or the participant overridden for the current context."""
+        override = _participant_override.get()
+        if override is not None:
+            return override
         # ensure active is always a str, even if missing (e.g. None)
         return self.active.get("participant", "") or ""
 
@@ -156,15 +411,23 @@ class Config:
         if value not in self.participants:
             raise ValueError(f"Unsupported participant: {value}, must be one of: {', '.join(self.participants.keys())}")
 
-        self.active["participant"] = value
-        Config.write(self.__dict__, Config.current_path())
+        self._save(active={**self.active, "participant": value})
 
     @property
     def active_token(self) -> dict:
         """The active participant's API access token."""
-        return self.active_participant.get("token", None)
+        token = self.active_target.token
+        return dict(token) if token is not None else None
 
     @active_token.setter
     def active_token(self, value: dict):
-        self.active_participant["token"] = dict(value)
-        Config.write(self.__dict__, Config.current_path())
+        target = self.active_target
+
+        def update(latest: ConfigSnapshot) -> ConfigSnapshot:
+            # only the token changes, everything else saved by other threads or processes since this config was read is kept
+            participants = _thaw(latest.participants)
+            envs = participants.setdefault(target.participant_id, {})
+            envs[target.env_name] = {**envs.get(target.env_name, target.participant), "token": dict(value)}
+            return latest.replace(participants=participants)
+
+        self._merge(update)
@@ -0,0 +1,112 @@
+from contextlib import redirect_stderr, redirect_stdout
+import io
+import json
+import os
+from pathlib import Path
+import socket
+import socketserver
+import sys
+import traceback
+
+
+# Environment variable naming the socket of a running `littlepay serve` daemon to forward commands to.
+SOCKET_ENV = "LP_SOCKET"
+
+
+def _send(socket_path: str | Path, request: dict) -> dict:
+    """Send a request to the daemon listening on socket_path, returning its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        if "-" in request["argv"]:
+            # the command reads from stdin, send it along
+            request["stdin"] = sys.stdin.read()
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as response:
+            return json.loads(response.readline())
+
+
+def forward(argv: list[str]) -> int | None:
+    """Forward a command to the daemon named by the LP_SOCKET environment variable, printing its output.
+
+    Returns (int|None):
+        The command's result, or None if no daemon is configured or listening, and the command should run locally.
+    """
+    socket_path = os.environ.get(SOCKET_ENV)
+    if not socket_path or argv[:1] == ["serve"]:
+        return None
+
+    try:
+        response = _send(socket_path, {"argv": argv, "cwd": os.getcwd()})
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["code"]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single JSON request to run a command."""
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        response = self.server.run(request)
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Runs commands sent over a Unix domain socket in this (long-running) process, one at a time.
+
+    Each request is a line of JSON like {"argv": [...], "cwd": "...", "stdin": "..."}, and each response a line of JSON
+    like {"code": 0, "stdout": "...", "stderr": "..."}.
+    """
+
+    def __init__(self, socket_path: str | Path):
+        self.socket_path = Path(socket_path)
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        # remove a socket left behind by a daemon that didn't shut down cleanly
+        self.socket_path.unlink(missing_ok=True)
+        super().__init__(str(self.socket_path), _RequestHandler)
+
+    def server_bind(self):
+        # only the daemon's owner may connect, since commands run with the owner's config and credentials
+        umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def run(self, request: dict) -> dict:
+        """Run the command in request, capturing its result and output."""
+        # imported here to keep forwarding lightweight, and since littlepay.main forwards commands using this module
+        from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+        from littlepay.main import run
+
+        if request["argv"][:1] == ["serve"]:
+            return {"code": RESULT_FAILURE, "stdout": "", "stderr": "❌ Error: already serving\n"}
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        cwd, stdin = os.getcwd(), sys.stdin
+        try:
+            os.chdir(request.get("cwd", cwd))
+            # commands asking for confirmation read EOF and cancel
+            sys.stdin = io.StringIO(request.get("stdin", ""))
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    code = run(request["argv"])
+                except SystemExit as ex:
+                    # e.g. from argparse, for --help or invalid arguments
+                    code = ex.code if isinstance(ex.code, int) else (RESULT_FAILURE if ex.code else RESULT_SUCCESS)
+                except Exception:
+                    traceback.print_exc()
+                    code = RESULT_FAILURE
+        finally:
+            sys.stdin = stdin
+            os.chdir(cwd)
+
+        return {"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
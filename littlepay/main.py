@@ -1,13 +1,44 @@
 import sys
-from argparse import ArgumentParser, _SubParsersAction
+from argparse import ArgumentParser, Namespace, _SubParsersAction
+from importlib import import_module
+from typing import Callable
 
 from littlepay import __version__ as version
-from littlepay.commands import RESULT_FAILURE
-from littlepay.commands.configure import configure
-from littlepay.commands.groups import groups
-from littlepay.commands.products import products
-from littlepay.commands.switch import switch
-from littlepay.config import Config
+from littlepay.api import MAX_WORKERS
+from littlepay.daemon import forward
+from littlepay.search import MATCH_MODES, MATCH_SUBSTRING
+
+
+def _command(name: str) -> Callable[..., int]:
+    """Helper imports the function implementing a command, e.g. littlepay.commands.groups.groups for "groups".
+
+    Commands are imported only when they run, so that e.g. `littlepay --version` doesn't pay to import the API client
+    and its dependencies.
+    """
+    module = import_module(f"littlepay.commands.{name}")
+    return getattr(module, name)
+
+
+def _participant_ids(value: str) -> list[str]:
+    """Helper parses a comma-separated list of participant_ids."""
+    return [participant_id.strip() for participant_id in value.split(",") if participant_id.strip()]
+
+
+def _run_for_participants(args: Namespace) -> int:
+    """Helper runs a command for many participants concurrently, without changing the active participant."""
+    from littlepay.commands import RESULT_FAILURE
+    from littlepay.config import Config
+    from littlepay.participants import run_for_participants
+
+    configured = Config().participants
+    participant_ids = list(configured) if args.all_participants else args.participants
+    unsupported = [participant_id for participant_id in participant_ids if participant_id not in configured]
+    if unsupported:
+        print(f"❌ Error: Unsupported participant: {', '.join(unsupported)}, must be one of: {', '.join(configured)}")
+        return RESULT_FAILURE
+
+    command = _command(args.command)
+    return run_for_participants(lambda: command(args), participant_ids, getattr(args, "csv", False))
 
 
 def _subcmd(subparsers: _SubParsersAction, name: str, help: str) -> ArgumentParser:
@@ -18,6 +49,14 @@ def _subcmd(subparsers: _SubParsersAction, name: str, help: str) -> ArgumentPars
 
 def main(argv=None):
     argv = argv if argv is not None else sys.argv[1:]
+
+    # forward to a running `littlepay serve` daemon if there is one, otherwise run here
+    result = forward(argv)
+    return result if result is not None else run(argv)
+
+
+def run(argv: list[str]) -> int:
+    """Parse and run a command in this process."""
     main_parser = ArgumentParser(prog="littlepay")
 
     # https://stackoverflow.com/a/8521644/812183
@@ -38,33 +77,112 @@ def main(argv=None):
         help="Path to a readable and writeable config file to use. File will be created if it does not exist.",
     )
 
+    # littlepay --participants a,b,c COMMAND
+    # littlepay --all-participants COMMAND
+    participants_group = main_parser.add_mutually_exclusive_group()
+    participants_group.add_argument(
+        "--participants",
+        type=_participant_ids,
+        help="Comma-separated participants to run the command for, concurrently, without switching the active participant",
+    )
+    participants_group.add_argument(
+        "--all-participants",
+        action="store_true",
+        default=False,
+        help="Run the command for every configured participant, concurrently, without switching the active participant",
+    )
+
     main_commands = main_parser.add_subparsers(dest="command")
 
     def _maincmd(name, help):
         return _subcmd(main_commands, name, help)
 
+    # littlepay batch FILE [--workers N]
+    batch_parser = _maincmd("batch", help="Run many commands or operations from a file, in one process")
+    batch_parser.add_argument(
+        "file", help="A file with one command or JSON operation per line, or - to read from stdin", metavar="FILE"
+    )
+    batch_parser.add_argument(
+        "-w", "--workers", type=int, default=MAX_WORKERS, help="The number of JSON operations to run concurrently"
+    )
+
     # littlepay config [CONFIG_PATH]
     config_parser = _maincmd("config", help="Get or set configuration")
     config_parser.add_argument("config_path", nargs="?")
 
-    # littlepay groups [-f GROUP] [{create,link,products,remove,unlink}] [...]
+    # littlepay funding_sources [--csv] [{groups}] [...]
+    funding_sources_parser = _maincmd("funding_sources", help="Interact with funding sources in the active environment")
+    funding_sources_parser.add_argument(
+        "--csv", action="store_true", default=False, help="Output results in simple CSV format", dest="csv"
+    )
+
+    funding_sources_commands = funding_sources_parser.add_subparsers(dest="funding_source_command", required=False)
+
+    funding_sources_groups = _subcmd(
+        funding_sources_commands, "groups", help="List concession groups for many funding sources"
+    )
+    funding_sources_groups.add_argument(
+        "file", help="A file with one funding source ID (or card token) per line, or - to read from stdin", metavar="FILE"
+    )
+    funding_sources_groups.add_argument(
+        "-t", "--tokens", action="store_true", default=False, help="The file contains card tokens instead of IDs"
+    )
+    funding_sources_groups.add_argument(
+        "-w", "--workers", type=int, default=MAX_WORKERS, help="The number of concurrent API requests to make"
+    )
+
+    # littlepay groups [-f GROUP] [-m MATCH] [--refresh] [{create,expiry,funding_sources,link,...,sweep,unlink}] [...]
     groups_parser = _maincmd("groups", help="Interact with groups in the active environment")
     groups_parser.add_argument(
         "-f", "--filter", help="Filter for groups with matching group ID or label", dest="group_terms", action="append"
     )
+    groups_parser.add_argument(
+        "-m",
+        "--match",
+        choices=MATCH_MODES,
+        default=MATCH_SUBSTRING,
+        help="How filters are matched: exact group ID, or a prefix or substring of the group ID or label",
+    )
     groups_parser.add_argument(
         "--csv", action="store_true", default=False, help="Output results in simple CSV format", dest="csv"
     )
+    groups_parser.add_argument(
+        "--refresh", action="store_true", default=False, help="Refresh the local snapshot from the API", dest="refresh"
+    )
 
     groups_commands = groups_parser.add_subparsers(dest="group_command", required=False)
 
     groups_create = _subcmd(groups_commands, "create", help="Create a new concession group")
     groups_create.add_argument("group_label", help="A unique label associated with the concession group", metavar="LABEL")
 
-    _subcmd(groups_commands, "funding_sources", help="List funding sources for one or more concession groups")
+    groups_expiry = _subcmd(groups_commands, "expiry", help="Update the expiry of many linked funding sources from a CSV file")
+    groups_expiry.add_argument(
+        "file",
+        help="A CSV file with group_id,funding_source_id,expiry rows, or - to read from stdin",
+        metavar="FILE",
+    )
+    groups_expiry.add_argument(
+        "-w", "--workers", type=int, default=MAX_WORKERS, help="The number of concurrent API requests to make"
+    )
+
+    groups_funding_sources = _subcmd(
+        groups_commands, "funding_sources", help="List funding sources for one or more concession groups"
+    )
+    groups_funding_sources.add_argument(
+        "--sync",
+        action="store_true",
+        default=False,
+        help="Only list funding sources added, removed or with a changed expiry since the last sync",
+    )
+    groups_funding_sources.add_argument(
+        "--resume", action="store_true", default=False, help="Resume an interrupted listing from its last page"
+    )
 
     groups_link = _subcmd(groups_commands, "link", help="Link one or more concession groups to a product")
     groups_link.add_argument("product_id", help="The ID of the product to link to")
+    groups_link.add_argument(
+        "--resume", action="store_true", default=False, help="Skip groups already processed by an interrupted run"
+    )
 
     groups_migrate = _subcmd(
         groups_commands, "migrate", help="Migrate a group from the old Customer Group format to the current format"
@@ -72,6 +190,9 @@ def main(argv=None):
     groups_migrate.add_argument(
         "--force", action="store_true", default=False, help="Don't ask for confirmation before migration"
     )
+    groups_migrate.add_argument(
+        "--resume", action="store_true", default=False, help="Skip groups already processed by an interrupted run"
+    )
 
     groups_products = _subcmd(groups_commands, "products", help="List products for one or more concession groups")
     groups_products.add_argument(
@@ -82,14 +203,31 @@ def main(argv=None):
     groups_remove.add_argument("--force", action="store_true", default=False, help="Don't ask for confirmation before removal")
     groups_remove.add_argument("group_id", help="The ID of the concession group to remove", metavar="ID")
 
+    groups_sweep = _subcmd(groups_commands, "sweep", help="Unlink expired funding sources from one or more concession groups")
+    groups_sweep.add_argument(
+        "--grace", type=int, default=0, help="Only unlink funding sources expired more than this many days ago"
+    )
+    groups_sweep.add_argument(
+        "--dry-run", action="store_true", default=False, help="List the expired funding sources without unlinking"
+    )
+    groups_sweep.add_argument(
+        "--resume", action="store_true", default=False, help="Skip groups already swept by an interrupted run"
+    )
+    groups_sweep.add_argument(
+        "-w", "--workers", type=int, default=MAX_WORKERS, help="The number of concurrent API requests to make"
+    )
+
     groups_unlink = _subcmd(
         groups_commands, "unlink", help="Unlink a product or funding source from one or more concession groups"
     )
     exclusive_groups_unlink = groups_unlink.add_mutually_exclusive_group(required=True)
     exclusive_groups_unlink.add_argument("-p", "--product", help="The ID of the product to unlink")
     exclusive_groups_unlink.add_argument("-s", "--source", help="The ID of the funding source to unlink")
+    groups_unlink.add_argument(
+        "--resume", action="store_true", default=False, help="Skip groups already processed by an interrupted run"
+    )
 
-    # littlepay products [-f PRODUCT] [-s STATUS] [{link,unlink}] [...]
+    # littlepay products [-f PRODUCT] [-m MATCH] [-s STATUS] [--refresh] [{link,unlink}] [...]
     products_parser = _maincmd("products", help="Interact with products in the active environment")
     products_parser.add_argument(
         "-f",
@@ -98,6 +236,13 @@ def main(argv=None):
         dest="product_terms",
         action="append",
     )
+    products_parser.add_argument(
+        "-m",
+        "--match",
+        choices=MATCH_MODES,
+        default=MATCH_SUBSTRING,
+        help="How filters are matched: exact product ID, or a prefix or substring of the product ID, code, or description",
+    )
     products_parser.add_argument(
         "-s",
         "--status",
@@ -108,14 +253,39 @@ def main(argv=None):
     products_parser.add_argument(
         "--csv", action="store_true", default=False, help="Output results in simple CSV format", dest="csv"
     )
+    products_parser.add_argument(
+        "--refresh", action="store_true", default=False, help="Refresh the local snapshot from the API", dest="refresh"
+    )
 
     products_commands = products_parser.add_subparsers(dest="product_command", required=False)
 
     products_link = _subcmd(products_commands, "link", help="Link one or more products to a concession group")
     products_link.add_argument("group_id", help="The ID of the concession group to link to")
+    products_link.add_argument(
+        "--resume", action="store_true", default=False, help="Skip products already processed by an interrupted run"
+    )
 
     products_unlink = _subcmd(products_commands, "unlink", help="Unlink a concession group from one or more products")
     products_unlink.add_argument("group_id", help="The ID of the concession group to unlink")
+    products_unlink.add_argument(
+        "--resume", action="store_true", default=False, help="Skip products already processed by an interrupted run"
+    )
+
+    # littlepay reconcile FILE [--apply] [--workers N]
+    reconcile_parser = _maincmd("reconcile", help="Make the links of concession groups match a desired state file")
+    reconcile_parser.add_argument(
+        "file", help="A YAML or JSON file with the desired products and funding sources of each group", metavar="FILE"
+    )
+    reconcile_parser.add_argument(
+        "--apply", action="store_true", default=False, help="Make the planned changes, instead of only printing them"
+    )
+    reconcile_parser.add_argument(
+        "-w", "--workers", type=int, default=MAX_WORKERS, help="The number of concurrent API requests to make"
+    )
+
+    # littlepay serve [--socket PATH]
+    serve_parser = _maincmd("serve", help="Run a daemon that commands can be forwarded to, keeping API clients warm")
+    serve_parser.add_argument("-s", "--socket", help="Path to the Unix domain socket to listen on", dest="socket_path")
 
     # littlepay switch [[--env VALUE], [--participant VALUE]]
     switch_parser = _maincmd("switch", help="Switch the active environment or participant")
@@ -125,14 +295,20 @@ def main(argv=None):
     args = main_parser.parse_args(argv)
 
     if args.command == "config" or args.config_path:
-        return configure(args.config_path or Config().current_path())
-    elif args.command == "groups":
-        return groups(args)
-    elif args.command == "products":
-        return products(args)
+        from littlepay.config import Config
+
+        return _command("configure")(args.config_path or Config().current_path())
+    elif args.command in ("batch", "funding_sources", "groups", "products", "reconcile"):
+        if args.participants or args.all_participants:
+            return _run_for_participants(args)
+        return _command(args.command)(args)
+    elif args.command == "serve":
+        return _command("serve")(args.socket_path)
     elif args.command == "switch":
-        return switch(args.env, args.participant)
+        return _command("switch")(args.env, args.participant)
     else:
+        from littlepay.commands import RESULT_FAILURE
+
         main_parser.print_help()
         return RESULT_FAILURE
 
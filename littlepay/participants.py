@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+import io
+import sys
+import threading
+import traceback
+from typing import Callable, Generator, Iterable
+
+from littlepay.api import MAX_WORKERS, map_concurrent
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+from littlepay.config import override_participant
+
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """Writes to a buffer set for the current thread, or to the original stdout for threads without one."""
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stdout).write(text)
+
+    def flush(self):
+        if getattr(self.local, "buffer", None) is None:
+            self.stdout.flush()
+
+
+@contextmanager
+def _thread_local_stdout() -> Generator[_ThreadLocalStdout, None, None]:
+    stdout = sys.stdout
+    sys.stdout = _ThreadLocalStdout(stdout)
+    try:
+        yield sys.stdout
+    finally:
+        sys.stdout = stdout
+
+
+def run_for_participants(
+    run: Callable[[], int], participant_ids: Iterable[str], csv_output: bool = False, max_workers: int = MAX_WORKERS
+) -> int:
+    """Call run for each participant concurrently, with the participant overriding the active participant.
+
+    The output of each run is captured and printed once it completes, in the order of participant_ids, with a participant
+    column: a "participant_id," prefix for CSV output (and a single "participant," header), or a "[participant_id]"
+    prefix otherwise.
+
+    Returns (int):
+        RESULT_SUCCESS if every run succeeded, otherwise RESULT_FAILURE.
+    """
+    participant_ids = list(dict.fromkeys(participant_ids))
+    return_code = RESULT_SUCCESS
+    header = None
+
+    with _thread_local_stdout() as stdout:
+
+        def _run(participant_id):
+            stdout.local.buffer = io.StringIO()
+            try:
+                with override_participant(participant_id):
+                    result = run()
+            except Exception:
+                traceback.print_exc(file=stdout.local.buffer)
+                result = RESULT_FAILURE
+            finally:
+                output, stdout.local.buffer = stdout.local.buffer.getvalue(), None
+            return result, output
+
+        for participant_id, (result, output) in map_concurrent(_run, participant_ids, max_workers):
+            if result != RESULT_SUCCESS:
+                return_code = RESULT_FAILURE
+
+            lines = output.splitlines()
+            if csv_output and lines:
+                if header is None:
+                    header = lines[0]
+                    print(f"participant,{header}")
+                lines = lines[1:]
+            for line in lines:
+                print(f"{participant_id},{line}" if csv_output else f"[{participant_id}] {line}")
+
+    return return_code
@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+import json
+from pathlib import Path
+
+import yaml
+
+from littlepay.api import parse_datetime
+from littlepay.api.groups import GroupFundingSourceResponse, normalize_expiry
+
+
+OP_LINK_PRODUCT = "link_product"
+OP_UNLINK_PRODUCT = "unlink_product"
+OP_LINK_FUNDING_SOURCE = "link_funding_source"
+OP_UNLINK_FUNDING_SOURCE = "unlink_funding_source"
+OP_UPDATE_EXPIRY = "update_expiry"
+
+
+@dataclass
+class DesiredGroup:
+    """The desired links for a concession group. None means the group's links of that kind are left as they are."""
+
+    group_id: str
+    products: set[str] | None = None
+    # funding source ID -> expiry, None for a funding source whose expiry is left as it is
+    funding_sources: dict[str, datetime | None] | None = None
+
+
+def _parse_expiry(value) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return parse_datetime(str(value))
+
+
+def load_desired_state(path: str | Path) -> list[DesiredGroup]:
+    """Load the desired state of concession groups from a YAML or JSON file like:
+
+        groups:
+          <group_id>:
+            products: [<product_id>, ...]
+            funding_sources:
+              <funding_source_id>: <expiry or null>
+
+    funding_sources may also be a list of IDs, leaving their expiry as it is.
+
+    Raises:
+        ValueError: If the file is not valid.
+    """
+    path = Path(path)
+    text = path.read_text()
+    try:
+        data = json.loads(text) if path.suffix == ".json" else yaml.safe_load(text)
+    except (json.JSONDecodeError, yaml.YAMLError) as err:
+        raise ValueError(f"Invalid desired state file: {err}") from err
+
+    if not isinstance(data, dict) or not isinstance(data.get("groups"), dict):
+        raise ValueError("Invalid desired state file: expected a mapping of groups")
+
+    desired = []
+    for group_id, links in data["groups"].items():
+        links = links or {}
+        if not isinstance(links, dict):
+            raise ValueError(f"Invalid desired state file: group {group_id} links must be a mapping")
+        group = DesiredGroup(group_id=str(group_id))
+        products = links.get("products")
+        if isinstance(products, list):
+            group.products = {str(product_id) for product_id in products}
+        elif products is not None:
+            raise ValueError(f"Invalid desired state file: group {group_id} products must be a list")
+        funding_sources = links.get("funding_sources")
+        if isinstance(funding_sources, dict):
+            try:
+                group.funding_sources = {str(fs): _parse_expiry(expiry) for fs, expiry in funding_sources.items()}
+            except ValueError as err:
+                raise ValueError(f"Invalid desired state file: group {group_id} {err}") from err
+        elif isinstance(funding_sources, list):
+            group.funding_sources = {str(fs): None for fs in funding_sources}
+        elif funding_sources is not None:
+            raise ValueError(f"Invalid desired state file: group {group_id} funding_sources must be a mapping or a list")
+        desired.append(group)
+
+    return desired
+
+
+def plan_products(group_id: str, desired: set[str], live: list[str]) -> list[dict]:
+    """Operations linking and unlinking products to make the group's live products match the desired products."""
+    live = set(live)
+    return [
+        *({"op": OP_LINK_PRODUCT, "group_id": group_id, "product_id": p} for p in sorted(desired - live)),
+        *({"op": OP_UNLINK_PRODUCT, "group_id": group_id, "product_id": p} for p in sorted(live - desired)),
+    ]
+
+
+def plan_funding_sources(
+    group_id: str, desired: dict[str, datetime | None], live: list[GroupFundingSourceResponse]
+) -> list[dict]:
+    """Operations linking, unlinking and updating the expiry of funding sources to make the group's live funding sources
+    match the desired funding sources."""
+    live = {funding_source.id: funding_source.expiry_date for funding_source in live}
+    ops = []
+
+    for funding_source_id in sorted(desired.keys() - live.keys()):
+        op = {"op": OP_LINK_FUNDING_SOURCE, "group_id": group_id, "funding_source_id": funding_source_id}
+        if desired[funding_source_id] is not None:
+            op["expiry"] = normalize_expiry(desired[funding_source_id]).isoformat()
+        ops.append(op)
+
+    for funding_source_id in sorted(live.keys() - desired.keys()):
+        ops.append({"op": OP_UNLINK_FUNDING_SOURCE, "group_id": group_id, "funding_source_id": funding_source_id})
+
+    for funding_source_id in sorted(desired.keys() & live.keys()):
+        expiry, current = desired[funding_source_id], live[funding_source_id]
+        if expiry is not None and (current is None or normalize_expiry(expiry) != normalize_expiry(current)):
+            ops.append(
+                {
+                    "op": OP_UPDATE_EXPIRY,
+                    "group_id": group_id,
+                    "funding_source_id": funding_source_id,
+                    "expiry": normalize_expiry(expiry).isoformat(),
+                }
+            )
+
+    return ops
@@ -0,0 +1,171 @@
+from contextlib import closing
+from dataclasses import dataclass, replace
+import json
+import os
+from pathlib import Path
+import sqlite3
+from threading import Lock
+import time
+from typing import Any
+
+from littlepay.config import CONFIG_DIR, Config
+
+
+RESPONSE_CACHE_FILE = CONFIG_DIR / "responses.db"
+RESPONSE_CACHE_TTL = int(os.environ.get("LP_RESPONSE_CACHE_TTL", 5 * 60))
+
+
+def _response_cache_from_active_config(config: Config):
+    """Create a ResponseCache for the active config targets.
+
+    This function should not be called directly, use the static method ResponseCache.from_active_config(Config) instead.
+
+    Args:
+        config (Config): The Config instance from which to read the active env and participant.
+    """
+    return ResponseCache(env=config.active_env_name, participant=config.active_participant_id)
+
+
+def _params_key(params: dict) -> str:
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """The decoded body of a GET response, with the validators the server sent for it."""
+
+    data: Any
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def conditional_headers(self) -> dict:
+        """Headers asking the server to respond 304 Not Modified if this response is still current."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Cache of GET responses for an env and participant, in memory and backed by an SQLite file.
+
+    Responses with an ETag or Last-Modified validator are revalidated with a conditional GET on each use. Responses without
+    a validator are used without a request until they are older than the TTL.
+    """
+
+    from_active_config = staticmethod(_response_cache_from_active_config)
+
+    def __init__(self, env: str, participant: str, path: str | Path = None, ttl: int = None):
+        """Initialize a new ResponseCache for the given env and participant.
+
+        Args:
+            env (str): The name of the environment the responses are from.
+
+            participant (str): The participant_id the responses are for.
+
+            path (str|Path): Path to the SQLite file. If None, the default is used.
+
+            ttl (int): Number of seconds a response without a validator remains fresh. If None, the default is used.
+        """
+        self.env = env
+        self.participant = participant
+        self.path = Path(path if path is not None else RESPONSE_CACHE_FILE)
+        self.ttl = ttl if ttl is not None else RESPONSE_CACHE_TTL
+        self._memory: dict[tuple[str, str], CachedResponse] = {}
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                env TEXT NOT NULL,
+                participant TEXT NOT NULL,
+                url TEXT NOT NULL,
+                params TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (env, participant, url, params)
+            )"""
+        )
+        return conn
+
+    def _save(self, url: str, params: str, response: CachedResponse) -> None:
+        with self._lock:
+            self._memory[(url, params)] = response
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.env,
+                        self.participant,
+                        url,
+                        params,
+                        response.fetched_at,
+                        response.etag,
+                        response.last_modified,
+                        json.dumps(response.data),
+                    ),
+                )
+
+    def fresh(self, response: CachedResponse) -> bool:
+        """True if response can be used without a request: it has no validator and is younger than the TTL."""
+        return not response.conditional_headers and time.time() - response.fetched_at <= self.ttl
+
+    def get(self, url: str, params: dict = None) -> CachedResponse | None:
+        """Get the response cached for a GET of url with params, or None if there is none."""
+        key = (url, _params_key(params))
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    """SELECT fetched_at, etag, last_modified, data FROM responses
+                    WHERE env = ? AND participant = ? AND url = ? AND params = ?""",
+                    (self.env, self.participant, *key),
+                ).fetchone()
+            if row is None:
+                return None
+            fetched_at, etag, last_modified, data = row
+            response = self._memory[key] = CachedResponse(json.loads(data), fetched_at, etag, last_modified)
+            return response
+
+    def set(self, url: str, params: dict, data: Any, etag: str = None, last_modified: str = None) -> CachedResponse:
+        """Cache the decoded body of a GET of url with params, along with the validators the server sent for it."""
+        response = CachedResponse(data=data, fetched_at=time.time(), etag=etag, last_modified=last_modified)
+        self._save(url, _params_key(params), response)
+        return response
+
+    def touch(self, url: str, params: dict, response: CachedResponse) -> CachedResponse:
+        """Mark a cached response as current, e.g. after the server responded 304 Not Modified."""
+        response = replace(response, fetched_at=time.time())
+        self._save(url, _params_key(params), response)
+        return response
+
+    def invalidate(self, *urls: str) -> None:
+        """Remove the responses cached for GETs of urls, with any params."""
+        urls = set(urls)
+        with self._lock:
+            for key in [key for key in self._memory if key[0] in urls]:
+                del self._memory[key]
+            if not self.path.exists():
+                # nothing stored, don't create the file
+                return
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "DELETE FROM responses WHERE env = ? AND participant = ? AND url = ?",
+                    [(self.env, self.participant, url) for url in urls],
+                )
+
+    def clear(self) -> None:
+        """Remove all the responses cached for this env and participant."""
+        with self._lock:
+            self._memory.clear()
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM responses WHERE env = ? AND participant = ?", (self.env, self.participant))
@@ -0,0 +1,109 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Generic, Iterable, TypeVar
+
+
+# Generic type parameter, used to represent the items in a SearchIndex.
+TItem = TypeVar("TItem")
+
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "prefix"
+MATCH_SUBSTRING = "substring"
+MATCH_MODES = [MATCH_EXACT, MATCH_PREFIX, MATCH_SUBSTRING]
+
+# length of the n-grams used to narrow down substring matches
+NGRAM = 3
+
+
+def _ngrams(value: str) -> set[str]:
+    return {value[start:end] for start, end in zip(range(len(value)), range(NGRAM, len(value) + 1))}
+
+
+class SearchIndex(Generic[TItem]):
+    """Case-insensitive index over some fields of a list of items, supporting exact ID, prefix and substring matches.
+
+    Field values are normalized to lowercase and indexed once, on the first search.
+    """
+
+    def __init__(self, items: Iterable[TItem], fields: Iterable[str], id_field: str = "id"):
+        """Initialize a new SearchIndex.
+
+        Args:
+            items (Iterable[TItem]): The items to index.
+
+            fields (Iterable[str]): Names of the item attributes to match against.
+
+            id_field (str): Name of the item attribute used for exact matches.
+        """
+        self.items = list(items)
+        self.fields = tuple(fields)
+        self.id_field = id_field
+        self._built = False
+
+    def _build(self):
+        ids = defaultdict(set)
+        values = []
+        normalized = []
+        ngrams = defaultdict(set)
+
+        for i, item in enumerate(self.items):
+            ids[(getattr(item, self.id_field) or "").lower()].add(i)
+            normalized.append(tuple((getattr(item, field) or "").lower() for field in self.fields))
+            for value in normalized[i]:
+                values.append((value, i))
+                for gram in _ngrams(value):
+                    ngrams[gram].add(i)
+
+        self._ids = ids
+        # (value, index) pairs sorted by value, for prefix matches with bisect
+        self._values = sorted(values)
+        # normalized values per item, for verifying substring matches
+        self._normalized = normalized
+        self._ngrams = ngrams
+        self._built = True
+
+    def exact(self, term: str) -> set[int]:
+        """Indexes of the items with an ID equal to term."""
+        return set(self._ids.get(term.lower(), ()))
+
+    def prefix(self, term: str) -> set[int]:
+        """Indexes of the items with any field starting with term."""
+        term = term.lower()
+        matches = set()
+        start = bisect_left(self._values, (term, -1))
+        for value, i in self._values[start:]:
+            if not value.startswith(term):
+                break
+            matches.add(i)
+        return matches
+
+    def substring(self, term: str) -> set[int]:
+        """Indexes of the items with any field containing term."""
+        term = term.lower()
+        if len(term) < NGRAM:
+            candidates = range(len(self.items))
+        else:
+            postings = sorted((self._ngrams.get(gram, set()) for gram in _ngrams(term)), key=len)
+            candidates = set.intersection(*postings)
+        return {i for i in candidates if any(term in value for value in self._normalized[i])}
+
+    def search(self, terms: Iterable[str], match: str = MATCH_SUBSTRING) -> list[TItem]:
+        """Get the items matching any of the terms, in their original order.
+
+        Args:
+            terms (Iterable[str]): The terms to match. Empty terms are ignored.
+
+            match (str): One of MATCH_EXACT, MATCH_PREFIX, or MATCH_SUBSTRING.
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unsupported match: {match}, must be one of: {', '.join(MATCH_MODES)}")
+        if not self._built:
+            self._build()
+
+        matcher = getattr(self, match)
+        matches = set()
+        for term in terms:
+            if term:
+                matches.update(matcher(term))
+
+        return [self.items[i] for i in sorted(matches)]
@@ -0,0 +1,291 @@
+from contextlib import closing
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import sqlite3
+import time
+from typing import Callable, Iterable
+
+from littlepay.api import TResponse
+from littlepay.config import CONFIG_DIR, Config
+from littlepay.search import MATCH_EXACT, MATCH_MODES, MATCH_PREFIX, MATCH_SUBSTRING, NGRAM, SearchIndex
+
+
+SNAPSHOT_FILE = CONFIG_DIR / "snapshots.db"
+SNAPSHOT_TTL = int(os.environ.get("LP_SNAPSHOT_TTL", 15 * 60))
+
+# snapshot keys mirror the API endpoints the items are fetched from
+CONCESSION_GROUPS = "concession_groups"
+PRODUCTS = "products"
+
+# fields of the items under each snapshot key (without query) that are stored lowercased for searching
+SEARCH_FIELDS = {
+    CONCESSION_GROUPS: ("id", "label"),
+    PRODUCTS: ("id", "code", "description"),
+}
+
+# SQL condition on a stored search value for each match mode, with a function returning its parameters for a term; terms
+# of at least NGRAM characters are first narrowed down with the full-text trigram index
+_SEARCH_CONDITIONS = {
+    MATCH_EXACT: ("(field = 'id' AND value = ?)", lambda term: (term,)),
+    MATCH_PREFIX: ("substr(value, 1, ?) = ?", lambda term: (len(term), term)),
+    MATCH_SUBSTRING: ("instr(value, ?) > 0", lambda term: (term,)),
+}
+
+
+def group_products_key(group_id: str) -> str:
+    """Snapshot key for a concession group's linked products."""
+    return f"{CONCESSION_GROUPS}/{group_id}/{PRODUCTS}"
+
+
+def group_funding_sources_key(group_id: str) -> str:
+    """Snapshot key for a concession group's linked funding sources."""
+    return f"{CONCESSION_GROUPS}/{group_id}/fundingsources"
+
+
+def group_funding_sources_sync_key(group_id: str) -> str:
+    """Snapshot key for a concession group's linked funding sources as of the last sync."""
+    return f"sync/{group_funding_sources_key(group_id)}"
+
+
+def products_key(status: str = None) -> str:
+    """Snapshot key for products, optionally filtered by status."""
+    return f"{PRODUCTS}?status={status}" if status else PRODUCTS
+
+
+def search_fields(key: str) -> tuple[str, ...]:
+    """Names of the searchable fields of the items stored under key, or an empty tuple if they aren't searchable."""
+    return SEARCH_FIELDS.get(key.split("?")[0], ())
+
+
+def _search_condition(match: str, term: str) -> tuple[str, tuple]:
+    """The SQL condition and its parameters for stored search values matching term."""
+    condition, params = _SEARCH_CONDITIONS[match]
+    if len(term) < NGRAM:
+        return condition, params(term)
+    phrase = '"' + term.replace('"', '""') + '"'
+    return f"value MATCH ? AND {condition}", (phrase, *params(term))
+
+
+def _search_values(items: list, fields: tuple[str, ...]) -> Iterable[tuple[int, str, str]]:
+    """(position, field, lowercased value) for each of the fields of the items."""
+    for position, item in enumerate(items):
+        for field in fields:
+            value = item.get(field) if isinstance(item, dict) else getattr(item, field)
+            yield position, field, (value or "").lower()
+
+
+def _snapshot_from_active_config(config: Config):
+    """Create a Snapshot for the active config targets.
+
+    This function should not be called directly, use the static method Snapshot.from_active_config(Config) instead.
+
+    Args:
+        config (Config): The Config instance from which to read the active env and participant.
+    """
+    return Snapshot(env=config.active_env_name, participant=config.active_participant_id)
+
+
+def _to_json(items: Iterable) -> str:
+    """Serialize dataclass (or dict) items to a JSON array, with dates in ISO format."""
+    items = [asdict(item) if is_dataclass(item) else item for item in items]
+    return json.dumps(items, default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o))
+
+
+class Snapshot:
+    """Local store of API listings for an env and participant, backed by an SQLite file."""
+
+    from_active_config = staticmethod(_snapshot_from_active_config)
+
+    def __init__(self, env: str, participant: str, path: str | Path = None, ttl: int = None):
+        """Initialize a new Snapshot for the given env and participant.
+
+        Args:
+            env (str): The name of the environment the snapshot is for.
+
+            participant (str): The participant_id the snapshot is for.
+
+            path (str|Path): Path to the SQLite file. If None, the default is used.
+
+            ttl (int): Number of seconds items remain fresh. If None, the default is used.
+        """
+        self.env = env
+        self.participant = participant
+        self.path = Path(path if path is not None else SNAPSHOT_FILE)
+        self.ttl = ttl if ttl is not None else SNAPSHOT_TTL
+        # fetched_at of the items last read or stored under each key, to match them with their stored search values
+        self._versions: dict[str, float] = {}
+        # False when this SQLite doesn't have the FTS5 trigram tokenizer, and items are searched in memory instead
+        self._fts = True
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS snapshots (
+                env TEXT NOT NULL,
+                participant TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                items TEXT NOT NULL,
+                PRIMARY KEY (env, participant, key)
+            )"""
+        )
+        try:
+            conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS search_values USING fts5 (
+                    env UNINDEXED,
+                    participant UNINDEXED,
+                    key UNINDEXED,
+                    fetched_at UNINDEXED,
+                    position UNINDEXED,
+                    field UNINDEXED,
+                    value,
+                    tokenize = 'trigram'
+                )"""
+            )
+        except sqlite3.OperationalError:
+            self._fts = False
+        # the fetched_at of the items under each key whose search values are stored
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_versions (
+                env TEXT NOT NULL,
+                participant TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (env, participant, key)
+            )"""
+        )
+        return conn
+
+    def get(self, key: str, response_cls: TResponse, stale: bool = False) -> list[TResponse] | None:
+        """Get the items stored under key, or None if there are no items or they are older than the TTL.
+
+        Pass stale=True to get the items regardless of their age.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT fetched_at, items FROM snapshots WHERE env = ? AND participant = ? AND key = ?",
+                (self.env, self.participant, key),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        fetched_at, items = row
+        if not stale and time.time() - fetched_at > self.ttl:
+            return None
+
+        self._versions[key] = fetched_at
+        return [response_cls.from_kwargs(**item) for item in json.loads(items)]
+
+    def put(self, key: str, items: Iterable) -> list:
+        """Store items under key, replacing anything stored there previously.
+
+        The searchable fields of the items are stored lowercased alongside them, so later searches don't normalize them.
+        """
+        items = list(items)
+        row = (self.env, self.participant, key, time.time())
+        fields = search_fields(key)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (env, participant, key, fetched_at, items) VALUES (?, ?, ?, ?, ?)",
+                (*row, _to_json(items)),
+            )
+            self._delete_search_values(conn, [key])
+            if self._fts and fields:
+                conn.executemany(
+                    """INSERT INTO search_values (env, participant, key, fetched_at, position, field, value)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    ((*row, *value) for value in _search_values(items, fields)),
+                )
+                conn.execute("INSERT INTO search_versions (env, participant, key, fetched_at) VALUES (?, ?, ?, ?)", row)
+        self._versions[key] = row[-1]
+        return items
+
+    def load(
+        self, key: str, response_cls: TResponse, fetch: Callable[[], Iterable[TResponse]], refresh: bool = False
+    ) -> list[TResponse]:
+        """Get the items stored under key, calling fetch to (re)populate the snapshot when stale, missing or refreshing."""
+        items = None if refresh else self.get(key, response_cls)
+        if items is None:
+            items = self.put(key, fetch())
+        return items
+
+    def invalidate(self, *keys: str) -> None:
+        """Remove the items stored under the given keys, or under all keys for this env and participant if none are given."""
+        if not self.path.exists():
+            # nothing stored, don't create the file
+            return
+        with closing(self._connect()) as conn, conn:
+            if keys:
+                conn.executemany(
+                    "DELETE FROM snapshots WHERE env = ? AND participant = ? AND key = ?",
+                    ((self.env, self.participant, key) for key in keys),
+                )
+            else:
+                conn.execute("DELETE FROM snapshots WHERE env = ? AND participant = ?", (self.env, self.participant))
+            self._delete_search_values(conn, keys)
+
+    def _delete_search_values(self, conn: sqlite3.Connection, keys: Iterable[str]) -> None:
+        """Remove the search values stored under the given keys, or under all keys for this env and participant if none."""
+        tables = ("search_versions", "search_values") if self._fts else ("search_versions",)
+        for table in tables:
+            if keys:
+                conn.executemany(
+                    f"DELETE FROM {table} WHERE env = ? AND participant = ? AND key = ?",
+                    ((self.env, self.participant, key) for key in keys),
+                )
+            else:
+                conn.execute(f"DELETE FROM {table} WHERE env = ? AND participant = ?", (self.env, self.participant))
+
+    def search(self, key: str, items: list, terms: Iterable[str], match: str = MATCH_SUBSTRING) -> list:
+        """Get the items stored under key matching any of the terms, in their original order.
+
+        Matches are found in the lowercased field values stored by put for the same version of the items, so nothing is
+        normalized or indexed in memory. Items without stored values, e.g. stored by an older version, are searched with a
+        SearchIndex instead.
+
+        Args:
+            key (str): The snapshot key the items were read from or stored under.
+
+            items (list): The items, as returned by get, put or load for key.
+
+            terms (Iterable[str]): The terms to match. Empty terms are ignored.
+
+            match (str): One of MATCH_EXACT, MATCH_PREFIX, or MATCH_SUBSTRING.
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unsupported match: {match}, must be one of: {', '.join(MATCH_MODES)}")
+        fields = search_fields(key)
+        if not fields:
+            raise ValueError(f"Items under {key} are not searchable")
+
+        terms = [term.lower() for term in terms if term]
+        if not terms:
+            return []
+        version = self._versions.get(key)
+        if version is None:
+            return SearchIndex(items, fields).search(terms, match)
+
+        base = (self.env, self.participant, key, version)
+        with closing(self._connect()) as conn:
+            stored = conn.execute(
+                "SELECT 1 FROM search_versions WHERE env = ? AND participant = ? AND key = ? AND fetched_at = ?", base
+            ).fetchone()
+            if not (self._fts and stored):
+                return SearchIndex(items, fields).search(terms, match)
+
+            positions = set()
+            for term in terms:
+                condition, params = _search_condition(match, term)
+                rows = conn.execute(
+                    f"""SELECT position FROM search_values
+                    WHERE {condition} AND env = ? AND participant = ? AND key = ? AND fetched_at = ?""",
+                    (*params, *base),
+                )
+                positions.update(position for (position,) in rows)
+
+        return [items[position] for position in sorted(positions)]
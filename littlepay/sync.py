@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generator
+
+from littlepay.api import ClientProtocol
+from littlepay.api.groups import GroupFundingSourceResponse
+from littlepay.snapshot import Snapshot, group_funding_sources_key, group_funding_sources_sync_key
+
+
+EVENT_ADDED = "added"
+EVENT_REMOVED = "removed"
+EVENT_EXPIRY_CHANGED = "expiry_changed"
+
+
+@dataclass
+class FundingSourceEvent:
+    """A change to a concession group's linked funding sources since the last sync."""
+
+    event: str
+    group_id: str
+    funding_source_id: str
+    expiry_date: datetime | None = None
+    previous_expiry_date: datetime | None = None
+
+    def csv(self) -> str:
+        """Get a CSV str representation of values for this FundingSourceEvent."""
+        vals = [v.isoformat() if isinstance(v, datetime) else (v or "") for v in vars(self).values()]
+        return ",".join(vals)
+
+    @staticmethod
+    def csv_header() -> str:
+        """Get a CSV str header of attributes for FundingSourceEvent."""
+        instance = FundingSourceEvent("", "", "")
+        return ",".join(vars(instance).keys())
+
+
+def high_water_mark(funding_sources: list[GroupFundingSourceResponse]) -> datetime | None:
+    """The most recent updated_date across funding_sources, or None if none of them have been updated."""
+    return max((f.updated_date for f in funding_sources if f.updated_date), default=None)
+
+
+def sync_group_funding_sources(
+    client: ClientProtocol, snapshot: Snapshot, group_id: str
+) -> Generator[FundingSourceEvent, None, None]:
+    """Yield FundingSourceEvent objects for changes to the group's linked funding sources since the last sync.
+
+    The listing as of the last sync is kept in the snapshot, along with its high-water mark (the most recent updated_date).
+    Funding sources not updated since the high-water mark are unchanged; the rest are compared against the previous
+    listing to find added, removed and expiry-changed links.
+
+    On the first sync for a group, every linked funding source is reported as added. The sync state is saved once
+    all events have been consumed.
+    """
+    key = group_funding_sources_sync_key(group_id)
+    previous = snapshot.get(key, GroupFundingSourceResponse, stale=True) or []
+    previous_by_id = {f.id: f for f in previous}
+    mark = high_water_mark(previous)
+
+    current = list(client.get_concession_group_linked_funding_sources(group_id))
+
+    for funding_source in current:
+        before = previous_by_id.pop(funding_source.id, None)
+        if before is None:
+            yield FundingSourceEvent(EVENT_ADDED, group_id, funding_source.id, funding_source.expiry_date)
+        elif mark and funding_source.updated_date and funding_source.updated_date <= mark:
+            continue
+        elif before.expiry_date != funding_source.expiry_date:
+            yield FundingSourceEvent(
+                EVENT_EXPIRY_CHANGED, group_id, funding_source.id, funding_source.expiry_date, before.expiry_date
+            )
+
+    # anything left over from the previous listing is no longer linked
+    for funding_source in previous_by_id.values():
+        yield FundingSourceEvent(EVENT_REMOVED, group_id, funding_source.id, None, funding_source.expiry_date)
+
+    snapshot.put(key, current)
+    # the current listing is also the freshest data for regular reads
+    snapshot.put(group_funding_sources_key(group_id), current)
@@ -1,8 +1,13 @@
+from threading import Barrier
+import time
+
 from authlib.oauth2.rfc6749 import OAuth2Token
 
 import pytest
 
+from littlepay.api import map_concurrent
 from littlepay.api.card_tokenization import CardTokenizationMixin
+from littlepay.api.tokens import TokenProvider
 
 
 @pytest.fixture
@@ -30,3 +35,51 @@ def test_CardTokenizationMixin_request_card_tokenization_access(mock_ClientProto
         client.card_tokenization_request_access_endpoint(), {"request_access": "CARD_TOKENISATION"}
     )
     assert isinstance(token, OAuth2Token)
+
+
+def test_CardTokenizationMixin_card_tokenization_token_provider():
+    client = CardTokenizationMixin()
+
+    provider = client.card_tokenization_token_provider
+
+    assert provider is client.card_tokenization_token_provider
+    assert provider.refresh_margin == CardTokenizationMixin.CARD_TOKENIZATION_REFRESH_MARGIN
+    assert provider.background_refresh == CardTokenizationMixin.CARD_TOKENIZATION_BACKGROUND_REFRESH
+
+
+def test_CardTokenizationMixin_get_card_tokenization_access(mocker):
+    token = {"access_token": "1234", "expires_in": 3600}
+    mock_post = mocker.patch("littlepay.api.ClientProtocol._post", return_value=token)
+    client = CardTokenizationMixin()
+
+    first = client.get_card_tokenization_access()
+    second = client.get_card_tokenization_access()
+
+    assert first is second
+    assert isinstance(first, OAuth2Token)
+    mock_post.assert_called_once()
+
+
+def test_CardTokenizationMixin_get_card_tokenization_access_concurrent_first_callers(mocker):
+    def post(*args, **kwargs):
+        time.sleep(0.1)
+        return {"access_token": "1234", "expires_in": 3600}
+
+    def slow_provider(*args, **kwargs):
+        # widen the window for concurrent first callers to create a provider each
+        time.sleep(0.05)
+        return TokenProvider(*args, **kwargs)
+
+    mock_post = mocker.patch("littlepay.api.ClientProtocol._post", side_effect=post)
+    mocker.patch("littlepay.api.card_tokenization.TokenProvider", side_effect=slow_provider)
+    client = CardTokenizationMixin()
+    barrier = Barrier(8, timeout=5)
+
+    def get(_):
+        barrier.wait()
+        return client.get_card_tokenization_access()
+
+    tokens = [token for _, token in map_concurrent(get, range(8), max_workers=8)]
+
+    mock_post.assert_called_once()
+    assert all(token is tokens[0] for token in tokens)
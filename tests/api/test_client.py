@@ -1,16 +1,41 @@
+from contextvars import ContextVar
 import dataclasses
-from json import JSONDecodeError
+import importlib.util
+import json
+import sqlite3
+import threading
 import time
 from typing import Callable, Generator, TypeAlias
+from urllib.parse import parse_qs
 
 from authlib.integrations.requests_client import OAuth2Session
 from authlib.oauth2.rfc6749 import OAuth2Token
 import pytest
 from requests import HTTPError
 
-from littlepay.api import ListResponse, from_kwargs
-from littlepay.api.client import _client_from_active_config, _fix_bearer_token_header, _json_post_credentials, Client
+from littlepay.api import (
+    ListResponse,
+    RawResponse,
+    from_kwargs,
+    item_decoder,
+    map_concurrent,
+    parse_datetime,
+    projection,
+)
+import littlepay.api
+import littlepay.api.client
+from littlepay.api.client import (
+    _client_from_active_config,
+    _fix_bearer_token_header,
+    _json_post_credentials,
+    Client,
+    reuse_clients,
+)
+from littlepay.api.groups import GroupFundingSourceResponse, GroupResponse
+from littlepay.checkpoint import Checkpoint
 from littlepay.config import Config
+from littlepay.response_cache import ResponseCache
+from littlepay.snapshot import CONCESSION_GROUPS, Snapshot, group_funding_sources_key, group_products_key
 
 
 # type alias to give hints and help for fixture
@@ -26,6 +51,8 @@ def make_client(url) -> ClientFunc:
     """
 
     def _make_client(**kwargs) -> Client:
+        # a valid access token by default, so requests don't acquire one
+        kwargs.setdefault("token", {"access_token": "access123", "expires_at": int(time.time()) + 3600})
         return Client(url, "client_id", "client_secret", "audience", **kwargs)
 
     return _make_client
@@ -82,6 +109,40 @@ def test_client_from_active_config(
     assert user_agent_header in client.headers.items()
 
 
+def test_client_from_active_config_new_clients(mock_active_Config):
+    assert _client_from_active_config(mock_active_Config) is not _client_from_active_config(mock_active_Config)
+
+
+def test_client_from_active_config_reuse_clients(mock_active_Config):
+    reuse_clients()
+    try:
+        client = _client_from_active_config(mock_active_Config)
+
+        assert _client_from_active_config(mock_active_Config) is client
+
+        mock_active_Config.active_env = {"url": "https://other.example.com"}
+        assert _client_from_active_config(mock_active_Config) is not client
+    finally:
+        reuse_clients(False)
+
+    assert littlepay.api.client._warm_clients is None
+    assert _client_from_active_config(mock_active_Config) is not client
+
+
+def test_reuse_clients_previous(mock_active_Config):
+    assert reuse_clients() is False
+    try:
+        client = _client_from_active_config(mock_active_Config)
+
+        # enabling again keeps the warm clients
+        assert reuse_clients() is True
+        assert _client_from_active_config(mock_active_Config) is client
+    finally:
+        assert reuse_clients(False) is True
+
+    assert reuse_clients(False) is False
+
+
 @pytest.mark.parametrize(("current", "expected"), [("Bearer 1234", "1234"), ("1234", "1234")])
 def test_fix_bearer_token_header(current, expected):
     headers = {"Authorization": current}
@@ -111,7 +172,7 @@ def test_json_post_credentials(url):
     result_uri, result_headers, result_json = _json_post_credentials(None, None, url, {}, body)
 
     assert result_uri == url
-    assert result_headers["Content-Length"] == len(json)
+    assert result_headers["Content-Length"] == str(len(json))
     assert result_json == json
 
 
@@ -142,6 +203,14 @@ def test_Client_from_active_config(
     assert user_agent_header in client.headers.items()
 
 
+def test_Client_from_active_config_snapshot(mock_active_Config):
+    client = Client.from_active_config(mock_active_Config)
+
+    assert isinstance(client.snapshot, Snapshot)
+    assert client.snapshot.env == mock_active_Config.active_env_name
+    assert client.snapshot.participant == mock_active_Config.active_participant_id
+
+
 def test_Client_oauth(make_client: ClientFunc):
     client = make_client()
 
@@ -151,6 +220,84 @@ def test_Client_oauth(make_client: ClientFunc):
     assert _fix_bearer_token_header in client.oauth.token_auth.hooks
 
 
+def test_Client_http2_default(make_client: ClientFunc):
+    client = make_client()
+
+    assert client.http2 is False
+
+
+def test_Client_from_active_config_http2(mocker, mock_active_Config):
+    mock_active_Config.active_env = {"url": "https://example.com", "http2": True}
+    mock_session = mocker.patch("littlepay.api.client._http2_session")
+
+    client = Client.from_active_config(mock_active_Config)
+
+    assert client.http2 is True
+    assert client.oauth is mock_session.return_value
+
+
+@pytest.mark.skipif(importlib.util.find_spec("httpx") is not None, reason="httpx is installed")
+def test_Client_http2_missing(make_client: ClientFunc):
+    with pytest.raises(ImportError, match="pip install calitp-littlepay\\[http2\\]"):
+        make_client(http2=True)
+
+
+def test_Client_http2(make_client: ClientFunc):
+    pytest.importorskip("h2")
+    httpx_client = pytest.importorskip("authlib.integrations.httpx_client")
+
+    client = make_client(http2=True)
+
+    assert isinstance(client.oauth, httpx_client.OAuth2Client)
+    assert client.oauth.metadata == {"token_endpoint": client.token_endpoint}
+    assert client.oauth.token_endpoint_auth_method == _json_post_credentials
+
+
+@pytest.mark.parametrize("status,expected", [(None, {}), ("ACTIVE", {"status": ["ACTIVE"]})])
+def test_Client_get_products_http2_params(mocker, make_client: ClientFunc, status, expected):
+    httpx = pytest.importorskip("httpx")
+    httpx_client = pytest.importorskip("authlib.integrations.httpx_client")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"list": [], "total_count": 0})
+
+    mocker.patch(
+        "littlepay.api.client._http2_session",
+        side_effect=lambda **kwargs: httpx_client.OAuth2Client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    client = make_client(http2=True)
+
+    assert list(client.get_products(status=status)) == []
+
+    assert len(requests) == 1
+    params = parse_qs(requests[0].url.query.decode(), keep_blank_values=True)
+    assert params == {"page": ["1"], "per_page": ["100"], "perPage": ["100"], **expected}
+
+
+def test_Client_get_none_params(mocker, make_client: ClientFunc, url):
+    client = make_client()
+    mock_get = mocker.patch.object(client.oauth, "get")
+    mock_get.return_value.content = b"{}"
+
+    client._get(url, RawResponse, page=1, status=None)
+
+    assert mock_get.call_args.kwargs["params"] == {"page": 1}
+
+
+def test_Client_raise_for_status_http2(mocker, make_client: ClientFunc, url):
+    httpx = pytest.importorskip("httpx")
+    mocker.patch("littlepay.api.client._http2_session")
+    client = make_client(http2=True)
+    response = httpx.Response(404, request=httpx.Request("GET", url))
+
+    with pytest.raises(HTTPError) as ex:
+        client._raise_for_status(response)
+
+    assert ex.value.response.status_code == 404
+
+
 def test_Client_token(make_client: ClientFunc, token):
     client = make_client(token=token)
 
@@ -181,6 +328,132 @@ def test_Client_token_None(mocker, make_client: ClientFunc, token):
     assert client.oauth.token == token
 
 
+def test_Client_token_single_flight(mocker, make_client: ClientFunc, token):
+    client = make_client(token=None)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def fetch_token(**kwargs):
+        time.sleep(0.1)
+        return token
+
+    mock_fetch = mocker.patch.object(client.oauth, "fetch_token", side_effect=fetch_token)
+
+    def get(_):
+        barrier.wait()
+        return client.token
+
+    results = [result for _, result in map_concurrent(get, range(4), max_workers=4)]
+
+    assert results == [token] * 4
+    mock_fetch.assert_called_once()
+
+
+def test_Client_token_background_refresh(mocker, make_client: ClientFunc, token):
+    expiring_token = dict(token, expires_at=time.time() + 120)
+    new_token = dict(token, expires_at=time.time() + 3600)
+    client = make_client(token=expiring_token)
+    refreshed = threading.Event()
+
+    def fetch_token(**kwargs):
+        refreshed.set()
+        return new_token
+
+    mock_fetch = mocker.patch.object(client.oauth, "fetch_token", side_effect=fetch_token)
+
+    # still valid, used while a new token is requested in the background
+    assert client.token == expiring_token
+    assert refreshed.wait(timeout=5)
+    with client._token_lock:
+        assert client.token == new_token
+    mock_fetch.assert_called_once()
+
+
+def test_Client_token_background_refresh_error(mocker, make_client: ClientFunc, token):
+    expiring_token = dict(token, expires_at=time.time() + 120)
+    client = make_client(token=expiring_token)
+    mock_fetch = mocker.patch.object(client.oauth, "fetch_token", side_effect=Exception("failed"))
+
+    assert client.token == expiring_token
+
+    with client._token_lock:
+        assert client.oauth.token == expiring_token
+    mock_fetch.assert_called_once()
+
+
+@pytest.mark.parametrize("expires_in,fetched", [(3600, False), (120, True), (30, True), (-10, True)])
+def test_Client_token_is_expired_without_leeway(mocker, make_client: ClientFunc, token, expires_in, fetched):
+    # OAuth2Token.is_expired only takes a leeway from Authlib 1.3.2
+    mocker.patch.object(OAuth2Token, "is_expired", lambda self: None)
+    new_token = dict(token, expires_at=time.time() + 3600)
+    client = make_client(token=dict(token, expires_at=time.time() + expires_in))
+    mock_fetch = mocker.patch.object(client, "_fetch_token", return_value=new_token)
+
+    client.token
+
+    # wait for a background refresh to finish
+    with client._token_lock:
+        pass
+    if fetched:
+        mock_fetch.assert_called_once()
+    else:
+        mock_fetch.assert_not_called()
+
+
+@pytest.fixture
+def nearly_expired_client(mocker, make_client: ClientFunc):
+    """A Client whose access token expires within the session's expiry leeway, sending requests to a fake transport."""
+    client = make_client(token={"access_token": "old", "token_type": "Bearer", "expires_at": int(time.time()) + 30})
+    mocker.patch.object(
+        client.oauth,
+        "send",
+        return_value=mocker.Mock(status_code=200, content=json.dumps({"list": [], "total_count": 0}).encode()),
+    )
+    return client
+
+
+def test_Client_get_nearly_expired_token(mocker, nearly_expired_client: Client, url):
+    new_token = {"access_token": "new", "token_type": "Bearer", "expires_at": int(time.time()) + 3600}
+    mock_fetch = mocker.patch.object(nearly_expired_client.oauth, "fetch_token", return_value=new_token)
+
+    nearly_expired_client._get(url, ListResponse)
+
+    mock_fetch.assert_called_once()
+    request = nearly_expired_client.oauth.send.call_args.args[0]
+    assert request.headers["Authorization"] == "new"
+
+
+def test_Client_get_nearly_expired_token_concurrent(mocker, nearly_expired_client: Client, url):
+    new_token = {"access_token": "new", "token_type": "Bearer", "expires_at": int(time.time()) + 3600}
+
+    def fetch_token(**kwargs):
+        time.sleep(0.1)
+        return new_token
+
+    mock_fetch = mocker.patch.object(nearly_expired_client.oauth, "fetch_token", side_effect=fetch_token)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def get(_):
+        barrier.wait()
+        return nearly_expired_client._get(url, ListResponse)
+
+    results = [result for _, result in map_concurrent(get, range(4), max_workers=4)]
+
+    assert all(isinstance(result, ListResponse) for result in results)
+    mock_fetch.assert_called_once()
+    assert nearly_expired_client.oauth.send.call_count == 4
+
+
+@pytest.mark.parametrize("method", ["_delete", "_post", "_put"])
+def test_Client_mutation_nearly_expired_token(mocker, nearly_expired_client: Client, url, method):
+    new_token = {"access_token": "new", "token_type": "Bearer", "expires_at": int(time.time()) + 3600}
+    mock_fetch = mocker.patch.object(nearly_expired_client.oauth, "fetch_token", return_value=new_token)
+
+    args = (url,) if method == "_delete" else (url, {"data": "123"}, dict)
+    getattr(nearly_expired_client, method)(*args)
+
+    mock_fetch.assert_called_once()
+
+
 def test_Client_version(make_client: ClientFunc, version):
     client = make_client(version=version)
 
@@ -189,7 +462,7 @@ def test_Client_version(make_client: ClientFunc, version):
 
 def test_Client_delete(mocker, make_client: ClientFunc, url):
     client = make_client()
-    mock_response = mocker.Mock(raise_for_status=mocker.Mock(return_value=False), json=mocker.Mock(return_value=True))
+    mock_response = mocker.Mock(raise_for_status=mocker.Mock(return_value=False), content=json.dumps(True).encode())
     req_spy = mocker.patch.object(client.oauth, "delete", return_value=mock_response)
 
     result = client._delete(url)
@@ -212,7 +485,7 @@ def test_Client_delete_error_status(mocker, make_client: ClientFunc, url):
 def test_Client_get(mocker, make_client: ClientFunc, url, SampleResponse_json):
     client = make_client()
     mock_response = mocker.Mock(
-        raise_for_status=mocker.Mock(return_value=False), json=mocker.Mock(return_value=SampleResponse_json)
+        raise_for_status=mocker.Mock(return_value=False), content=json.dumps(SampleResponse_json).encode()
     )
     req_spy = mocker.patch.object(client.oauth, "get", return_value=mock_response)
 
@@ -228,7 +501,7 @@ def test_Client_get(mocker, make_client: ClientFunc, url, SampleResponse_json):
 def test_Client_get_params(mocker, make_client: ClientFunc, url, SampleResponse_json):
     client = make_client()
     mock_response = mocker.Mock(
-        raise_for_status=mocker.Mock(return_value=False), json=mocker.Mock(return_value=SampleResponse_json)
+        raise_for_status=mocker.Mock(return_value=False), content=json.dumps(SampleResponse_json).encode()
     )
     req_spy = mocker.patch.object(client.oauth, "get", return_value=mock_response)
 
@@ -241,13 +514,28 @@ def test_Client_get_params(mocker, make_client: ClientFunc, url, SampleResponse_
     assert result.three == 3
 
 
+def test_Client_json_decoder_default(make_client: ClientFunc):
+    assert make_client().json_decoder is littlepay.api.client._default_decoder
+
+
+def test_Client_get_json_decoder(mocker, make_client: ClientFunc, url, SampleResponse_json):
+    decoder = mocker.Mock(return_value=SampleResponse_json)
+    client = make_client(json_decoder=decoder)
+    mocker.patch.object(client.oauth, "get", return_value=mocker.Mock(content=b"the content"))
+
+    result = client._get(url, SampleResponse)
+
+    decoder.assert_called_once_with(b"the content")
+    assert result == SampleResponse.from_kwargs(**SampleResponse_json)
+
+
 def test_Client_get_response_has_unexpected_fields(
     mocker, make_client: ClientFunc, url, SampleResponse_json_with_unexpected_field
 ):
     client = make_client()
     mock_response = mocker.Mock(
         raise_for_status=mocker.Mock(return_value=False),
-        json=mocker.Mock(return_value=SampleResponse_json_with_unexpected_field),
+        content=json.dumps(SampleResponse_json_with_unexpected_field).encode(),
     )
     req_spy = mocker.patch.object(client.oauth, "get", return_value=mock_response)
 
@@ -272,6 +560,215 @@ def test_Client_get_error_status(mocker, make_client: ClientFunc, url):
     req_spy.assert_called_once_with(url, headers=client.headers, params={})
 
 
+@pytest.fixture
+def cached_client(make_client: ClientFunc) -> Client:
+    return make_client(response_cache=ResponseCache("qa", "participant123"))
+
+
+def test_Client_get_cached_miss(mocker, cached_client: Client, url, SampleResponse_json):
+    mock_response = mocker.Mock(status_code=200, headers={"ETag": '"abc"'}, content=json.dumps(SampleResponse_json).encode())
+    req_spy = mocker.patch.object(cached_client.oauth, "get", return_value=mock_response)
+
+    result = cached_client._get(url, SampleResponse, one=1)
+
+    req_spy.assert_called_once_with(url, headers=cached_client.headers, params=dict(one=1))
+    assert result == SampleResponse.from_kwargs(**SampleResponse_json)
+    assert cached_client.response_cache.get(url, dict(one=1)).etag == '"abc"'
+
+
+def test_Client_get_cached_not_modified(mocker, cached_client: Client, url, SampleResponse_json):
+    cached_client.response_cache.set(url, dict(one=1), SampleResponse_json, etag='"abc"')
+    mock_response = mocker.Mock(status_code=304)
+    req_spy = mocker.patch.object(cached_client.oauth, "get", return_value=mock_response)
+
+    result = cached_client._get(url, SampleResponse, one=1)
+
+    req_spy.assert_called_once_with(url, headers={**cached_client.headers, "If-None-Match": '"abc"'}, params=dict(one=1))
+    mock_response.json.assert_not_called()
+    assert result == SampleResponse.from_kwargs(**SampleResponse_json)
+
+
+def test_Client_get_cached_modified(mocker, cached_client: Client, url, SampleResponse_json):
+    cached_client.response_cache.set(url, {}, {**SampleResponse_json, "three": 0}, last_modified="yesterday")
+    mock_response = mocker.Mock(status_code=200, headers={}, content=json.dumps(SampleResponse_json).encode())
+    req_spy = mocker.patch.object(cached_client.oauth, "get", return_value=mock_response)
+
+    result = cached_client._get(url, SampleResponse)
+
+    req_spy.assert_called_once_with(url, headers={**cached_client.headers, "If-Modified-Since": "yesterday"}, params={})
+    assert result.three == 3
+    assert cached_client.response_cache.get(url).data == SampleResponse_json
+
+
+def test_Client_get_cached_fresh(mocker, cached_client: Client, url, SampleResponse_json):
+    # without validators, a response is used until it is older than the TTL
+    cached_client.response_cache.set(url, {}, SampleResponse_json)
+    req_spy = mocker.patch.object(cached_client.oauth, "get")
+
+    result = cached_client._get(url, SampleResponse)
+
+    req_spy.assert_not_called()
+    assert result == SampleResponse.from_kwargs(**SampleResponse_json)
+
+
+def test_Client_get_cached_error_status(mocker, cached_client: Client, url):
+    mock_response = mocker.Mock(status_code=500, raise_for_status=mocker.Mock(side_effect=HTTPError))
+    mocker.patch.object(cached_client.oauth, "get", return_value=mock_response)
+
+    with pytest.raises(HTTPError):
+        cached_client._get(url, SampleResponse)
+
+    assert cached_client.response_cache.get(url) is None
+
+
+def test_Client_invalidate(cached_client: Client, url):
+    cached_client.response_cache.set(url, {}, {"list": []})
+
+    cached_client._invalidate(url)
+
+    assert cached_client.response_cache.get(url) is None
+
+
+def test_Client_invalidate_uncached(make_client: ClientFunc, url):
+    client = make_client()
+
+    # no error without a cache
+    client._invalidate(url)
+
+
+def test_Client_invalidate_snapshot(make_client: ClientFunc):
+    snapshot = Snapshot("qa", "participant123")
+    client = make_client(snapshot=snapshot)
+    snapshot.put(group_products_key("1234"), [])
+    snapshot.put(CONCESSION_GROUPS, [])
+
+    client._invalidate(client.concession_group_products_endpoint("1234"))
+
+    assert snapshot.get(group_products_key("1234"), GroupResponse) is None
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) == []
+
+
+def test_Client_invalidate_snapshot_no_endpoints(make_client: ClientFunc):
+    snapshot = Snapshot("qa", "participant123")
+    client = make_client(snapshot=snapshot)
+    snapshot.put(CONCESSION_GROUPS, [])
+
+    client._invalidate()
+
+    # no endpoints doesn't mean all of the snapshot
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) == []
+
+
+def test_Client_resource_parts(make_client: ClientFunc):
+    client = make_client()
+
+    assert client._resource_parts(client.concession_group_products_endpoint("1234")) == [
+        "concession_groups",
+        "1234",
+        "products",
+    ]
+    assert client._resource_parts("https://other.example.com/api/v1/products") == []
+
+
+def test_Client_mutation_invalidates(mocker, cached_client: Client):
+    products = cached_client.concession_group_products_endpoint("1234")
+    groups = cached_client.concession_groups_endpoint()
+    cached_client.response_cache.set(products, {"page": 1}, {"list": [], "total_count": 0})
+    cached_client.response_cache.set(groups, {"page": 1}, {"list": [], "total_count": 0})
+    mocker.patch.object(
+        cached_client.oauth, "post", return_value=mocker.Mock(status_code=201, content=json.dumps({}).encode())
+    )
+
+    cached_client.link_concession_group_product("1234", "p1")
+
+    assert cached_client.response_cache.get(products, {"page": 1}) is None
+    assert cached_client.response_cache.get(groups, {"page": 1}) is not None
+
+
+def test_Client_mutation_invalidates_snapshot(mocker, make_client: ClientFunc):
+    snapshot = Snapshot("qa", "participant123")
+    client = make_client(snapshot=snapshot)
+    for key in (CONCESSION_GROUPS, group_products_key("1234"), group_funding_sources_key("1234")):
+        snapshot.put(key, [])
+    mocker.patch.object(client.oauth, "post", return_value=mocker.Mock(status_code=201, content=json.dumps({}).encode()))
+
+    client.migrate_concession_group("1234")
+
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) is None
+    # migrating doesn't change the group's links
+    assert snapshot.get(group_products_key("1234"), GroupResponse) == []
+
+    client.link_concession_group_funding_source("1234", "fs1")
+
+    assert snapshot.get(group_funding_sources_key("1234"), GroupResponse) is None
+    assert snapshot.get(group_products_key("1234"), GroupResponse) == []
+
+
+def test_Client_mutation_unmapped_invalidates_nothing(mocker, make_client: ClientFunc):
+    snapshot = mocker.Mock()
+    response_cache = mocker.Mock()
+    client = make_client(snapshot=snapshot, response_cache=response_cache)
+    mocker.patch.object(client.oauth, "post", return_value=mocker.Mock(status_code=201, content=json.dumps({}).encode()))
+
+    client._post(client._make_endpoint("cardtokenisation", "requestaccess"), {})
+
+    snapshot.invalidate.assert_not_called()
+    response_cache.invalidate.assert_not_called()
+
+
+def test_Client_mutation_invalidate_error(mocker, make_client: ClientFunc):
+    snapshot = mocker.Mock()
+    snapshot.invalidate.side_effect = sqlite3.OperationalError("database is locked")
+    client = make_client(snapshot=snapshot)
+    mocker.patch.object(client.oauth, "post", return_value=mocker.Mock(status_code=201, content=json.dumps({}).encode()))
+    mocker.patch.object(client.oauth, "delete", return_value=mocker.Mock(raise_for_status=mocker.Mock(side_effect=HTTPError)))
+
+    # the invalidation error doesn't replace a successful response
+    assert client.link_concession_group_product("1234", "p1") == {}
+    # or the request error
+    with pytest.raises(HTTPError):
+        client.unlink_concession_group_product("1234", "p1")
+    assert snapshot.invalidate.call_count == 2
+
+
+def test_Client_mutation_error_invalidates(mocker, cached_client: Client):
+    products = cached_client.concession_group_products_endpoint("1234")
+    cached_client.response_cache.set(products, None, {"list": [], "total_count": 0})
+    mocker.patch.object(
+        cached_client.oauth, "delete", return_value=mocker.Mock(raise_for_status=mocker.Mock(side_effect=HTTPError))
+    )
+
+    with pytest.raises(HTTPError):
+        cached_client.unlink_concession_group_product("1234", "p1")
+
+    assert cached_client.response_cache.get(products) is None
+
+
+def test_Client_mutation_invalidates_funding_source_groups_cache(mocker, make_client: ClientFunc):
+    client = make_client()
+    client.funding_source_groups_cache.set("fs1", ["group"])
+    client.funding_source_groups_cache.set("fs2", ["group"])
+    mocker.patch.object(client.oauth, "delete", return_value=mocker.Mock())
+
+    client.unlink_concession_group_funding_source("1234", "fs1")
+
+    assert "fs1" not in client.funding_source_groups_cache
+    assert "fs2" in client.funding_source_groups_cache
+
+
+def test_Client_from_active_config_response_cache(mock_active_Config):
+    mock_active_Config.active_env = {"url": "https://example.com", "response_cache": True}
+
+    client = Client.from_active_config(mock_active_Config)
+
+    assert isinstance(client.response_cache, ResponseCache)
+    assert Client.from_active_config(mock_active_Config).response_cache is not client.response_cache
+
+
+def test_Client_from_active_config_response_cache_default(mock_active_Config):
+    assert Client.from_active_config(mock_active_Config).response_cache is None
+
+
 def test_ListResponse_unexpected_fields():
     response_json = {"list": [1, 2, 3], "total_count": 3, "unexpected_field": "test value"}
 
@@ -279,6 +776,111 @@ def test_ListResponse_unexpected_fields():
     ListResponse.from_kwargs(**response_json)
 
 
+def test_from_kwargs(SampleResponse_json):
+    assert from_kwargs(SampleResponse, **SampleResponse_json) == SampleResponse(**SampleResponse_json)
+
+
+def test_from_kwargs_unexpected_fields_logged_once(mocker, SampleResponse_json):
+    mocker.patch.object(littlepay.api, "_unexpected_fields", set())
+    logger = mocker.patch.object(littlepay.api, "logger")
+
+    first = from_kwargs(SampleResponse, **SampleResponse_json, four="quad")
+    second = from_kwargs(SampleResponse, **SampleResponse_json, four="quad")
+
+    assert first == second == SampleResponse(**SampleResponse_json)
+    logger.info.assert_called_once_with("Ran into an unexpected SampleResponse arg: four = quad")
+
+
+def test_from_kwargs_unexpected_fields_logged_per_class(mocker, SampleResponse_json):
+    mocker.patch.object(littlepay.api, "_unexpected_fields", set())
+    logger = mocker.patch.object(littlepay.api, "logger")
+
+    from_kwargs(SampleResponse, **SampleResponse_json, four="quad")
+    from_kwargs(ListResponse, list=[], total_count=0, four="quad")
+
+    assert logger.info.call_count == 2
+
+
+def test_RawResponse_from_kwargs():
+    response = RawResponse.from_kwargs(id="1234", unexpected_field="test value")
+
+    assert isinstance(response, dict)
+    assert response == {"id": "1234", "unexpected_field": "test value"}
+
+
+@pytest.mark.parametrize("value", [None, ""])
+def test_parse_datetime_missing(value):
+    assert parse_datetime(value) is None
+
+
+def test_parse_datetime(expected_expiry, expected_expiry_str):
+    assert parse_datetime(expected_expiry_str) == expected_expiry
+
+
+def test_projection(expected_expiry, expected_expiry_str):
+    record_cls = projection(GroupFundingSourceResponse, ("id", "expiry_date"))
+    item = dict(id="1234", expiry_date=expected_expiry_str, created_date=expected_expiry_str, unexpected_field="value")
+
+    record = record_cls.from_item(item)
+
+    assert isinstance(record, tuple)
+    assert record_cls.__name__ == "GroupFundingSourceResponseRecord"
+    assert record._fields == ("id", "expiry_date")
+    assert record.id == "1234"
+    assert record.expiry_date == expected_expiry
+
+
+def test_projection_missing_values():
+    record = projection(GroupFundingSourceResponse, ("id", "expiry_date")).from_item(dict(id="1234", expiry_date=""))
+
+    assert record == ("1234", None)
+
+
+def test_projection_cached():
+    assert projection(GroupResponse, ("id",)) is projection(GroupResponse, ("id",))
+    assert projection(GroupResponse, ("id",)) is not projection(GroupResponse, ("id", "label"))
+
+
+def test_projection_unknown_fields():
+    with pytest.raises(ValueError, match="Unknown GroupResponse fields: unknown"):
+        projection(GroupResponse, ("id", "unknown"))
+
+
+def test_item_decoder():
+    item = dict(id="1234", label="label", participant_id="participant")
+
+    assert item_decoder(GroupResponse)(item) == GroupResponse(**item)
+    assert item_decoder(GroupResponse)({**item, "unexpected_field": "value"}) == GroupResponse(**item)
+    assert item_decoder(GroupResponse, raw=True)(item) is item
+    assert item_decoder(GroupResponse, fields=["label"])(item) == ("label",)
+    assert item_decoder(GroupResponse, raw=True, fields=["label"])(item) == ("label",)
+
+
+def test_map_concurrent():
+    def _double(value):
+        if value < 0:
+            raise ValueError(value)
+        return value * 2
+
+    result = map_concurrent(_double, [3, 2, -1, 1], max_workers=2)
+    assert isinstance(result, Generator)
+
+    result = list(result)
+
+    assert [item for item, _ in result] == [3, 2, -1, 1]
+    assert [value for _, value in result if not isinstance(value, Exception)] == [6, 4, 2]
+    assert isinstance(result[2][1], ValueError)
+
+
+def test_map_concurrent_context():
+    participant = ContextVar("participant", default=None)
+    participant.set("participant123")
+
+    result = list(map_concurrent(lambda _: participant.get(), [1, 2]))
+
+    assert result == [(1, "participant123"), (2, "participant123")]
+
+
 def test_Client_get_list(mocker, make_client: ClientFunc, url, default_list_params, ListResponse_sample):
     client = make_client()
     req_spy = mocker.patch.object(client, "_get", return_value=ListResponse_sample)
@@ -311,6 +913,57 @@ def test_Client_get_list_paging(mocker, make_client: ClientFunc, url, default_li
     assert result == [1, 2, 3, 1, 2, 3, 1, 2, 3]
 
 
+def test_Client_get_list_checkpoint(mocker, make_client: ClientFunc, url):
+    checkpoint = Checkpoint("listing", "qa", "participant123")
+    saved = []
+    pages = [ListResponse(list=[1, 2, 3], total_count=7), ListResponse(list=[4, 5, 6], total_count=7)]
+    client = make_client()
+
+    def _get(*args, **kwargs):
+        saved.append(checkpoint.load())
+        if kwargs["page"] == 3:
+            raise HTTPError("interrupted")
+        return pages[kwargs["page"] - 1]
+
+    mocker.patch.object(client, "_get", side_effect=_get)
+
+    result = []
+    with pytest.raises(HTTPError):
+        for item in client._get_list(url, checkpoint=checkpoint):
+            result.append(item)
+
+    assert result == [1, 2, 3, 4, 5, 6]
+    assert saved[1] == {"page": 1, "total_count": 7, "count": 3}
+    assert checkpoint.load() == {"page": 2, "total_count": 7, "count": 6}
+
+    req_spy = mocker.patch.object(client, "_get", return_value=ListResponse(list=[7], total_count=7))
+
+    result = list(client._get_list(url, checkpoint=checkpoint))
+
+    # the saved pages are replayed, and the listing continues from the next page
+    req_spy.assert_called_once()
+    assert req_spy.call_args.kwargs["page"] == 3
+    assert result == [1, 2, 3, 4, 5, 6, 7]
+    assert checkpoint.load() == {}
+    assert list(checkpoint.items()) == []
+
+
+def test_Client_get_list_checkpoint_complete(mocker, make_client: ClientFunc, url):
+    checkpoint = Checkpoint("listing", "qa", "participant123")
+    checkpoint.append([1, 2])
+    # items appended after the last save, before an interruption, aren't replayed
+    checkpoint.append([3])
+    checkpoint.save(page=1, total_count=2, count=2)
+    client = make_client()
+    req_spy = mocker.patch.object(client, "_get")
+
+    result = list(client._get_list(url, checkpoint=checkpoint))
+
+    req_spy.assert_not_called()
+    assert result == [1, 2]
+    assert checkpoint.load() == {}
+
+
 def test_Client_make_endpoint(make_client: ClientFunc, url):
     client = make_client()
     partial = "partial/123.json"
@@ -341,7 +994,7 @@ def test_Client_make_endpoint_version(make_client: ClientFunc, url, version):
 def test_Client_post(mocker, make_client: ClientFunc, url, SampleResponse_json):
     client = make_client()
     mock_response = mocker.Mock(
-        raise_for_status=mocker.Mock(return_value=False), json=mocker.Mock(return_value=SampleResponse_json)
+        raise_for_status=mocker.Mock(return_value=False), content=json.dumps(SampleResponse_json).encode()
     )
     req_spy = mocker.patch.object(client.oauth, "post", return_value=mock_response)
 
@@ -358,7 +1011,7 @@ def test_Client_post(mocker, make_client: ClientFunc, url, SampleResponse_json):
 def test_Client_post_default_cls(mocker, make_client: ClientFunc, url, SampleResponse_json):
     client = make_client()
     mock_response = mocker.Mock(
-        raise_for_status=mocker.Mock(return_value=False), json=mocker.Mock(return_value=SampleResponse_json)
+        raise_for_status=mocker.Mock(return_value=False), content=json.dumps(SampleResponse_json).encode()
     )
     req_spy = mocker.patch.object(client.oauth, "post", return_value=mock_response)
 
@@ -375,8 +1028,8 @@ def test_Client_post_default_cls(mocker, make_client: ClientFunc, url, SampleRes
 def test_Client_post_empty_response(mocker, make_client: ClientFunc, url):
     client = make_client()
     mock_response = mocker.Mock(
-        # json() throws a JSONDecodeError, simulating an empty response
-        json=mocker.Mock(side_effect=JSONDecodeError("msg", "doc", 0)),
+        # an empty response can't be decoded
+        content=b"",
         # raise_for_status() returns None
         raise_for_status=mocker.Mock(return_value=False),
         # fake a 201 status_code
@@ -408,7 +1061,7 @@ def test_Client_post_error_status(mocker, make_client: ClientFunc, url):
 def test_Client_put(mocker, make_client: ClientFunc, url, SampleResponse_json):
     client = make_client()
     mock_response = mocker.Mock(
-        raise_for_status=mocker.Mock(return_value=False), json=mocker.Mock(return_value=SampleResponse_json)
+        raise_for_status=mocker.Mock(return_value=False), content=json.dumps(SampleResponse_json).encode()
     )
     req_spy = mocker.patch.object(client.oauth, "put", return_value=mock_response)
 
@@ -426,7 +1079,7 @@ def test_Client_put_default_cls(mocker, make_client: ClientFunc, url, ListRespon
     client = make_client()
     mock_response = mocker.Mock(
         raise_for_status=mocker.Mock(return_value=False),
-        json=mocker.Mock(return_value=dataclasses.asdict(ListResponse_sample)),
+        content=json.dumps(dataclasses.asdict(ListResponse_sample)).encode(),
     )
     req_spy = mocker.patch.object(client.oauth, "put", return_value=mock_response)
 
@@ -445,8 +1098,8 @@ def test_Client_put_default_cls(mocker, make_client: ClientFunc, url, ListRespon
 def test_Client_put_empty_response(mocker, make_client: ClientFunc, url):
     client = make_client()
     mock_response = mocker.Mock(
-        # json() throws a JSONDecodeError, simulating an empty response
-        json=mocker.Mock(side_effect=JSONDecodeError("msg", "doc", 0)),
+        # an empty response can't be decoded
+        content=b"",
         # raise_for_status() returns None
         raise_for_status=mocker.Mock(return_value=False),
         # fake a 201 status_code
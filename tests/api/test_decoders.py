@@ -0,0 +1,43 @@
+import json
+import sys
+
+import pytest
+
+from littlepay.api.decoders import DECODERS, get_decoder
+
+
+def installed(name: str) -> bool:
+    try:
+        DECODERS[name]()
+    except ImportError:
+        return False
+    return True
+
+
+INSTALLED = [name for name in DECODERS if installed(name)]
+
+
+@pytest.mark.parametrize("name", INSTALLED)
+def test_get_decoder_name(name):
+    decoder = get_decoder(name)
+
+    assert decoder(b'{"list": [1, 2], "total_count": 2}') == {"list": [1, 2], "total_count": 2}
+
+
+@pytest.mark.parametrize("name", INSTALLED)
+def test_get_decoder_empty(name):
+    with pytest.raises(ValueError):
+        get_decoder(name)(b"")
+
+
+def test_get_decoder_default():
+    orjson = pytest.importorskip("orjson")
+
+    assert get_decoder() is orjson.loads
+
+
+def test_get_decoder_fallback(mocker):
+    # None in sys.modules makes importing the module raise ImportError
+    mocker.patch.dict(sys.modules, {"orjson": None, "msgspec": None})
+
+    assert get_decoder() is json.loads
@@ -0,0 +1,78 @@
+import pytest
+
+from littlepay.api.client import Client
+from littlepay.api.dependencies import ANY, RESOURCE_DEPENDENCIES, dependent_endpoints, match_resource
+
+
+@pytest.fixture
+def client(url) -> Client:
+    return Client(url, "client_id", "client_secret", "audience")
+
+
+@pytest.mark.parametrize(
+    "pattern,parts,expected",
+    [
+        (("concession_groups",), ["concession_groups"], []),
+        (("concession_groups", ANY), ["concession_groups", "1234"], ["1234"]),
+        (("concession_groups", ANY, "products", ANY), ["concession_groups", "1234", "products", "5678"], ["1234", "5678"]),
+        (("concession_groups", ANY), ["concession_groups"], None),
+        (("concession_groups", ANY, "products"), ["concession_groups", "1234", "fundingsources"], None),
+    ],
+)
+def test_match_resource(pattern, parts, expected):
+    assert match_resource(pattern, parts) == expected
+
+
+def test_RESOURCE_DEPENDENCIES_methods():
+    assert {method for method, _ in RESOURCE_DEPENDENCIES} == {"POST", "PUT", "DELETE"}
+
+
+def test_dependent_endpoints_create_group(client: Client):
+    assert dependent_endpoints(client, "POST", ["concession_groups"], {"label": "label"}) == [
+        client.concession_groups_endpoint()
+    ]
+
+
+def test_dependent_endpoints_remove_group(client: Client):
+    assert dependent_endpoints(client, "DELETE", ["concession_groups", "1234"]) == [
+        client.concession_groups_endpoint(),
+        client.concession_groups_endpoint("1234"),
+        client.concession_group_products_endpoint("1234"),
+        client.concession_group_funding_source_endpoint("1234"),
+    ]
+
+
+def test_dependent_endpoints_migrate_group(client: Client):
+    assert dependent_endpoints(client, "POST", ["concession_groups", "1234", "migrate"]) == [
+        client.concession_groups_endpoint(),
+        client.concession_groups_endpoint("1234"),
+    ]
+
+
+def test_dependent_endpoints_link_funding_source(client: Client):
+    assert dependent_endpoints(client, "POST", ["concession_groups", "1234", "fundingsources"], {"id": "fs1"}) == [
+        client.concession_group_funding_source_endpoint("1234"),
+        client.funding_source_concession_groups_endpoint("fs1"),
+    ]
+
+
+@pytest.mark.parametrize("method", ["PUT", "DELETE"])
+def test_dependent_endpoints_funding_source(client: Client, method):
+    assert dependent_endpoints(client, method, ["concession_groups", "1234", "fundingsources", "fs1"], {}) == [
+        client.concession_group_funding_source_endpoint("1234"),
+        client.funding_source_concession_groups_endpoint("fs1"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "method,parts",
+    [("POST", ["concession_groups", "1234", "products"]), ("DELETE", ["concession_groups", "1234", "products", "p1"])],
+)
+def test_dependent_endpoints_products(client: Client, method, parts):
+    assert dependent_endpoints(client, method, parts, {"id": "p1"}) == [client.concession_group_products_endpoint("1234")]
+
+
+def test_dependent_endpoints_unknown(client: Client):
+    # a mutation not in the map affects no cached listing
+    assert dependent_endpoints(client, "POST", ["products", "p1", "archive"]) == []
+    assert dependent_endpoints(client, "POST", ["cardtokenisation", "requestaccess"], {}) == []
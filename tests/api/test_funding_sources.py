@@ -1,7 +1,8 @@
 from typing import Generator
 import pytest
+from requests import HTTPError
 
-from littlepay.api import ListResponse
+from littlepay.api import ListResponse, RawResponse
 from littlepay.api.funding_sources import (
     FundingSourceDateFields,
     FundingSourceGroupResponse,
@@ -186,6 +187,17 @@ def test_FundingSourcesMixin_get_funding_source_by_token(mock_ClientProtocol_get
     assert isinstance(result, FundingSourceResponse)
 
 
+def test_FundingSourcesMixin_get_funding_source_by_token_fields(mocker, expected_expiry, expected_expiry_str):
+    item = dict(id="0", card_last_digits="0000", created_date=expected_expiry_str, related_funding_sources=[])
+    mock_get = mocker.patch("littlepay.api.ClientProtocol._get", return_value=RawResponse(item))
+    client = FundingSourcesMixin()
+
+    result = client.get_funding_source_by_token("abc", fields=["id", "created_date"])
+
+    mock_get.assert_called_once_with(client.funding_source_by_token_endpoint("abc"), RawResponse)
+    assert result == ("0", expected_expiry)
+
+
 def test_FundingSourcesMixin_get_concession_group_linked_funding_sources(
     ListResponse_FundingSourceGroups, mock_ClientProtocol_get_list_FundingSourceGroup, expected_expiry, expected_expiry_str
 ):
@@ -224,3 +236,130 @@ def test_FundingSourcesMixin_get_concession_group_linked_funding_sources(
             assert result_list[i].updated_date == expected_expiry
         else:
             assert result_list[i].updated_date is None
+
+
+def test_FundingSourcesMixin_get_funding_source_linked_concession_groups_raw(
+    ListResponse_FundingSourceGroups, mock_ClientProtocol_get_list_FundingSourceGroup
+):
+    client = FundingSourcesMixin()
+
+    result_list = list(client.get_funding_source_linked_concession_groups("funding-source-1234", raw=True))
+
+    assert result_list == ListResponse_FundingSourceGroups.list
+
+
+def test_FundingSourcesMixin_get_funding_source_linked_concession_groups_fields(
+    ListResponse_FundingSourceGroups, mock_ClientProtocol_get_list_FundingSourceGroup
+):
+    client = FundingSourcesMixin()
+
+    result_list = list(client.get_funding_source_linked_concession_groups("funding-source-1234", fields=["group_id"]))
+
+    assert result_list == [(item["group_id"],) for item in ListResponse_FundingSourceGroups.list]
+
+
+def test_FundingSourcesMixin_get_funding_source_linked_concession_groups_unexpected_fields(mocker):
+    items = [dict(id="0", group_id="group-0", label="zero", unexpected_field="value")]
+    mocker.patch("littlepay.api.ClientProtocol._get_list", return_value=iter(items))
+    client = FundingSourcesMixin()
+
+    result_list = list(client.get_funding_source_linked_concession_groups("funding-source-1234"))
+
+    assert result_list == [FundingSourceGroupResponse(id="0", group_id="group-0", label="zero")]
+
+
+def test_FundingSourcesMixin_funding_source_groups_cache():
+    client = FundingSourcesMixin()
+
+    assert client.funding_source_groups_cache is client.funding_source_groups_cache
+    assert client.funding_source_groups_cache is not FundingSourcesMixin().funding_source_groups_cache
+
+
+def test_FundingSourcesMixin_get_funding_sources_linked_concession_groups(
+    ListResponse_FundingSourceGroups, mock_ClientProtocol_get_list_FundingSourceGroup
+):
+    client = FundingSourcesMixin()
+
+    result = client.get_funding_sources_linked_concession_groups(["fs1", "fs2", "fs1", "fs3"])
+
+    assert list(result.keys()) == ["fs1", "fs2", "fs3"]
+    assert mock_ClientProtocol_get_list_FundingSourceGroup.call_count == 3
+    for groups in result.values():
+        assert len(groups) == len(ListResponse_FundingSourceGroups.list)
+        assert all([isinstance(g, FundingSourceGroupResponse) for g in groups])
+
+
+def test_FundingSourcesMixin_get_funding_sources_linked_concession_groups_cached(
+    mock_ClientProtocol_get_list_FundingSourceGroup,
+):
+    client = FundingSourcesMixin()
+
+    first = client.get_funding_sources_linked_concession_groups(["fs1", "fs2"])
+    second = client.get_funding_sources_linked_concession_groups(["fs2", "fs3"])
+
+    assert mock_ClientProtocol_get_list_FundingSourceGroup.call_count == 3
+    assert second["fs2"] == first["fs2"]
+
+
+def test_FundingSourcesMixin_get_funding_sources_linked_concession_groups_error(mocker):
+    mocker.patch("littlepay.api.ClientProtocol._get_list", side_effect=HTTPError)
+    client = FundingSourcesMixin()
+
+    result = client.get_funding_sources_linked_concession_groups(["fs1"])
+
+    assert isinstance(result["fs1"], HTTPError)
+    # errors are not cached
+    assert "fs1" not in client.funding_source_groups_cache
+
+
+@pytest.fixture
+def mock_get_funding_source_by_token(mocker):
+    def _get_funding_source_by_token(card_token):
+        if card_token.startswith("missing"):
+            raise HTTPError(response=mocker.Mock(status_code=404))
+        if card_token.startswith("error"):
+            raise HTTPError(response=mocker.Mock(status_code=500))
+        return mocker.Mock(id=f"funding_source_{card_token}")
+
+    return mocker.patch.object(FundingSourcesMixin, "get_funding_source_by_token", side_effect=_get_funding_source_by_token)
+
+
+def test_FundingSourcesMixin_funding_source_by_token_caches():
+    client = FundingSourcesMixin()
+
+    assert client.funding_source_by_token_cache is client.funding_source_by_token_cache
+    assert client.funding_source_by_token_negative_cache is client.funding_source_by_token_negative_cache
+    assert client.funding_source_by_token_cache is not client.funding_source_by_token_negative_cache
+    assert client.funding_source_by_token_cache.ttl == FundingSourcesMixin.FUNDING_SOURCE_BY_TOKEN_TTL
+    assert client.funding_source_by_token_negative_cache.ttl == FundingSourcesMixin.FUNDING_SOURCE_BY_TOKEN_NEGATIVE_TTL
+    assert FundingSourcesMixin.FUNDING_SOURCE_BY_TOKEN_NEGATIVE_TTL < FundingSourcesMixin.FUNDING_SOURCE_BY_TOKEN_TTL
+
+
+def test_FundingSourcesMixin_get_funding_sources_by_token(mock_get_funding_source_by_token):
+    client = FundingSourcesMixin()
+
+    result = client.get_funding_sources_by_token(["token1", "token2", "token1", "missing1", "error1"])
+
+    assert list(result.keys()) == ["token1", "token2", "missing1", "error1"]
+    assert mock_get_funding_source_by_token.call_count == 4
+    assert result["token1"].id == "funding_source_token1"
+    assert result["token2"].id == "funding_source_token2"
+    assert result["missing1"] is None
+    assert isinstance(result["error1"], HTTPError)
+
+
+def test_FundingSourcesMixin_get_funding_sources_by_token_cached(mock_get_funding_source_by_token):
+    client = FundingSourcesMixin()
+
+    first = client.get_funding_sources_by_token(["token1", "missing1", "error1"])
+    second = client.get_funding_sources_by_token(["token1", "missing1", "error1", "token2"])
+
+    # token1 and missing1 are cached, error1 is looked up again
+    assert mock_get_funding_source_by_token.call_count == 5
+    assert second["token1"] is first["token1"]
+    assert second["missing1"] is None
+    assert "token1" in client.funding_source_by_token_cache
+    assert "missing1" in client.funding_source_by_token_negative_cache
+    assert "missing1" not in client.funding_source_by_token_cache
+    assert "error1" not in client.funding_source_by_token_cache
+    assert "error1" not in client.funding_source_by_token_negative_cache
@@ -2,9 +2,10 @@ from datetime import datetime, timedelta, timezone
 from typing import Generator
 
 import pytest
+from requests import HTTPError
 
 from littlepay.api import ListResponse
-from littlepay.api.groups import GroupFundingSourceResponse, GroupResponse, GroupsMixin
+from littlepay.api.groups import GroupFundingSourceResponse, GroupResponse, GroupsMixin, normalize_expiry
 
 
 @pytest.fixture
@@ -200,6 +201,33 @@ def test_GroupsMixin_get_concession_groups(mock_ClientProtocol_get_list_Groups):
     assert result_list[2].participant_id == "two_2"
 
 
+def test_GroupsMixin_get_concession_groups_raw(mock_ClientProtocol_get_list_Groups):
+    client = GroupsMixin()
+
+    result_list = list(client.get_concession_groups(raw=True))
+
+    assert result_list == list(mock_ClientProtocol_get_list_Groups.side_effect())
+
+
+def test_GroupsMixin_get_concession_groups_fields(mock_ClientProtocol_get_list_Groups):
+    client = GroupsMixin()
+
+    result_list = list(client.get_concession_groups(fields=["id", "label"]))
+
+    assert result_list == [("0", "zero"), ("1", "one"), ("2", "two")]
+    assert result_list[0].label == "zero"
+
+
+def test_GroupsMixin_get_concession_groups_unexpected_fields(mocker):
+    items = [dict(id="0", label="zero", participant_id="zero_0", unexpected_field="value")]
+    mocker.patch("littlepay.api.ClientProtocol._get_list", return_value=iter(items))
+    client = GroupsMixin()
+
+    result_list = list(client.get_concession_groups())
+
+    assert result_list == [GroupResponse(id="0", label="zero", participant_id="zero_0")]
+
+
 def test_GroupsMixin_remove_concession_group(mock_ClientProtocol_delete):
     client = GroupsMixin()
 
@@ -232,7 +260,7 @@ def test_GroupsMixin_get_concession_group_linked_funding_sources(
 
     result_list = list(result)
     mock_ClientProtocol_get_list_FundingSources.assert_called_once_with(
-        client.concession_group_funding_source_endpoint("group-1234")
+        client.concession_group_funding_source_endpoint("group-1234"), checkpoint=None
     )
 
     expected_list = ListResponse_GroupFundingSources.list
@@ -259,6 +287,35 @@ def test_GroupsMixin_get_concession_group_linked_funding_sources(
             assert result_list[i].updated_date is None
 
 
+def test_GroupsMixin_get_concession_group_linked_funding_sources_raw(
+    ListResponse_GroupFundingSources, mock_ClientProtocol_get_list_FundingSources
+):
+    client = GroupsMixin()
+
+    result_list = list(client.get_concession_group_linked_funding_sources("group-1234", raw=True))
+
+    assert result_list == ListResponse_GroupFundingSources.list
+
+
+def test_GroupsMixin_get_concession_group_linked_funding_sources_fields(
+    mock_ClientProtocol_get_list_FundingSources, expected_expiry
+):
+    client = GroupsMixin()
+
+    result_list = list(client.get_concession_group_linked_funding_sources("group-1234", fields=["id", "expiry_date"]))
+
+    assert result_list == [("0", expected_expiry), ("1", expected_expiry), ("2", None)]
+
+
+def test_GroupsMixin_get_concession_group_linked_funding_sources_unexpected_fields(mocker):
+    mocker.patch("littlepay.api.ClientProtocol._get_list", return_value=iter([dict(id="0", unexpected_field="value")]))
+    client = GroupsMixin()
+
+    result_list = list(client.get_concession_group_linked_funding_sources("group-1234"))
+
+    assert result_list == [GroupFundingSourceResponse(id="0")]
+
+
 def test_GroupsMixin_link_concession_group_funding_source(mock_ClientProtocol_post_link_concession_group_funding_source):
     client = GroupsMixin()
     result = client.link_concession_group_funding_source("group-1234", "funding-source-1234")
@@ -343,3 +400,82 @@ def test_GroupsMixin_update_concession_group_funding_source_expiry(
     )
 
     assert result == {"status_code": 204}
+
+
+def test_GroupsMixin_get_concession_groups_linked_funding_sources(
+    ListResponse_GroupFundingSources, mock_ClientProtocol_get_list_FundingSources
+):
+    client = GroupsMixin()
+
+    result = client.get_concession_groups_linked_funding_sources(["group1", "group2", "group1"])
+
+    assert list(result.keys()) == ["group1", "group2"]
+    assert mock_ClientProtocol_get_list_FundingSources.call_count == 2
+    for funding_sources in result.values():
+        assert len(funding_sources) == len(ListResponse_GroupFundingSources.list)
+        assert all([isinstance(fs, GroupFundingSourceResponse) for fs in funding_sources])
+
+
+def test_GroupsMixin_get_concession_groups_linked_funding_sources_error(mocker):
+    mocker.patch("littlepay.api.ClientProtocol._get_list", side_effect=HTTPError)
+    client = GroupsMixin()
+
+    result = client.get_concession_groups_linked_funding_sources(["group1"])
+
+    assert isinstance(result["group1"], HTTPError)
+
+
+def test_GroupsMixin_update_concession_group_funding_sources_expiry(
+    mock_ClientProtocol_put_update_concession_group_funding_source, mocker
+):
+    client = GroupsMixin()
+    mocker.patch.object(client, "_format_expiry", return_value="formatted expiry")
+    expiry = datetime.now()
+    updates = [("group1", "fs1", expiry), ("group2", "fs2", expiry)]
+
+    result = client.update_concession_group_funding_sources_expiry(updates)
+
+    assert list(result.keys()) == updates
+    assert all([r == {"status_code": 204} for r in result.values()])
+    assert mock_ClientProtocol_put_update_concession_group_funding_source.call_count == 2
+
+
+def test_GroupsMixin_update_concession_group_funding_sources_expiry_error(mocker):
+    mocker.patch("littlepay.api.ClientProtocol._put", side_effect=HTTPError)
+    client = GroupsMixin()
+    update = ("group1", "fs1", datetime.now())
+
+    result = client.update_concession_group_funding_sources_expiry([update])
+
+    assert isinstance(result[update], HTTPError)
+
+
+def test_GroupsMixin_unlink_concession_group_funding_sources(
+    mock_ClientProtocol_delete_unlink_concession_group_funding_source,
+):
+    client = GroupsMixin()
+
+    result = client.unlink_concession_group_funding_sources("group1", ["fs1", "fs2", "fs1"])
+
+    assert list(result.keys()) == ["fs1", "fs2"]
+    assert mock_ClientProtocol_delete_unlink_concession_group_funding_source.call_count == 2
+
+
+def test_GroupsMixin_unlink_concession_group_funding_sources_error(mocker):
+    mocker.patch("littlepay.api.ClientProtocol._delete", side_effect=HTTPError)
+    client = GroupsMixin()
+
+    result = client.unlink_concession_group_funding_sources("group1", ["fs1"])
+
+    assert isinstance(result["fs1"], HTTPError)
+
+
+def test_normalize_expiry_naive():
+    assert normalize_expiry(datetime(2024, 4, 2, 17, 5, 23, 123)) == datetime(2024, 4, 2, 17, 5, 23, tzinfo=timezone.utc)
+
+
+def test_normalize_expiry_aware_not_utc():
+    expiry = datetime(2024, 4, 2, 10, 5, 23, tzinfo=timezone(timedelta(hours=-7)))
+
+    assert normalize_expiry(expiry) == datetime(2024, 4, 2, 17, 5, 23, tzinfo=timezone.utc)
+    assert normalize_expiry(expiry).tzinfo == timezone.utc
@@ -2,6 +2,7 @@ from typing import Generator
 
 import pytest
 
+from littlepay.api import RawResponse
 from littlepay.api.products import ProductsMixin, ProductResponse
 
 PRODUCTS = [
@@ -112,6 +113,31 @@ def test_ProductsMixin_get_products(mock_ClientProtocol_get_list):
     assert all([isinstance(item, ProductResponse) for item in result_list])
 
 
+def test_ProductsMixin_get_products_raw(mock_ClientProtocol_get_list):
+    client = ProductsMixin()
+
+    result_list = list(client.get_products(raw=True))
+
+    assert result_list == PRODUCTS
+
+
+def test_ProductsMixin_get_products_fields(mock_ClientProtocol_get_list):
+    client = ProductsMixin()
+
+    result_list = list(client.get_products(fields=["id", "code"]))
+
+    assert result_list == [(item["id"], item["code"]) for item in PRODUCTS]
+
+
+def test_ProductsMixin_get_products_unexpected_fields(mocker):
+    mocker.patch("littlepay.api.ClientProtocol._get_list", return_value=iter([{**PRODUCTS[0], "unexpected_field": "value"}]))
+    client = ProductsMixin()
+
+    result_list = list(client.get_products())
+
+    assert result_list == [ProductResponse(**PRODUCTS[0])]
+
+
 def test_ProductsMixin_get_products_product_id(url, mock_ClientProtocol_get_Product):
     client = ProductsMixin()
 
@@ -122,6 +148,26 @@ def test_ProductsMixin_get_products_product_id(url, mock_ClientProtocol_get_Prod
         mock_ClientProtocol_get_Product.assert_called_once_with(f"{url}/products/1234", ProductResponse)
 
 
+def test_ProductsMixin_get_products_product_id_raw(url, mocker):
+    mock_get = mocker.patch("littlepay.api.ClientProtocol._get", return_value=RawResponse(PRODUCTS[0]))
+    client = ProductsMixin()
+
+    result_list = list(client.get_products("1234", raw=True))
+
+    mock_get.assert_called_once_with(f"{url}/products/1234", RawResponse)
+    assert result_list == [PRODUCTS[0]]
+
+
+def test_ProductsMixin_get_products_product_id_fields(url, mocker):
+    mock_get = mocker.patch("littlepay.api.ClientProtocol._get", return_value=RawResponse(PRODUCTS[0]))
+    client = ProductsMixin()
+
+    result_list = list(client.get_products("1234", fields=["id"]))
+
+    mock_get.assert_called_once_with(f"{url}/products/1234", RawResponse)
+    assert result_list == [(PRODUCTS[0]["id"],)]
+
+
 def test_ProductsMixin_link_concession_group_product(mock_ClientProtocol_post):
     client = ProductsMixin()
     result = client.link_concession_group_product("group-1234", "product-1234")
@@ -150,3 +196,23 @@ def test_ProductsMixin_unlink_concession_group_product(mock_ClientProtocol_delet
     endpoint = client.concession_group_products_endpoint("group-1234", "product-1234")
     mock_ClientProtocol_delete.assert_called_once_with(endpoint)
     assert result is True
+
+
+def test_ProductsMixin_get_concession_group_product_ids(mock_ClientProtocol_get_list, mock_ProductsMixin_get_products):
+    client = ProductsMixin()
+
+    result = list(client.get_concession_group_product_ids("1234"))
+
+    mock_ClientProtocol_get_list.assert_called_once_with(client.concession_group_products_endpoint("1234"))
+    mock_ProductsMixin_get_products.assert_not_called()
+    assert result == [p["id"] for p in PRODUCTS]
+
+
+def test_ProductsMixin_get_concession_groups_product_ids(mock_ClientProtocol_get_list):
+    client = ProductsMixin()
+
+    result = client.get_concession_groups_product_ids(["group1", "group2", "group1"])
+
+    assert list(result.keys()) == ["group1", "group2"]
+    assert mock_ClientProtocol_get_list.call_count == 2
+    assert result["group1"] == [p["id"] for p in PRODUCTS]
@@ -0,0 +1,143 @@
+from threading import Barrier, Event
+import time
+
+import pytest
+
+from littlepay.api import map_concurrent
+from littlepay.api.tokens import TokenProvider
+
+
+def make_token(expires_in: float | None, access_token: str = "token") -> dict:
+    token = {"access_token": access_token}
+    if expires_in is not None:
+        token["expires_at"] = time.time() + expires_in
+    return token
+
+
+@pytest.fixture
+def mock_fetch(mocker):
+    return mocker.Mock(side_effect=lambda: make_token(3600))
+
+
+def test_TokenProvider_get(mock_fetch):
+    provider = TokenProvider(mock_fetch)
+
+    token = provider.get()
+
+    assert provider.get() is token
+    mock_fetch.assert_called_once()
+
+
+def test_TokenProvider_get_no_expiry(mocker):
+    mock_fetch = mocker.Mock(return_value=make_token(None))
+    provider = TokenProvider(mock_fetch)
+
+    assert provider.get() is provider.get()
+    mock_fetch.assert_called_once()
+
+
+def test_TokenProvider_get_expiring(mocker):
+    mock_fetch = mocker.Mock(side_effect=[make_token(30, "first"), make_token(3600, "second")])
+    provider = TokenProvider(mock_fetch, refresh_margin=60)
+
+    assert provider.get()["access_token"] == "first"
+    # the first token expires within the margin, so a new one is requested
+    assert provider.get()["access_token"] == "second"
+    assert provider.get()["access_token"] == "second"
+    assert mock_fetch.call_count == 2
+
+
+def test_TokenProvider_get_error(mocker):
+    mock_fetch = mocker.Mock(side_effect=[Exception("failed"), make_token(3600)])
+    provider = TokenProvider(mock_fetch)
+
+    with pytest.raises(Exception, match="failed"):
+        provider.get()
+
+    # a failed request isn't remembered, the next call tries again
+    assert provider.get()["access_token"] == "token"
+
+
+def test_TokenProvider_get_single_flight():
+    barrier = Barrier(4, timeout=5)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return make_token(3600)
+
+    provider = TokenProvider(fetch)
+
+    def get(_):
+        barrier.wait()
+        return provider.get()
+
+    tokens = [token for _, token in map_concurrent(get, range(4), max_workers=4)]
+
+    assert len(calls) == 1
+    assert all(token is tokens[0] for token in tokens)
+
+
+def test_TokenProvider_get_background_refresh(mocker):
+    fetched = Event()
+
+    def fetch():
+        if mock_fetch.call_count > 1:
+            fetched.set()
+        return make_token(120 if mock_fetch.call_count == 1 else 3600, f"token{mock_fetch.call_count}")
+
+    mock_fetch = mocker.Mock(side_effect=fetch)
+    provider = TokenProvider(mock_fetch, refresh_margin=60, background_refresh=300)
+
+    assert provider.get()["access_token"] == "token1"
+    # still valid, handed out while a new token is requested in the background
+    assert provider.get()["access_token"] == "token1"
+    assert fetched.wait(timeout=5)
+
+    for _ in range(100):
+        if provider.get()["access_token"] == "token2":
+            break
+        time.sleep(0.01)
+
+    assert provider.get()["access_token"] == "token2"
+    assert mock_fetch.call_count == 2
+
+
+def wait_for_background_refresh(provider: TokenProvider):
+    for _ in range(500):
+        if provider._pending is None:
+            return
+        time.sleep(0.01)
+
+
+def test_TokenProvider_get_background_refresh_failed(mocker):
+    mock_fetch = mocker.Mock(side_effect=[make_token(120, "token1"), Exception("failed"), make_token(3600, "token2")])
+    provider = TokenProvider(mock_fetch, refresh_margin=60, background_refresh=300, retry_after=60)
+
+    assert provider.get()["access_token"] == "token1"
+    # starts a background refresh, which fails
+    assert provider.get()["access_token"] == "token1"
+    wait_for_background_refresh(provider)
+
+    # the failed refresh isn't retried in the background until retry_after has passed
+    for _ in range(10):
+        assert provider.get()["access_token"] == "token1"
+    assert mock_fetch.call_count == 2
+
+    mocker.patch("littlepay.api.tokens.time.monotonic", return_value=time.monotonic() + 61)
+    provider.get()
+    wait_for_background_refresh(provider)
+
+    assert mock_fetch.call_count == 3
+    assert provider.get()["access_token"] == "token2"
+
+
+def test_TokenProvider_clear(mock_fetch):
+    provider = TokenProvider(mock_fetch)
+    token = provider.get()
+
+    provider.clear()
+
+    assert provider.get() is not token
+    assert mock_fetch.call_count == 2
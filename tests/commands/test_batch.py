@@ -0,0 +1,150 @@
+from argparse import Namespace
+from datetime import datetime, timezone
+import io
+from pathlib import Path
+
+import pytest
+from requests import HTTPError
+
+import littlepay.api.client
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+from littlepay.commands.batch import batch
+
+
+@pytest.fixture(autouse=True)
+def mock_config(mocker):
+    mocker.patch("littlepay.commands.batch.Config")
+
+
+@pytest.fixture(autouse=True)
+def mock_acquire_token(mock_acquire_token):
+    return mock_acquire_token("littlepay.commands.batch")
+
+
+@pytest.fixture
+def mock_client(mocker):
+    client = mocker.Mock()
+    mocker.patch("littlepay.commands.batch.Client.from_active_config", return_value=client)
+    return client
+
+
+@pytest.fixture
+def mock_run(mocker):
+    return mocker.patch("littlepay.main.run", return_value=RESULT_SUCCESS)
+
+
+@pytest.fixture
+def batch_file(tmp_path) -> Path:
+    def _batch_file(*lines):
+        path = tmp_path / "batch.txt"
+        path.write_text("\n".join(lines))
+        return Namespace(file=str(path), workers=2)
+
+    return _batch_file
+
+
+def test_batch_commands(mock_acquire_token, mock_client, mock_run, batch_file, capfd):
+    args = batch_file("# a comment", "groups -f 'a label' link product_id", "", "products --csv")
+    res = batch(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_acquire_token.assert_called_once()
+    assert [call.args[0] for call in mock_run.call_args_list] == [
+        ["groups", "-f", "a label", "link", "product_id"],
+        ["products", "--csv"],
+    ]
+    assert "Running batch (2)" in capture.out
+    assert "Batch complete (2 succeeded, 0 failed)" in capture.out
+
+
+def test_batch_commands_reuse_clients(mocker, mock_client, batch_file):
+    reused = []
+    mocker.patch("littlepay.main.run", side_effect=lambda argv: reused.append(littlepay.api.client._warm_clients))
+
+    batch(batch_file("groups", "products"))
+
+    assert reused[0] is not None
+    assert reused[0] is reused[1]
+    assert littlepay.api.client._warm_clients is None
+
+
+def test_batch_commands_failure(mocker, mock_client, batch_file, capfd):
+    mocker.patch("littlepay.main.run", side_effect=[RESULT_FAILURE, SystemExit(2), RESULT_SUCCESS])
+
+    res = batch(batch_file("groups unlink", "groups --invalid", "serve", "groups 'unclosed", "products"))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "line 3: serve is not supported in a batch" in capture.out
+    assert "line 4: No closing quotation" in capture.out
+    assert "Batch complete (1 succeeded, 4 failed)" in capture.out
+
+
+def test_batch_operations(mock_client, batch_file, capfd):
+    args = batch_file(
+        '{"op": "create_group", "label": "new group"}',
+        '{"op": "link_product", "group_id": "g1", "product_id": "p1"}',
+        '{"op": "unlink_product", "group_id": "g1", "product_id": "p2"}',
+        '{"op": "link_funding_source", "group_id": "g2", "funding_source_id": "fs1", "expiry": "2024-04-03T00:05:23Z"}',
+        '{"op": "unlink_funding_source", "group_id": "g2", "funding_source_id": "fs2"}',
+        '{"op": "update_expiry", "group_id": "g3", "funding_source_id": "fs3", "expiry": "2024-04-03"}',
+    )
+    res = batch(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_client.create_concession_group.assert_called_once_with("new group")
+    mock_client.link_concession_group_product.assert_called_once_with("g1", "p1")
+    mock_client.unlink_concession_group_product.assert_called_once_with("g1", "p2")
+    mock_client.link_concession_group_funding_source.assert_called_once_with(
+        "g2", "fs1", datetime(2024, 4, 3, 0, 5, 23, tzinfo=timezone.utc)
+    )
+    mock_client.unlink_concession_group_funding_source.assert_called_once_with("g2", "fs2")
+    mock_client.update_concession_group_funding_source_expiry.assert_called_once_with("g3", "fs3", datetime(2024, 4, 3))
+
+    # results are printed in the order of the file
+    lines = [line for line in capture.out.splitlines() if line.startswith("✅")]
+    assert lines[0] == "✅ line 1: create_group"
+    assert lines[-1] == "✅ line 6: update_expiry"
+    assert "Batch complete (6 succeeded, 0 failed)" in capture.out
+
+
+def test_batch_operations_failure(mock_client, batch_file, capfd):
+    mock_client.link_concession_group_product.side_effect = HTTPError("link failed")
+
+    args = batch_file(
+        "not json {",
+        '{"op": "link_product", "group_id": "g1", "product_id": "p1"}',
+        '{"op": "unknown"}',
+        "[1, 2]",
+        '{"op": "unlink_product", "group_id": "g1"}',
+        '{"op": "create_group", "label": "new group"}',
+    )
+    res = batch(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "line 2: link_product: link failed" in capture.out
+    assert "line 3: Unsupported op" in capture.out
+    assert "line 5: unlink_product: missing 'product_id'" in capture.out
+    assert "Batch complete (1 succeeded, 5 failed)" in capture.out
+
+
+def test_batch_mixed_in_order(mocker, mock_client, batch_file):
+    calls = []
+    mocker.patch("littlepay.main.run", side_effect=lambda argv: calls.append(argv[0]) or RESULT_SUCCESS)
+    mock_client.create_concession_group.side_effect = lambda label: calls.append(label)
+
+    batch(batch_file("groups", '{"op": "create_group", "label": "one"}', "products"))
+
+    assert calls == ["groups", "one", "products"]
+
+
+def test_batch_stdin(mocker, mock_client, mock_run):
+    mocker.patch("sys.stdin", io.StringIO("groups\nproducts\n"))
+
+    res = batch(Namespace(file="-"))
+
+    assert res == RESULT_SUCCESS
+    assert mock_run.call_count == 2
@@ -0,0 +1,162 @@
+from argparse import Namespace
+import io
+from pathlib import Path
+
+import pytest
+from requests import HTTPError
+
+from littlepay.api.funding_sources import FundingSourceGroupResponse
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+from littlepay.commands.funding_sources import funding_sources
+
+FUNDING_SOURCE_GROUPS = {
+    "fs0": [
+        FundingSourceGroupResponse(id="fs0", group_id="group0", label="zero", expiry_date="2024-04-03T00:05:23Z"),
+        FundingSourceGroupResponse(id="fs0", group_id="group1", label="one, two"),
+    ],
+    "fs1": [],
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_config(mocker):
+    mocker.patch("littlepay.commands.funding_sources.Config")
+
+
+@pytest.fixture(autouse=True)
+def mock_acquire_token(mock_acquire_token):
+    return mock_acquire_token("littlepay.commands.funding_sources")
+
+
+@pytest.fixture
+def mock_client(mocker):
+    client = mocker.Mock()
+    mocker.patch("littlepay.commands.funding_sources.Client.from_active_config", return_value=client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def mock_get_groups(mock_client):
+    mock_client.get_funding_sources_linked_concession_groups.side_effect = lambda ids, max_workers: {
+        id: FUNDING_SOURCE_GROUPS[id] for id in ids
+    }
+
+
+@pytest.fixture
+def ids_file(tmp_path) -> Path:
+    path = tmp_path / "ids.txt"
+    path.write_text("fs0\n\nfs1\n  fs0  \n")
+    return path
+
+
+def test_funding_sources_default(mock_acquire_token, mock_client):
+    res = funding_sources()
+
+    assert res == RESULT_SUCCESS
+    mock_acquire_token.assert_called_once()
+    mock_client.get_funding_sources_linked_concession_groups.assert_not_called()
+
+
+def test_funding_sources_groups(mock_client, ids_file, capfd):
+    args = Namespace(funding_source_command="groups", file=str(ids_file), tokens=False, workers=2)
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_client.get_funding_sources_linked_concession_groups.assert_called_once()
+    assert list(mock_client.get_funding_sources_linked_concession_groups.call_args.args[0]) == ["fs0", "fs1"]
+    assert mock_client.get_funding_sources_linked_concession_groups.call_args.args[1] == 2
+
+    assert "Funding sources (2)" in capture.out
+    assert "Linked groups (2)" in capture.out
+    assert "Linked groups (0)" in capture.out
+    for group in FUNDING_SOURCE_GROUPS["fs0"]:
+        assert str(group) in capture.out
+
+
+def test_funding_sources_groups_csv(ids_file, capfd):
+    args = Namespace(funding_source_command="groups", file=str(ids_file), csv=True)
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert capture.out.splitlines() == [
+        "funding_source_id,group_id,label,expiry_date",
+        "fs0,group0,zero,2024-04-03T00:05:23+00:00",
+        'fs0,group1,"one, two",',
+        "fs1,,,",
+    ]
+
+
+def test_funding_sources_groups_stdin(mocker, capfd):
+    mocker.patch("sys.stdin", io.StringIO("fs1\n"))
+
+    args = Namespace(funding_source_command="groups", file="-", csv=True)
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert "fs1,,," in capture.out
+
+
+def test_funding_sources_groups_tokens(mocker, mock_client, tmp_path, capfd):
+    path = tmp_path / "tokens.txt"
+    path.write_text("token0\ntoken1\ntoken0\n")
+    mock_client.get_funding_sources_by_token.side_effect = lambda tokens, max_workers: {
+        token: mocker.Mock(id=token.replace("token", "fs")) for token in tokens
+    }
+
+    args = Namespace(funding_source_command="groups", file=str(path), tokens=True, csv=True)
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_client.get_funding_sources_by_token.assert_called_once()
+    assert list(mock_client.get_funding_sources_by_token.call_args.args[0]) == ["token0", "token1"]
+    assert capture.out.splitlines() == [
+        "card_token,funding_source_id,group_id,label,expiry_date",
+        "token0,fs0,group0,zero,2024-04-03T00:05:23+00:00",
+        'token0,fs0,group1,"one, two",',
+        "token1,fs1,,,",
+    ]
+
+
+def test_funding_sources_groups_tokens_HTTPError(mock_client, tmp_path, capfd):
+    path = tmp_path / "tokens.txt"
+    path.write_text("token0\n")
+    mock_client.get_funding_sources_by_token.return_value = {"token0": HTTPError("the error")}
+
+    args = Namespace(funding_source_command="groups", file=str(path), tokens=True)
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "Error: token0: the error" in capture.out
+    assert "Funding sources (0)" in capture.out
+
+
+def test_funding_sources_groups_tokens_no_funding_source(mock_client, tmp_path, capfd):
+    path = tmp_path / "tokens.txt"
+    path.write_text("token0\n")
+    mock_client.get_funding_sources_by_token.return_value = {"token0": None}
+
+    args = Namespace(funding_source_command="groups", file=str(path), tokens=True)
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "Error: token0: no funding source" in capture.out
+
+
+def test_funding_sources_groups_HTTPError(mock_client, ids_file, capfd):
+    mock_client.get_funding_sources_linked_concession_groups.side_effect = lambda ids, max_workers: {
+        id: HTTPError() for id in ids
+    }
+
+    args = Namespace(funding_source_command="groups", file=str(ids_file))
+    res = funding_sources(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "Error: fs0" in capture.out
+    assert "Error: fs1" in capture.out
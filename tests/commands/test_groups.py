@@ -1,4 +1,5 @@
 from argparse import Namespace
+from datetime import datetime, timezone
 
 import pytest
 from requests import HTTPError
@@ -6,6 +7,7 @@ from requests import HTTPError
 from littlepay.api.groups import GroupResponse, GroupFundingSourceResponse
 from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
 from littlepay.commands.groups import groups
+from littlepay.sync import EVENT_ADDED, FundingSourceEvent
 
 from tests.commands.test_products import PRODUCT_RESPONSES
 
@@ -42,6 +44,16 @@ def mock_config(mocker):
     mocker.patch("littlepay.commands.groups.Config")
 
 
+@pytest.fixture(autouse=True)
+def mock_snapshot(mock_snapshot):
+    return mock_snapshot("littlepay.commands.groups")
+
+
+@pytest.fixture(autouse=True)
+def mock_acquire_token(mock_acquire_token):
+    return mock_acquire_token("littlepay.commands.groups")
+
+
 @pytest.fixture
 def mock_client(mocker):
     client = mocker.Mock()
@@ -63,27 +75,55 @@ def mock_get_groups(mock_client):
     mock_client.get_concession_groups.return_value = (r for r in GROUP_RESPONSES)
 
 
-def test_groups_default(mock_client, capfd):
+def test_groups_default(mock_acquire_token, mock_client, capfd):
     res = groups()
     capture = capfd.readouterr()
 
     assert res == RESULT_SUCCESS
 
-    mock_client.oauth.ensure_active_token.assert_called_once()
+    mock_acquire_token.assert_called_once()
 
     assert "Matching groups (3)" in capture.out
     for response in GROUP_RESPONSES:
         assert str(response) in capture.out
 
 
-def test_groups_csv(mock_client, capfd):
+def test_groups_refresh(mock_snapshot):
+    args = Namespace(refresh=True)
+    res = groups(args)
+
+    assert res == RESULT_SUCCESS
+    assert mock_snapshot.load.call_args.args[0] == "concession_groups"
+    assert mock_snapshot.load.call_args.args[3] is True
+
+
+def test_groups_snapshot(mock_snapshot):
+    res = groups(Namespace(group_terms=["zero"]))
+
+    assert res == RESULT_SUCCESS
+    assert mock_snapshot.load.call_args.args[3] is False
+
+
+@pytest.mark.parametrize(
+    "args", [Namespace(group_command="link", product_id="p1"), Namespace(group_command="unlink", product="p1")]
+)
+def test_groups_mutating_refresh(mock_snapshot, mock_client, args):
+    # groups to change are chosen from a live listing, not a snapshot that may be stale
+    res = groups(args)
+
+    assert res == RESULT_SUCCESS
+    assert mock_snapshot.load.call_args.args[0] == "concession_groups"
+    assert mock_snapshot.load.call_args.args[3] is True
+
+
+def test_groups_csv(mock_acquire_token, mock_client, capfd):
     args = Namespace(csv=True)
     res = groups(args)
     capture = capfd.readouterr()
 
     assert res == RESULT_SUCCESS
 
-    mock_client.oauth.ensure_active_token.assert_called_once()
+    mock_acquire_token.assert_called_once()
 
     assert "Matching groups (3)" not in capture.out
 
@@ -128,6 +168,16 @@ def test_groups_group_terms_multiple(capfd):
             assert str(response) not in capture.out
 
 
+@pytest.mark.parametrize(("match", "expected"), [("exact", 1), ("prefix", 3), ("substring", 3)])
+def test_groups_group_terms_match(match, expected, capfd):
+    args = Namespace(group_terms=["id0", "i"], match=match)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert f"Matching groups ({expected})" in capture.out
+
+
 def test_groups_group_command__create(mock_client, capfd):
     args = Namespace(group_command="create", group_label="the-label")
     res = groups(args)
@@ -168,6 +218,22 @@ def test_groups_group_command__funding_sources(mock_client, capfd):
     assert "  💵 Linked funding sources (3)" in capture.out
 
 
+def test_groups_group_command__funding_sources_checkpoint(mocker, mock_client):
+    from littlepay.commands.groups import Checkpoint
+
+    mock_client.get_concession_group_linked_funding_sources.return_value = (r for r in GROUP_FUND_RESPONSES)
+    clear_spy = mocker.spy(Checkpoint, "clear")
+
+    groups(Namespace(group_command="funding_sources", group_terms=["id0"], match="exact"))
+    groups(Namespace(group_command="funding_sources", group_terms=["id0"], match="exact", resume=True))
+
+    # the listing saves its progress in a checkpoint, cleared first unless resuming
+    clear_spy.assert_called_once()
+    checkpoint = mock_client.get_concession_group_linked_funding_sources.call_args.args[1]
+    assert isinstance(checkpoint, Checkpoint)
+    assert checkpoint.job == "groups funding_sources id0"
+
+
 def test_groups_group_command__funding_sources_HTTPError(mock_client, capfd):
     mock_client.get_concession_group_linked_funding_sources.side_effect = HTTPError
 
@@ -180,6 +246,45 @@ def test_groups_group_command__funding_sources_HTTPError(mock_client, capfd):
     assert "Error:" in capture.out
 
 
+def test_groups_group_command__funding_sources_sync(mocker, capfd):
+    event = FundingSourceEvent(EVENT_ADDED, "id0", "funding_source0")
+    mock_sync = mocker.patch("littlepay.commands.groups.sync_group_funding_sources", return_value=(e for e in [event]))
+
+    args = Namespace(group_command="funding_sources", sync=True, group_terms=["id0"])
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_sync.assert_called_once()
+    assert "  🔄 Changed funding sources (1)" in capture.out
+    assert str(event) in capture.out
+
+
+def test_groups_group_command__funding_sources_sync_csv(mocker, capfd):
+    event = FundingSourceEvent(EVENT_ADDED, "id0", "funding_source0")
+    mocker.patch("littlepay.commands.groups.sync_group_funding_sources", return_value=(e for e in [event]))
+
+    args = Namespace(group_command="funding_sources", sync=True, group_terms=["id0"], csv=True)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert FundingSourceEvent.csv_header() in capture.out
+    assert GroupResponse.csv_header() not in capture.out
+    assert event.csv() in capture.out
+
+
+def test_groups_group_command__funding_sources_sync_HTTPError(mocker, capfd):
+    mocker.patch("littlepay.commands.groups.sync_group_funding_sources", side_effect=HTTPError)
+
+    args = Namespace(group_command="funding_sources", sync=True)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "Error:" in capture.out
+
+
 def test_groups_group_command__link(mock_client, capfd):
     args = Namespace(group_command="link", product_id="1234")
     res = groups(args)
@@ -193,6 +298,22 @@ def test_groups_group_command__link(mock_client, capfd):
     assert "Linked" in capture.out
 
 
+def test_groups_group_command__link_resume(mock_client, capfd):
+    from littlepay.commands import _item_key, _items_digest
+    from littlepay.commands.groups import Checkpoint, Config
+
+    digest = _items_digest(GROUP_RESPONSES, _item_key)
+    Checkpoint.from_active_config(Config(), "groups link 1234").save(offset=2, total=3, digest=digest)
+
+    args = Namespace(group_command="link", product_id="1234", resume=True)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_client.link_concession_group_product.assert_called_once_with("id2", "1234")
+    assert "Resuming after 2 of 3" in capture.out
+
+
 def test_groups_group_command__link_HTTPError(mock_client, capfd):
     mock_client.link_concession_group_product.side_effect = HTTPError
 
@@ -206,6 +327,24 @@ def test_groups_group_command__link_HTTPError(mock_client, capfd):
     assert "Linked" not in capture.out
 
 
+def test_groups_group_command__link_HTTPError_resume(mock_client, capfd):
+    # a transient error linking one group
+    mock_client.link_concession_group_product.side_effect = [{}, HTTPError("503"), {}]
+
+    res = groups(Namespace(group_command="link", product_id="1234"))
+
+    assert res == RESULT_FAILURE
+    assert "--resume" in capfd.readouterr().out
+
+    mock_client.link_concession_group_product.reset_mock(side_effect=True)
+    mock_client.get_concession_groups.return_value = (r for r in GROUP_RESPONSES)
+
+    res = groups(Namespace(group_command="link", product_id="1234", resume=True))
+
+    assert res == RESULT_SUCCESS
+    mock_client.link_concession_group_product.assert_called_once_with("id1", "1234")
+
+
 def test_groups_group_command__products(mock_client, capfd):
     # fake a generator for a single item
     mock_client.get_concession_group_products.return_value = (p for p in PRODUCT_RESPONSES if PRODUCT_RESPONSES.index(p) == 0)
@@ -446,3 +585,191 @@ def test_groups_group_command__migrate_HTTPError(mock_client, capfd, mock_input)
     assert "Migrating group" in capture.out
     assert "Error" in capture.out
     assert "Matching groups (3)" in capture.out
+
+
+@pytest.fixture
+def expiry_file(tmp_path):
+    def _expiry_file(*rows):
+        path = tmp_path / "expiry.csv"
+        path.write_text("\n".join(rows))
+        return str(path)
+
+    return _expiry_file
+
+
+@pytest.fixture
+def mock_expiry_client(mock_client):
+    mock_client.get_concession_groups_linked_funding_sources.side_effect = lambda group_ids, max_workers: {
+        group_id: GROUP_FUND_RESPONSES for group_id in group_ids
+    }
+    mock_client.update_concession_group_funding_sources_expiry.side_effect = lambda updates, max_workers: {
+        update: {"status_code": 204} for update in updates
+    }
+    return mock_client
+
+
+def test_groups_group_command__expiry(mock_expiry_client, expiry_file, capfd):
+    path = expiry_file(
+        "group_id,funding_source_id,expiry",
+        # unchanged, the same instant in another time zone
+        "id0,group_funding_id0,2024-04-02T17:05:23-07:00",
+        "id0,group_funding_id1,2025-04-06T00:05:23Z",
+        "id1,group_funding_id2,2025-04-09",
+        # not a matching group
+        "other,group_funding_id0,2025-04-09",
+    )
+    args = Namespace(group_command="expiry", file=path, workers=2)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    group_ids = mock_expiry_client.get_concession_groups_linked_funding_sources.call_args.args[0]
+    assert group_ids == ["id0", "id0", "id1"]
+
+    updates = list(mock_expiry_client.update_concession_group_funding_sources_expiry.call_args.args[0])
+    assert [update[:2] for update in updates] == [("id0", "group_funding_id1"), ("id1", "group_funding_id2")]
+    assert mock_expiry_client.update_concession_group_funding_sources_expiry.call_args.args[1] == 2
+
+    assert "Updating funding source expiry (3)" in capture.out
+    assert "Updated: 2, unchanged: 1, not matched: 1, failed: 0" in capture.out
+
+
+def test_groups_group_command__expiry_group_terms(mock_expiry_client, expiry_file, capfd):
+    path = expiry_file("id0,group_funding_id1,2025-04-06", "id1,group_funding_id2,2025-04-09")
+    args = Namespace(group_command="expiry", file=path, group_terms=["id1"])
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    updates = list(mock_expiry_client.update_concession_group_funding_sources_expiry.call_args.args[0])
+    assert [update[:2] for update in updates] == [("id1", "group_funding_id2")]
+    assert "Updated: 1, unchanged: 0, not matched: 1, failed: 0" in capture.out
+
+
+def test_groups_group_command__expiry_errors(mock_expiry_client, expiry_file, capfd):
+    mock_expiry_client.get_concession_groups_linked_funding_sources.side_effect = lambda group_ids, max_workers: {
+        group_id: HTTPError("lookup failed") if group_id == "id2" else GROUP_FUND_RESPONSES for group_id in group_ids
+    }
+    mock_expiry_client.update_concession_group_funding_sources_expiry.side_effect = lambda updates, max_workers: {
+        update: HTTPError("update failed") for update in updates
+    }
+    path = expiry_file(
+        "id0,group_funding_id0",
+        "id0,group_funding_id0,not a date",
+        "id0,group_funding_id0,",
+        "id0,not_linked,2025-04-06",
+        "id1,group_funding_id1,2025-04-06",
+        "id2,group_funding_id1,2025-04-06",
+    )
+    args = Namespace(group_command="expiry", file=path)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "row 1: not enough values to unpack" in capture.out
+    assert "row 2: Invalid isoformat string" in capture.out
+    assert "row 3: missing expiry" in capture.out
+    assert "id0: funding source not_linked is not linked" in capture.out
+    assert "id1: group_funding_id1: update failed" in capture.out
+    assert "id2: lookup failed" in capture.out
+    assert "Updated: 0, unchanged: 0, not matched: 0, failed: 3" in capture.out
+
+
+@pytest.fixture
+def mock_sweep_client(mock_client):
+    funding_sources = GROUP_FUND_RESPONSES + [GroupFundingSourceResponse(id="not_expired", expiry_date="2099-01-01T00:00:00Z")]
+    mock_client.get_concession_group_linked_funding_sources.side_effect = lambda group_id: (fs for fs in funding_sources)
+    mock_client.unlink_concession_group_funding_sources.side_effect = lambda group_id, ids, max_workers: {
+        id: True for id in ids
+    }
+    return mock_client
+
+
+@pytest.fixture
+def sweep_checkpoint():
+    from littlepay.commands.groups import Checkpoint, Config
+
+    return Checkpoint.from_active_config(Config(), "groups sweep")
+
+
+def test_groups_group_command__sweep(mock_sweep_client, sweep_checkpoint, capfd):
+    args = Namespace(group_command="sweep", group_terms=["id0", "id1"], match="exact")
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert mock_sweep_client.unlink_concession_group_funding_sources.call_count == 2
+    for call in mock_sweep_client.unlink_concession_group_funding_sources.call_args_list:
+        assert call.args[1] == [fs.id for fs in GROUP_FUND_RESPONSES]
+    assert "Sweeping links expired before" in capture.out
+    assert "id0: group_funding_id0 expired 2024-04-03T00:05:23+00:00" in capture.out
+    assert "Unlinked: 6, failed: 0" in capture.out
+    # the completed sweep doesn't leave a checkpoint
+    assert sweep_checkpoint.load() == {}
+
+
+def test_groups_group_command__sweep_grace(mocker, mock_sweep_client, capfd):
+    now = datetime(2024, 4, 10, tzinfo=timezone.utc)
+    mocker.patch("littlepay.commands.groups.datetime", mocker.Mock(now=mocker.Mock(return_value=now)))
+
+    args = Namespace(group_command="sweep", group_terms=["id0"], match="exact", grace=5)
+    res = groups(args)
+
+    assert res == RESULT_SUCCESS
+    # only expired more than 5 days before now
+    mock_sweep_client.unlink_concession_group_funding_sources.assert_called_once_with("id0", ["group_funding_id0"], 8)
+
+
+def test_groups_group_command__sweep_dry_run(mock_sweep_client, sweep_checkpoint, capfd):
+    args = Namespace(group_command="sweep", dry_run=True)
+    res = groups(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_sweep_client.unlink_concession_group_funding_sources.assert_not_called()
+    assert "Dry run: sweeping links" in capture.out
+    assert "Expired: 9, failed: 0" in capture.out
+    assert sweep_checkpoint.load() == {}
+
+
+def test_groups_group_command__sweep_errors_resume(mock_sweep_client, sweep_checkpoint, capfd):
+    def _unlink(group_id, ids, max_workers):
+        return {id: HTTPError("unlink failed") if group_id == "id1" else True for id in ids}
+
+    mock_sweep_client.unlink_concession_group_funding_sources.side_effect = _unlink
+
+    res = groups(Namespace(group_command="sweep"))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "id1: group_funding_id0: unlink failed" in capture.out
+    assert "Unlinked: 6, failed: 3" in capture.out
+    assert "--resume" in capture.out
+    assert sweep_checkpoint.load() == {"groups": ["id0", "id2"], "unlinked": 6}
+
+    mock_sweep_client.unlink_concession_group_funding_sources.reset_mock(side_effect=True)
+    mock_sweep_client.unlink_concession_group_funding_sources.side_effect = lambda group_id, ids, max_workers: {
+        id: True for id in ids
+    }
+    mock_sweep_client.get_concession_groups.return_value = (r for r in GROUP_RESPONSES)
+
+    res = groups(Namespace(group_command="sweep", resume=True))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_sweep_client.unlink_concession_group_funding_sources.assert_called_once()
+    assert mock_sweep_client.unlink_concession_group_funding_sources.call_args.args[0] == "id1"
+    assert "(1 groups, resuming)" in capture.out
+    assert "Unlinked: 9, failed: 0" in capture.out
+    assert sweep_checkpoint.load() == {}
+
+
+def test_groups_group_command__sweep_lookup_error(mock_sweep_client, capfd):
+    mock_sweep_client.get_concession_group_linked_funding_sources.side_effect = HTTPError("lookup failed")
+
+    res = groups(Namespace(group_command="sweep", group_terms=["id0"]))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "id0: lookup failed" in capture.out
+    mock_sweep_client.unlink_concession_group_funding_sources.assert_not_called()
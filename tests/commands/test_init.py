@@ -0,0 +1,167 @@
+import pytest
+
+from littlepay.checkpoint import Checkpoint
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS, _item_key, _items_digest, acquire_token, resumable
+from littlepay.config import Config
+
+
+@pytest.fixture
+def config(mocker):
+    return mocker.Mock(active_env_name="qa", active_participant_id="participant123")
+
+
+@pytest.fixture
+def checkpoint(config) -> Checkpoint:
+    return Checkpoint.from_active_config(config, "job")
+
+
+def processor(fail=(), interrupt=None):
+    """A process function for resumable, recording the processed items, failing some and raising at interrupt."""
+    processed = []
+
+    def _process(item):
+        if item == interrupt:
+            raise RuntimeError("interrupted")
+        processed.append(item)
+        return RESULT_FAILURE if item in fail else RESULT_SUCCESS
+
+    _process.processed = processed
+    return _process
+
+
+def test_resumable(config, checkpoint: Checkpoint):
+    digest = _items_digest(["a", "b", "c"], _item_key)
+    saved = []
+
+    def process(item):
+        saved.append((item, checkpoint.load()))
+        return RESULT_SUCCESS
+
+    assert resumable(config, "job", ["a", "b", "c"], process) == RESULT_SUCCESS
+
+    assert saved == [
+        ("a", {}),
+        ("b", {"offset": 1, "failed": [], "total": 3, "digest": digest}),
+        ("c", {"offset": 2, "failed": [], "total": 3, "digest": digest}),
+    ]
+    # a completed run doesn't leave a checkpoint
+    assert checkpoint.load() == {}
+
+
+def test_resumable_interrupted(config, checkpoint: Checkpoint, capfd):
+    with pytest.raises(RuntimeError):
+        resumable(config, "job", ["a", "b", "c"], processor(interrupt="b"))
+
+    assert checkpoint.load() == {
+        "offset": 1,
+        "failed": [],
+        "total": 3,
+        "digest": _items_digest(["a", "b", "c"], _item_key),
+    }
+
+    process = processor()
+    assert resumable(config, "job", ["a", "b", "c"], process, resume=True) == RESULT_SUCCESS
+    assert process.processed == ["b", "c"]
+    assert "Resuming after 1 of 3" in capfd.readouterr().out
+    assert checkpoint.load() == {}
+
+
+def test_resumable_failed(config, checkpoint: Checkpoint, capfd):
+    # e.g. a transient server error, caught and reported by the command
+    assert resumable(config, "job", ["a", "b", "c"], processor(fail=["b"])) == RESULT_FAILURE
+
+    assert "Run again with --resume to retry the 1 failed" in capfd.readouterr().out
+    assert checkpoint.load()["offset"] == 3
+    assert checkpoint.load()["failed"] == ["b"]
+
+    process = processor()
+    assert resumable(config, "job", ["a", "b", "c"], process, resume=True) == RESULT_SUCCESS
+    assert process.processed == ["b"]
+    assert "retrying 1 failed" in capfd.readouterr().out
+    assert checkpoint.load() == {}
+
+
+def test_resumable_failed_interrupted(config, checkpoint: Checkpoint):
+    with pytest.raises(RuntimeError):
+        resumable(config, "job", ["a", "b", "c", "d"], processor(fail=["a"], interrupt="c"))
+
+    # the failed item is retried before the items not processed yet, and fails again
+    process = processor(fail=["a"])
+    assert resumable(config, "job", ["a", "b", "c", "d"], process, resume=True) == RESULT_FAILURE
+    assert process.processed == ["a", "c", "d"]
+    assert checkpoint.load()["failed"] == ["a"]
+
+
+def test_resumable_no_resume(config, checkpoint: Checkpoint):
+    checkpoint.save(offset=1, failed=["a"], total=3, digest=_items_digest(["a", "b", "c"], _item_key))
+    process = processor()
+
+    assert resumable(config, "job", ["a", "b", "c"], process) == RESULT_SUCCESS
+    assert process.processed == ["a", "b", "c"]
+
+
+def test_resumable_items_changed(config, checkpoint: Checkpoint, capfd):
+    checkpoint.save(offset=1, failed=["a"], total=3, digest=_items_digest(["a", "b", "c"], _item_key))
+    process = processor()
+
+    resumable(config, "job", ["a", "b"], process, resume=True)
+
+    assert process.processed == ["a", "b"]
+    assert "starting over" in capfd.readouterr().out
+
+
+@pytest.mark.parametrize("items", [["b", "a", "c"], ["a", "x", "c"]], ids=["reordered", "replaced"])
+def test_resumable_items_changed_same_length(config, checkpoint: Checkpoint, capfd, items):
+    checkpoint.save(offset=1, total=3, digest=_items_digest(["a", "b", "c"], _item_key))
+    process = processor()
+
+    resumable(config, "job", items, process, resume=True)
+
+    assert process.processed == items
+    assert "starting over" in capfd.readouterr().out
+
+
+def test_resumable_key(config, checkpoint: Checkpoint, mocker, capfd):
+    items = [mocker.Mock(id="1"), mocker.Mock(id="2")]
+    checkpoint.save(offset=1, total=2, digest=_items_digest(["1", "2"], str))
+    process = processor()
+
+    resumable(config, "job", items, process, resume=True)
+
+    assert process.processed == items[1:]
+    assert "Resuming after 1 of 2" in capfd.readouterr().out
+
+    checkpoint.save(offset=1, total=2, digest=_items_digest(["1", "2"], str))
+    process = processor()
+
+    resumable(config, "job", items, process, resume=True, key=lambda item: item.id.zfill(2))
+
+    assert process.processed == items
+
+
+@pytest.fixture
+def active_config(token) -> Config:
+    config = Config()
+    config.active = {"env": "qa", "participant": "participant123"}
+    config.participants = {"participant123": {"qa": {"token": token}}}
+    config._save(active=config.active, participants=config.participants)
+    return config
+
+
+def test_acquire_token_unchanged(mocker, active_config: Config, token):
+    client = mocker.Mock(token=dict(token))
+    spy_write = mocker.spy(Config, "write")
+
+    assert acquire_token(active_config, client) == token
+    assert spy_write.call_count == 0
+
+
+def test_acquire_token_changed(mocker, active_config: Config):
+    new_token = {"data": "new token"}
+    client = mocker.Mock(token=new_token)
+    spy_write = mocker.spy(Config, "write")
+
+    assert acquire_token(active_config, client) == new_token
+    assert active_config.active_token == new_token
+    assert Config().active_token == new_token
+    assert spy_write.call_count == 1
@@ -19,6 +19,17 @@ def mock_config(mocker):
     mocker.patch("littlepay.commands.products.Config")
 
 
+@pytest.fixture(autouse=True)
+def mock_snapshot(mock_snapshot):
+    mock_snapshot("littlepay.commands.groups")
+    return mock_snapshot("littlepay.commands.products")
+
+
+@pytest.fixture(autouse=True)
+def mock_acquire_token(mock_acquire_token):
+    return mock_acquire_token("littlepay.commands.products")
+
+
 @pytest.fixture
 def mock_client(mocker):
     client = mocker.Mock()
@@ -31,13 +42,13 @@ def mock_get_products(mock_client):
     mock_client.get_products.return_value = PRODUCT_RESPONSES
 
 
-def test_products_default(mock_client, capfd):
+def test_products_default(mock_acquire_token, mock_client, capfd):
     res = products()
     capture = capfd.readouterr()
 
     assert res == RESULT_SUCCESS
 
-    mock_client.oauth.ensure_active_token.assert_called_once()
+    mock_acquire_token.assert_called_once()
     mock_client.get_products.assert_called_with(status=None)
 
     assert "Matching products (4)" in capture.out
@@ -45,14 +56,32 @@ def test_products_default(mock_client, capfd):
         assert str(response) in capture.out
 
 
-def test_products_csv(mock_client, capfd):
+def test_products_refresh(mock_snapshot):
+    args = Namespace(refresh=True, product_status="ACTIVE")
+    res = products(args)
+
+    assert res == RESULT_SUCCESS
+    assert mock_snapshot.load.call_args.args[0] == "products?status=ACTIVE"
+    assert mock_snapshot.load.call_args.args[3] is True
+
+
+@pytest.mark.parametrize("command", ["link", "unlink"])
+def test_products_mutating_refresh(mock_snapshot, mock_client, command):
+    # products to link or unlink are chosen from a live listing, not a snapshot that may be stale
+    res = products(Namespace(product_command=command, group_id="group123"))
+
+    assert res == RESULT_SUCCESS
+    assert mock_snapshot.load.call_args.args[3] is True
+
+
+def test_products_csv(mock_acquire_token, mock_client, capfd):
     args = Namespace(csv=True)
     res = products(args)
     capture = capfd.readouterr()
 
     assert res == RESULT_SUCCESS
 
-    mock_client.oauth.ensure_active_token.assert_called_once()
+    mock_acquire_token.assert_called_once()
     mock_client.get_products.assert_called_with(status=None)
 
     assert "Matching products (4)" not in capture.out
@@ -77,6 +106,25 @@ def test_products_product_command__link(mock_client, capfd):
     assert "Linked" in capture.out
 
 
+def test_products_product_command__unlink_resume(mocker, mock_client, capfd):
+    from littlepay.checkpoint import Checkpoint
+    from littlepay.commands import _item_key, _items_digest
+
+    config = mocker.Mock(active_env_name="qa", active_participant_id="participant123")
+    mocker.patch("littlepay.commands.products.Config", return_value=config)
+    Checkpoint.from_active_config(config, "products unlink 1234").save(
+        offset=1, total=len(PRODUCT_RESPONSES), digest=_items_digest(PRODUCT_RESPONSES, _item_key)
+    )
+
+    args = Namespace(product_command="unlink", group_id="1234", resume=True)
+    res = products(args)
+
+    assert res == RESULT_SUCCESS
+    assert mock_client.unlink_concession_group_product.call_count == len(PRODUCT_RESPONSES) - 1
+    mock_client.unlink_concession_group_product.assert_any_call("1234", PRODUCT_RESPONSES[-1].id)
+    assert Checkpoint.from_active_config(config, "products unlink 1234").load() == {}
+
+
 def test_products_product_command__unlink(mock_client, capfd):
     args = Namespace(product_command="unlink", group_id="1234")
     res = products(args)
@@ -134,3 +182,13 @@ def test_products_product_term_multiple(capfd):
             assert str(response) in capture.out
         else:
             assert str(response) not in capture.out
+
+
+@pytest.mark.parametrize(("match", "expected"), [("exact", 1), ("prefix", 4), ("substring", 4)])
+def test_products_product_term_match(match, expected, capfd):
+    args = Namespace(product_terms=["id1", "code"], match=match)
+    res = products(args)
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert f"Matching products ({expected})" in capture.out
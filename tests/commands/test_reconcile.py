@@ -0,0 +1,125 @@
+from argparse import Namespace
+import json
+
+import pytest
+from requests import HTTPError
+
+from littlepay.api.groups import GroupFundingSourceResponse
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+from littlepay.commands.reconcile import reconcile
+
+LIVE_PRODUCTS = {"group1": ["product1", "product3"], "group2": ["product1"]}
+LIVE_FUNDING_SOURCES = {
+    "group1": [GroupFundingSourceResponse(id="fs1", expiry_date="2024-12-31T00:00:00Z")],
+    "group2": [GroupFundingSourceResponse(id="fs2")],
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_config(mocker):
+    mocker.patch("littlepay.commands.reconcile.Config")
+
+
+@pytest.fixture(autouse=True)
+def mock_acquire_token(mock_acquire_token):
+    return mock_acquire_token("littlepay.commands.reconcile")
+
+
+@pytest.fixture
+def mock_client(mocker):
+    client = mocker.Mock()
+    client.get_concession_groups_product_ids.side_effect = lambda ids, max_workers: {id: LIVE_PRODUCTS[id] for id in ids}
+    client.get_concession_groups_linked_funding_sources.side_effect = lambda ids, max_workers: {
+        id: LIVE_FUNDING_SOURCES[id] for id in ids
+    }
+    mocker.patch("littlepay.commands.reconcile.Client.from_active_config", return_value=client)
+    return client
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    path = tmp_path / "desired.yaml"
+    path.write_text(
+        """
+groups:
+  group1:
+    products: [product1, product2]
+    funding_sources:
+      fs1: 2024-12-31
+  group2:
+    funding_sources:
+      fs3: 2025-01-01
+"""
+    )
+    return str(path)
+
+
+def _ops(output: str) -> list[dict]:
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+
+
+def test_reconcile_plan(mock_acquire_token, mock_client, state_file, capfd):
+    res = reconcile(Namespace(file=state_file, workers=2))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_acquire_token.assert_called_once()
+    # only the kinds of links in the desired state are fetched
+    mock_client.get_concession_groups_product_ids.assert_called_once_with(["group1"], 2)
+    mock_client.get_concession_groups_linked_funding_sources.assert_called_once_with(["group1", "group2"], 2)
+
+    assert _ops(capture.out) == [
+        {"op": "link_product", "group_id": "group1", "product_id": "product2"},
+        {"op": "unlink_product", "group_id": "group1", "product_id": "product3"},
+        {"op": "link_funding_source", "group_id": "group2", "funding_source_id": "fs3", "expiry": "2025-01-01T00:00:00+00:00"},
+        {"op": "unlink_funding_source", "group_id": "group2", "funding_source_id": "fs2"},
+    ]
+    assert "Planned operations (4)" in capture.out
+    assert "--apply" in capture.out
+    mock_client.link_concession_group_product.assert_not_called()
+    mock_client.unlink_concession_group_funding_source.assert_not_called()
+
+
+def test_reconcile_apply(mock_client, state_file, capfd):
+    res = reconcile(Namespace(file=state_file, apply=True))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_client.link_concession_group_product.assert_called_once_with("group1", "product2")
+    mock_client.unlink_concession_group_product.assert_called_once_with("group1", "product3")
+    mock_client.link_concession_group_funding_source.assert_called_once()
+    mock_client.unlink_concession_group_funding_source.assert_called_once_with("group2", "fs2")
+    assert "Applied: 4, failed: 0" in capture.out
+
+
+def test_reconcile_apply_failure(mock_client, state_file, capfd):
+    mock_client.unlink_concession_group_product.side_effect = HTTPError("unlink failed")
+
+    res = reconcile(Namespace(file=state_file, apply=True))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "group1: unlink_product: unlink failed" in capture.out
+    assert "Applied: 3, failed: 1" in capture.out
+
+
+def test_reconcile_live_error(mock_client, state_file, capfd):
+    mock_client.get_concession_groups_linked_funding_sources.side_effect = lambda ids, max_workers: {
+        id: HTTPError("lookup failed") if id == "group2" else LIVE_FUNDING_SOURCES[id] for id in ids
+    }
+
+    res = reconcile(Namespace(file=state_file))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "group2: lookup failed" in capture.out
+    assert "Planned operations (2)" in capture.out
+
+
+def test_reconcile_invalid_file(mock_client, tmp_path, capfd):
+    res = reconcile(Namespace(file=str(tmp_path / "missing.yaml")))
+    capture = capfd.readouterr()
+
+    assert res == RESULT_FAILURE
+    assert "Error:" in capture.out
+    mock_client.get_concession_groups_product_ids.assert_not_called()
@@ -0,0 +1,47 @@
+import pytest
+
+import littlepay.api.client
+from littlepay.commands import RESULT_SUCCESS
+from littlepay.commands.serve import DEFAULT_SOCKET, serve
+
+
+@pytest.fixture
+def mock_DaemonServer(mocker):
+    server_cls = mocker.patch("littlepay.commands.serve.DaemonServer")
+    server = server_cls.return_value.__enter__.return_value
+    server.socket_path = "the socket"
+    return server_cls
+
+
+def test_serve(mocker, mock_DaemonServer, capfd):
+    reused = []
+    server = mock_DaemonServer.return_value.__enter__.return_value
+    server.serve_forever.side_effect = lambda: reused.append(littlepay.api.client._warm_clients is not None)
+
+    res = serve()
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    mock_DaemonServer.assert_called_once_with(DEFAULT_SOCKET)
+    assert reused == [True]
+    assert littlepay.api.client._warm_clients is None
+    assert "Serving on: the socket" in capture.out
+    assert "LP_SOCKET=the socket" in capture.out
+
+
+def test_serve_socket_path(mock_DaemonServer):
+    serve("/the/socket")
+
+    mock_DaemonServer.assert_called_once_with("/the/socket")
+
+
+def test_serve_KeyboardInterrupt(mock_DaemonServer, capfd):
+    server = mock_DaemonServer.return_value.__enter__.return_value
+    server.serve_forever.side_effect = KeyboardInterrupt
+
+    res = serve()
+    capture = capfd.readouterr()
+
+    assert res == RESULT_SUCCESS
+    assert "Stopping" in capture.out
+    assert littlepay.api.client._warm_clients is None
@@ -17,8 +17,8 @@ def mock_commands_config(mock_commands_config):
 def sample_config(custom_config_file: Path) -> dict:
     config = {
         "active": {"env": "e1", "participant": "p1"},
-        "envs": {"e1": "", "e2": ""},
-        "participants": {"p1": "", "p2": ""},
+        "envs": {"e1": {}, "e2": {}},
+        "participants": {"p1": {}, "p2": {}},
     }
     custom_config_file.write_text(json.dumps(config))
     return config
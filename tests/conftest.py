@@ -6,16 +6,24 @@ from pytest_socket import disable_socket
 
 from littlepay import __version__
 from littlepay.api import ListResponse
+import littlepay.checkpoint
 import littlepay.config
+import littlepay.response_cache
+import littlepay.snapshot
 from littlepay.commands import RESULT_SUCCESS
+from littlepay.search import MATCH_SUBSTRING, SearchIndex
 
 
 CUSTOM_CONFIG_FILE = "./tests/test.config.yaml"
 CUSTOM_CURRENT_FILE = "./tests/.current"
+CUSTOM_SNAPSHOT_FILE = "./tests/test.snapshots.db"
+CUSTOM_CHECKPOINT_FILE = "./tests/test.checkpoints.json"
+CUSTOM_RESPONSE_CACHE_FILE = "./tests/test.responses.db"
 
 
 def pytest_runtest_setup():
-    disable_socket()
+    # network access is never allowed, Unix domain sockets are used to test `littlepay serve`
+    disable_socket(allow_unix_socket=True)
 
 
 @pytest.fixture
@@ -66,10 +74,12 @@ def custom_config_file() -> Path:
     custom = Path(CUSTOM_CONFIG_FILE)
     custom.unlink(missing_ok=True)
     littlepay.config.DEFAULT_CONFIG_FILE = custom
+    littlepay.config._snapshots.clear()
 
     yield littlepay.config.DEFAULT_CONFIG_FILE
 
     custom.unlink(missing_ok=True)
+    custom.with_name(f"{custom.name}.lock").unlink(missing_ok=True)
     littlepay.config.DEFAULT_CONFIG_FILE = default
 
 
@@ -88,6 +98,53 @@ def custom_current_file() -> Path:
     littlepay.config.CONFIG_FILE_CURRENT = default
 
 
+@pytest.fixture(autouse=True)
+def custom_snapshot_file() -> Path:
+    """Fixture overrides littlepay.snapshot.SNAPSHOT_FILE for the duration of a test, resetting it back at the end."""
+    default = littlepay.snapshot.SNAPSHOT_FILE
+
+    custom = Path(CUSTOM_SNAPSHOT_FILE)
+    custom.unlink(missing_ok=True)
+    littlepay.snapshot.SNAPSHOT_FILE = custom
+
+    yield littlepay.snapshot.SNAPSHOT_FILE
+
+    custom.unlink(missing_ok=True)
+    littlepay.snapshot.SNAPSHOT_FILE = default
+
+
+@pytest.fixture(autouse=True)
+def custom_checkpoint_file() -> Path:
+    """Fixture overrides littlepay.checkpoint.CHECKPOINT_FILE for the duration of a test, resetting it back at the end."""
+    default = littlepay.checkpoint.CHECKPOINT_FILE
+
+    custom = Path(CUSTOM_CHECKPOINT_FILE)
+    custom.unlink(missing_ok=True)
+    littlepay.checkpoint.CHECKPOINT_FILE = custom
+
+    yield littlepay.checkpoint.CHECKPOINT_FILE
+
+    custom.unlink(missing_ok=True)
+    for items in custom.parent.glob(f"{custom.stem}.*.jsonl"):
+        items.unlink()
+    littlepay.checkpoint.CHECKPOINT_FILE = default
+
+
+@pytest.fixture(autouse=True)
+def custom_response_cache_file() -> Path:
+    """Fixture overrides littlepay.response_cache.RESPONSE_CACHE_FILE for the duration of a test, then resets it."""
+    default = littlepay.response_cache.RESPONSE_CACHE_FILE
+
+    custom = Path(CUSTOM_RESPONSE_CACHE_FILE)
+    custom.unlink(missing_ok=True)
+    littlepay.response_cache.RESPONSE_CACHE_FILE = custom
+
+    yield littlepay.response_cache.RESPONSE_CACHE_FILE
+
+    custom.unlink(missing_ok=True)
+    littlepay.response_cache.RESPONSE_CACHE_FILE = default
+
+
 @pytest.fixture
 def mock_module_name(mocker):
     """Fixture returns a function taking a name, that returns a function taking a module,
@@ -113,6 +170,18 @@ def mock_commands_config(mock_module_name):
     return mock_module_name("configure")
 
 
+@pytest.fixture
+def mock_commands_batch(mock_module_name):
+    """Fixture returns a function that patches commands.batch in a given module."""
+    return mock_module_name("batch")
+
+
+@pytest.fixture
+def mock_commands_funding_sources(mock_module_name):
+    """Fixture returns a function that patches commands.funding_sources in a given module."""
+    return mock_module_name("funding_sources")
+
+
 @pytest.fixture
 def mock_commands_groups(mock_module_name):
     """Fixture returns a function that patches commands.groups in a given module."""
@@ -125,12 +194,50 @@ def mock_commands_products(mock_module_name):
     return mock_module_name("products")
 
 
+@pytest.fixture
+def mock_commands_reconcile(mock_module_name):
+    """Fixture returns a function that patches commands.reconcile in a given module."""
+    return mock_module_name("reconcile")
+
+
+@pytest.fixture
+def mock_commands_serve(mock_module_name):
+    """Fixture returns a function that patches commands.serve in a given module."""
+    return mock_module_name("serve")
+
+
 @pytest.fixture
 def mock_commands_switch(mock_module_name):
     """Fixture returns a function that patches commands.switch in a given module."""
     return mock_module_name("switch")
 
 
+@pytest.fixture
+def mock_snapshot(mocker):
+    """Fixture returns a function that patches Snapshot in a given module, always calling through to fetch items."""
+
+    def _mock_snapshot(module):
+        snapshot = mocker.Mock()
+        snapshot.load.side_effect = lambda key, response_cls, fetch, refresh=False: list(fetch())
+        snapshot.search.side_effect = lambda key, items, terms, match=MATCH_SUBSTRING: SearchIndex(
+            items, littlepay.snapshot.search_fields(key)
+        ).search(terms, match)
+        mocker.patch(f"{module}.Snapshot.from_active_config", return_value=snapshot)
+        return snapshot
+
+    return _mock_snapshot
+
+
+@pytest.fixture
+def mock_acquire_token(mocker):
+    """Fixture returns a function that patches acquire_token in a given module."""
+
+    def _mock_acquire_token(module):
+        return mocker.patch(f"{module}.acquire_token")
+
+    return _mock_acquire_token
+
+
 @pytest.fixture
 def mock_ClientProtocol_delete(mocker):
     return mocker.patch("littlepay.api.ClientProtocol._delete", side_effect=lambda *args, **kwargs: True)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from littlepay.cache import MISSING, TTLCache
+
+
+@pytest.fixture
+def mock_monotonic(mocker):
+    now = time.monotonic()
+    return mocker.patch("littlepay.cache.time.monotonic", return_value=now)
+
+
+def test_TTLCache_get_missing():
+    cache = TTLCache()
+
+    assert cache.get("key") is MISSING
+    assert cache.get("key", None) is None
+    assert "key" not in cache
+
+
+def test_TTLCache_set_get():
+    cache = TTLCache()
+
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert "key" in cache
+    assert len(cache) == 1
+
+
+def test_TTLCache_set_None():
+    cache = TTLCache()
+
+    cache.set("key", None)
+
+    assert cache.get("key") is None
+    assert "key" in cache
+
+
+def test_TTLCache_expired(mock_monotonic):
+    cache = TTLCache(ttl=10)
+    cache.set("key", "value")
+    cache.set("short", "value", ttl=1)
+
+    mock_monotonic.return_value += 5
+
+    assert cache.get("key") == "value"
+    assert cache.get("short") is MISSING
+
+    mock_monotonic.return_value += 10
+
+    assert cache.get("key") is MISSING
+    assert len(cache) == 0
+
+
+def test_TTLCache_maxsize():
+    cache = TTLCache(maxsize=2)
+    cache.set("one", 1)
+    cache.set("two", 2)
+    # "one" is now the most recently used
+    cache.get("one")
+
+    cache.set("three", 3)
+
+    assert cache.get("one") == 1
+    assert cache.get("two") is MISSING
+    assert cache.get("three") == 3
+
+
+def test_TTLCache_pop_clear():
+    cache = TTLCache()
+    cache.set("one", 1)
+    cache.set("two", 2)
+
+    cache.pop("one")
+    cache.pop("missing")
+
+    assert cache.get("one") is MISSING
+    assert cache.get("two") == 2
+
+    cache.clear()
+
+    assert len(cache) == 0
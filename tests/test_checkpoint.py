@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import pytest
+
+from littlepay.checkpoint import Checkpoint
+
+
+@pytest.fixture
+def checkpoint() -> Checkpoint:
+    return Checkpoint("job", "qa", "participant123")
+
+
+def test_Checkpoint_from_active_config(mocker, custom_checkpoint_file: Path):
+    config = mocker.Mock(active_env_name="qa", active_participant_id="participant123")
+
+    checkpoint = Checkpoint.from_active_config(config, "job")
+
+    assert checkpoint.job == "job"
+    assert checkpoint.env == "qa"
+    assert checkpoint.participant == "participant123"
+    assert checkpoint.path == custom_checkpoint_file
+
+
+def test_Checkpoint_load_missing(checkpoint: Checkpoint):
+    assert checkpoint.load() == {}
+
+
+def test_Checkpoint_save_load(checkpoint: Checkpoint, custom_checkpoint_file: Path):
+    assert checkpoint.save(page=1, total_count=10) == {"page": 1, "total_count": 10}
+    assert checkpoint.save(page=2) == {"page": 2, "total_count": 10}
+
+    assert custom_checkpoint_file.exists()
+    assert not custom_checkpoint_file.with_name(f"{custom_checkpoint_file.name}.tmp").exists()
+    assert Checkpoint("job", "qa", "participant123").load() == {"page": 2, "total_count": 10}
+
+
+def test_Checkpoint_keyed_by_job_env_participant(checkpoint: Checkpoint):
+    checkpoint.save(page=1)
+
+    assert Checkpoint("other", "qa", "participant123").load() == {}
+    assert Checkpoint("job", "prod", "participant123").load() == {}
+    assert Checkpoint("job", "qa", "participant456").load() == {}
+
+
+def test_Checkpoint_clear(checkpoint: Checkpoint):
+    other = Checkpoint("other", "qa", "participant123")
+    checkpoint.save(page=1)
+    other.save(page=2)
+
+    checkpoint.clear()
+
+    assert checkpoint.load() == {}
+    assert other.load() == {"page": 2}
+
+
+def test_Checkpoint_clear_missing(checkpoint: Checkpoint, custom_checkpoint_file: Path):
+    checkpoint.clear()
+
+    assert not custom_checkpoint_file.exists()
+
+
+def test_Checkpoint_corrupt_file(checkpoint: Checkpoint, custom_checkpoint_file: Path):
+    custom_checkpoint_file.write_text("{not json")
+
+    assert checkpoint.load() == {}
+    assert checkpoint.save(page=1) == {"page": 1}
+
+
+def test_Checkpoint_append_items(checkpoint: Checkpoint, custom_checkpoint_file: Path):
+    assert list(checkpoint.items()) == []
+
+    checkpoint.append([{"id": "0"}, {"id": "1"}])
+    checkpoint.append([{"id": "2"}])
+
+    assert checkpoint.items_path.parent == custom_checkpoint_file.parent
+    assert list(checkpoint.items()) == [{"id": "0"}, {"id": "1"}, {"id": "2"}]
+    assert list(checkpoint.items(2)) == [{"id": "0"}, {"id": "1"}]
+    assert list(Checkpoint("other", "qa", "participant123").items()) == []
+
+
+def test_Checkpoint_clear_items(checkpoint: Checkpoint):
+    checkpoint.append([{"id": "0"}])
+
+    checkpoint.clear()
+
+    assert not checkpoint.items_path.exists()
+    assert list(checkpoint.items()) == []
@@ -1,17 +1,23 @@
 from pathlib import Path
+import threading
 
 import pytest
+import yaml
 
 import littlepay.config
 from littlepay.config import (
     DEFAULT_CONFIG,
     DEFAULT_CREDENTIALS,
+    ENV_PROD,
     _ensure_current_exists,
     _get_current_path,
     _read_config,
     _write_config,
     _update_current_path,
     Config,
+    ConfigSnapshot,
+    Target,
+    override_participant,
 )
 from tests.conftest import CUSTOM_CONFIG_FILE
 
@@ -99,6 +105,27 @@ def test_write_config(custom_config_file: Path):
     assert text.endswith("the config")
 
 
+def test_write_config_replaces_file(custom_config_file: Path):
+    _write_config({"config": "the config"}, custom_config_file)
+    _write_config({"config": "the new config"}, custom_config_file)
+
+    assert custom_config_file.read_text().strip() == "config: the new config"
+    assert not custom_config_file.with_name(f"{custom_config_file.name}.tmp").exists()
+
+
+def test_read_config_libyaml(mocker, custom_config_file: Path):
+    custom_config_file.write_text("config: the config")
+    spy_load = mocker.spy(littlepay.config.yaml, "load")
+
+    _read_config(custom_config_file)
+
+    assert spy_load.call_args.kwargs["Loader"] is yaml.CSafeLoader
+
+
+def test_write_config_libyaml():
+    assert issubclass(littlepay.config.NoAliasDumper, yaml.CSafeDumper)
+
+
 def test_write_config_no_aliases_anchors(custom_config_file: Path):
     data = {"data1": "something", "data1": "something"}
     _write_config({"instance1": data, "instance2": data}, custom_config_file)
@@ -154,7 +181,7 @@ def test_Config_active_env_name_default():
 def test_Config_active_env_name_update():
     config = Config()
     config.active = {"env": "original_env"}
-    config.envs = {"original_env": "the original env", "new_env": "the new env"}
+    config.envs = {"original_env": {"url": "the original env"}, "new_env": {"url": "the new env"}}
 
     config.active_env_name = "new_env"
 
@@ -166,7 +193,7 @@ def test_Config_active_env_name_update_unsupported(mocker):
     spy_write = mocker.spy(littlepay.config, "_write_config")
     config = Config()
     config.active = {"env": "original_env"}
-    config.envs = {"original_env": "the original env"}
+    config.envs = {"original_env": {"url": "the original env"}}
 
     with pytest.raises(ValueError):
         config.active_env_name = "new_env"
@@ -178,15 +205,15 @@ def test_Config_active_env_name_update_unsupported(mocker):
 def test_Config_active_env():
     config = Config()
     config.active = {"env": "env123"}
-    config.envs = {"env123": "the environment"}
+    config.envs = {"env123": {"url": "the environment"}}
 
-    assert config.active_env == "the environment"
+    assert config.active_env == {"url": "the environment"}
 
 
 def test_Config_active_missing():
     config = Config()
     config.active = {}
-    config.envs = {"qa": "qa environment"}
+    config.envs = {"qa": {"url": "qa environment"}}
 
     with pytest.raises(ValueError):
         config.active_env
@@ -206,10 +233,35 @@ def test_Config_active_participant_id_default():
     assert config.active_participant_id == ""
 
 
+def test_Config_active_participant_id_override():
+    config = Config()
+    config.active = {"participant": "active_participant"}
+
+    with override_participant("other_participant"):
+        assert config.active_participant_id == "other_participant"
+
+    assert config.active_participant_id == "active_participant"
+    assert config.active == {"participant": "active_participant"}
+
+
+def test_Config_active_participant_id_override_thread():
+    config = Config()
+    config.active = {"participant": "active_participant"}
+    results = []
+
+    with override_participant("other_participant"):
+        # the override is only for this context, not other threads
+        thread = threading.Thread(target=lambda: results.append(config.active_participant_id))
+        thread.start()
+        thread.join()
+
+    assert results == ["active_participant"]
+
+
 def test_Config_active_participant_id_update():
     config = Config()
     config.active = {"participant": "participant123"}
-    config.participants = {"participant123": "one two three", "participant456": "four five six"}
+    config.participants = {"participant123": {"qa": {}}, "participant456": {"qa": {}}}
 
     config.active_participant_id = "participant456"
 
@@ -221,7 +273,7 @@ def test_Config_active_participant_id_update_unsupported(mocker):
     spy_write = mocker.spy(littlepay.config, "_write_config")
     config = Config()
     config.active = {"participant": "participant123"}
-    config.participants = {"participant123": "one two three"}
+    config.participants = {"participant123": {"qa": {}}}
 
     with pytest.raises(ValueError):
         config.active_participant_id = "participant456"
@@ -233,76 +285,258 @@ def test_Config_active_participant_id_update_unsupported(mocker):
 def test_Config_active_participant():
     config = Config()
     config.active = {"env": "env123", "participant": "participant123"}
-    config.participants = {"participant123": {"env123": "the participant config"}}
+    config.participants = {"participant123": {"env123": {"data": "the participant config"}}}
 
-    assert config.active_participant == "the participant config"
+    assert config.active_participant == {"data": "the participant config"}
 
 
 def test_Config_active_participant_missing():
     config = Config()
     config.active = {"env": "env123"}
-    config.participants = {"participant123": {"env123": "the participant config"}}
+    config.participants = {"participant123": {"env123": {"data": "the participant config"}}}
 
     with pytest.raises(ValueError):
         config.active_participant
 
 
-def test_Config_active_credentials_default(mocker):
+def test_Config_active_participant_missing_env():
     config = Config()
-    mocker.patch("littlepay.config.Config.active_participant", new_callable=mocker.PropertyMock, return_value={})
+    config.active = {"env": "env456", "participant": "participant123"}
+    config.participants = {"participant123": {"env123": {"data": "the participant config"}}}
 
     with pytest.raises(ValueError):
-        config.active_credentials
+        config.active_participant
+
+
+@pytest.fixture
+def active_Config():
+    config = Config()
+    config.active = {"env": "env123", "participant": "participant123"}
+    config.envs = {"env123": {"url": "the environment"}}
+    return config
 
 
-def test_Config_active_credentials_custom(mocker):
+def test_Config_active_credentials_default(active_Config):
+    active_Config.participants = {"participant123": {"env123": {}}}
+
+    with pytest.raises(ValueError):
+        active_Config.active_credentials
+
+
+def test_Config_active_credentials_custom(active_Config):
     custom = dict(**DEFAULT_CREDENTIALS)
     custom["client_id"] = "the ID"
     custom["client_secret"] = "123456"
     custom["audience"] = "the audience"
+    active_Config.participants = {"participant123": {"env123": {**custom, "token": {"data": "token123"}}}}
+
+    assert active_Config.active_credentials == custom
+
+
+def test_Config_active_credentials_missing(active_Config):
+    active_Config.participants = {"participant123": {"env123": {"env": "something", "data": "other"}}}
+
+    with pytest.raises(ValueError):
+        active_Config.active_credentials
+
+
+def test_Config_active_credentials_precomputed(active_Config):
+    active_Config.participants = {"participant123": {"env123": dict(**DEFAULT_CREDENTIALS)}}
+
+    assert active_Config.active_credentials is active_Config.active_credentials
+
+
+def test_Config_active_token(active_Config):
+    token = {"data": "token123"}
+    active_Config.participants = {"participant123": {"env123": {"token": token}}}
+
+    assert active_Config.active_token == token
+
+
+def test_Config_active_token_missing(active_Config):
+    active_Config.participants = {"participant123": {"env123": {}}}
+
+    assert active_Config.active_token is None
+
+
+def test_Config_active_token_update(active_Config):
+    active_Config.participants = {"participant123": {"env123": {}}}
+    active_Config._save(active=active_Config.active, envs=active_Config.envs, participants=active_Config.participants)
+    assert active_Config.active_token is None
+
+    token = {"data": "token123"}
+    active_Config.active_token = token
+
+    assert active_Config.active_token == token
+    assert active_Config.active_participant["token"] == token
+
+    assert Config().active_token == token
+
+
+@pytest.fixture
+def two_participants_Config(active_Config):
+    active_Config.participants = {"participant123": {"env123": {}}, "participant456": {"env123": {}}}
+    active_Config._save(active=active_Config.active, envs=active_Config.envs, participants=active_Config.participants)
+    return active_Config
+
+
+def test_Config_active_token_update_keeps_concurrent_tokens(two_participants_Config):
+    # read before the other config saves its token
+    stale = Config()
+    with override_participant("participant456"):
+        two_participants_Config.active_token = {"data": "token456"}
+
+    stale.active_token = {"data": "token123"}
 
     config = Config()
-    mocker.patch("littlepay.config.Config.active_participant", new_callable=mocker.PropertyMock, return_value=custom)
+    assert config.participants["participant123"]["env123"]["token"] == {"data": "token123"}
+    assert config.participants["participant456"]["env123"]["token"] == {"data": "token456"}
+
 
-    assert config.active_credentials == custom
+def test_Config_active_token_update_threads(two_participants_Config):
+    barrier = threading.Barrier(2, timeout=5)
 
+    def save(config, participant_id):
+        barrier.wait()
+        with override_participant(participant_id):
+            config.active_token = {"data": participant_id}
+
+    # each thread saves through its own config, read before either token is saved
+    threads = [threading.Thread(target=save, args=(Config(), p)) for p in ("participant123", "participant456")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
 
-def test_Config_active_credentials_missing(mocker):
     config = Config()
-    mocker.patch(
-        "littlepay.config.Config.active_participant",
-        new_callable=mocker.PropertyMock,
-        return_value={"env": "something", "data": "other"},
-    )
+    assert config.participants["participant123"]["env123"]["token"] == {"data": "participant123"}
+    assert config.participants["participant456"]["env123"]["token"] == {"data": "participant456"}
 
-    with pytest.raises(ValueError):
-        config.active_credentials
 
+def test_Config_active_token_update_keeps_concurrent_changes(two_participants_Config):
+    # read before another writer changes the active participant and credentials
+    stale = Config()
+    other = Config()
+    other.active_participant_id = "participant456"
+    other._save(participants={**other.participants, "participant789": {"env123": {"client_id": "client789"}}})
+
+    with override_participant("participant123"):
+        stale.active_token = {"data": "token123"}
 
-def test_Config_active_token(mocker):
-    token = {"data": "token123"}
     config = Config()
-    mocker.patch("littlepay.config.Config.active_participant", new_callable=mocker.PropertyMock, return_value={"token": token})
+    assert config.active_participant_id == "participant456"
+    assert config.participants["participant789"]["env123"] == {"client_id": "client789"}
+    assert config.participants["participant123"]["env123"]["token"] == {"data": "token123"}
+    assert stale.active_participant_id == "participant456"
+
+
+def test_Config_active_participant_id_keeps_concurrent_tokens(two_participants_Config):
+    stale = Config()
+    with override_participant("participant456"):
+        two_participants_Config.active_token = {"data": "token456"}
+
+    stale.active_participant_id = "participant456"
 
-    assert config.active_token == token
+    config = Config()
+    assert config.active_participant_id == "participant456"
+    assert config.active_token == {"data": "token456"}
 
 
-def test_Config_active_token_missing(mocker):
+def test_Config_active_token_update_missing_participant():
     config = Config()
-    mocker.patch("littlepay.config.Config.active_participant", new_callable=mocker.PropertyMock, return_value={})
+    config.active = {}
+
+    with pytest.raises(ValueError):
+        config.active_token = {"data": "token123"}
+
 
-    assert config.active_token is None
+def test_Config_invalid(custom_config_file: Path):
+    custom_config_file.write_text('{"envs": {"qa": "the environment"}}')
 
+    with pytest.raises(ValueError, match="envs.qa"):
+        Config(custom_config_file)
 
-def test_Config_active_token_update(mocker):
-    mocker.patch("littlepay.config.Config.active_participant", new_callable=mocker.PropertyMock, return_value={})
+
+def test_Config_readonly():
     config = Config()
-    assert config.active_token is None
 
-    token = {"data": "token123"}
-    config.active_token = token
+    with pytest.raises(TypeError):
+        config.active["env"] = "something"
+
+
+def test_ConfigSnapshot_parse():
+    data = {
+        "active": {"env": "qa", "participant": "p1"},
+        "envs": {"qa": {"url": "https://example.com"}, "prod": None},
+        "participants": {"p1": {"qa": dict(**DEFAULT_CREDENTIALS), "prod": {"client_id": "id"}}},
+    }
+
+    snapshot = ConfigSnapshot.parse(data)
+
+    assert snapshot.envs == {"qa": {"url": "https://example.com"}, "prod": {}}
+    assert snapshot.targets.keys() == {("qa", "p1"), ("prod", "p1")}
+    target = snapshot.targets[("qa", "p1")]
+    assert target == Target(
+        env_name="qa",
+        participant_id="p1",
+        env={"url": "https://example.com"},
+        participant=DEFAULT_CREDENTIALS,
+        credentials=DEFAULT_CREDENTIALS,
+        token=None,
+    )
+    assert snapshot.targets[("prod", "p1")].credentials is None
+    assert snapshot.to_dict() == data
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "the config",
+        {"active": "qa"},
+        {"envs": ["qa"]},
+        {"participants": {"p1": "qa"}},
+        {"participants": {"p1": {"qa": "the credentials"}}},
+    ],
+)
+def test_ConfigSnapshot_parse_invalid(data):
+    with pytest.raises(ValueError, match="Invalid config"):
+        ConfigSnapshot.parse(data)
 
-    assert config.active_token == token
-    assert config.active_participant["token"] == token
 
-    assert Config().active_token == token
+def test_ConfigSnapshot_replace():
+    snapshot = ConfigSnapshot.parse({"active": {"env": "qa"}, "other": "data"})
+
+    replaced = snapshot.replace(active={"env": "prod"})
+
+    assert replaced.active == {"env": "prod"}
+    assert replaced.data["other"] == "data"
+    assert snapshot.active == {"env": "qa"}
+
+
+def test_Config_cached(mocker, custom_config_file: Path):
+    Config()
+    spy_read = mocker.spy(littlepay.config.Config, "read")
+
+    assert Config().active == DEFAULT_CONFIG["active"]
+    assert Config().snapshot is Config().snapshot
+    assert spy_read.call_count == 0
+
+
+def test_Config_cached_changed(mocker, custom_config_file: Path):
+    Config()
+    spy_read = mocker.spy(littlepay.config.Config, "read")
+
+    custom_config_file.write_text('{"data": "the new config"}')
+
+    assert Config().data == "the new config"
+    assert spy_read.call_count == 1
+
+
+def test_Config_cached_saved(mocker):
+    config = Config()
+    config.active_env_name = ENV_PROD
+    spy_read = mocker.spy(littlepay.config.Config, "read")
+
+    assert Config().snapshot is config.snapshot
+    assert Config().active_env_name == ENV_PROD
+    assert spy_read.call_count == 0
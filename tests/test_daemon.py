@@ -0,0 +1,163 @@
+import os
+from pathlib import Path
+import stat
+import threading
+
+import pytest
+
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+from littlepay.daemon import SOCKET_ENV, DaemonServer, forward
+
+
+@pytest.fixture
+def socket_path(tmp_path) -> Path:
+    return tmp_path / "littlepay.sock"
+
+
+@pytest.fixture
+def mock_run(mocker):
+    def _run(argv):
+        if argv == ["fail"]:
+            raise RuntimeError("the error")
+        if argv == ["exit"]:
+            raise SystemExit(2)
+        if argv == ["stdin"]:
+            print(input())
+            return RESULT_SUCCESS
+        print(f"ran: {' '.join(argv)}")
+        return RESULT_SUCCESS
+
+    return mocker.patch("littlepay.main.run", side_effect=_run)
+
+
+@pytest.fixture
+def server(socket_path, mock_run):
+    server = DaemonServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def lp_socket(monkeypatch, socket_path):
+    monkeypatch.setenv(SOCKET_ENV, str(socket_path))
+
+
+def test_DaemonServer_socket(socket_path, server):
+    assert server.socket_path == socket_path
+    assert socket_path.exists()
+
+
+def test_DaemonServer_socket_mode(socket_path):
+    umask = os.umask(0o002)
+    try:
+        server = DaemonServer(socket_path)
+    finally:
+        os.umask(umask)
+
+    with server:
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+    # the process umask is left as it was
+    assert os.umask(umask) == umask
+
+
+def test_DaemonServer_stale_socket(socket_path):
+    socket_path.write_text("")
+
+    with DaemonServer(socket_path) as server:
+        assert server.socket_path.is_socket()
+
+    assert not socket_path.exists()
+
+
+def test_DaemonServer_run(mock_run, socket_path):
+    with DaemonServer(socket_path) as server:
+        response = server.run({"argv": ["groups", "-f", "term"]})
+
+    mock_run.assert_called_once_with(["groups", "-f", "term"])
+    assert response == {"code": RESULT_SUCCESS, "stdout": "ran: groups -f term\n", "stderr": ""}
+
+
+def test_DaemonServer_run_exception(mock_run, socket_path):
+    with DaemonServer(socket_path) as server:
+        response = server.run({"argv": ["fail"]})
+
+    assert response["code"] == RESULT_FAILURE
+    assert "RuntimeError: the error" in response["stderr"]
+
+
+def test_DaemonServer_run_SystemExit(mock_run, socket_path):
+    with DaemonServer(socket_path) as server:
+        response = server.run({"argv": ["exit"]})
+
+    assert response["code"] == 2
+
+
+def test_DaemonServer_run_serve(mock_run, socket_path):
+    with DaemonServer(socket_path) as server:
+        response = server.run({"argv": ["serve"]})
+
+    mock_run.assert_not_called()
+    assert response["code"] == RESULT_FAILURE
+    assert "already serving" in response["stderr"]
+
+
+def test_DaemonServer_run_stdin(mock_run, socket_path):
+    with DaemonServer(socket_path) as server:
+        response = server.run({"argv": ["stdin"], "stdin": "from the client\n"})
+        assert server.run({"argv": ["stdin"]})["code"] == RESULT_FAILURE
+
+    assert response["stdout"] == "from the client\n"
+
+
+def test_DaemonServer_run_cwd(mocker, socket_path, tmp_path):
+    cwds = []
+    mocker.patch("littlepay.main.run", side_effect=lambda argv: cwds.append(Path.cwd()) or RESULT_SUCCESS)
+
+    with DaemonServer(socket_path) as server:
+        server.run({"argv": ["groups"], "cwd": str(tmp_path)})
+
+    assert cwds == [tmp_path]
+    assert Path.cwd() != tmp_path
+
+
+def test_forward_no_env(monkeypatch):
+    monkeypatch.delenv(SOCKET_ENV, raising=False)
+
+    assert forward(["groups"]) is None
+
+
+@pytest.mark.usefixtures("lp_socket")
+def test_forward_not_listening():
+    assert forward(["groups"]) is None
+
+
+@pytest.mark.usefixtures("lp_socket", "server")
+def test_forward(mock_run, capfd):
+    result = forward(["products", "--csv"])
+    capture = capfd.readouterr()
+
+    assert result == RESULT_SUCCESS
+    mock_run.assert_called_once_with(["products", "--csv"])
+    assert capture.out == "ran: products --csv\n"
+
+
+@pytest.mark.usefixtures("lp_socket", "server")
+def test_forward_stdin(mocker, mock_run, capfd):
+    mocker.patch("sys.stdin", mocker.Mock(read=mocker.Mock(return_value="line\n")))
+
+    forward(["funding_sources", "groups", "-"])
+
+    # the forwarded stdin was used by the command
+    assert mock_run.call_args.args[0] == ["funding_sources", "groups", "-"]
+
+
+@pytest.mark.usefixtures("lp_socket", "server")
+def test_forward_serve(mock_run):
+    assert forward(["serve"]) is None
+    mock_run.assert_not_called()
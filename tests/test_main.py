@@ -1,33 +1,55 @@
 from argparse import Namespace
 from pathlib import Path
 import re
+import subprocess
+import sys
 
 import pytest
 
+from littlepay.api import MAX_WORKERS
 from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
 from littlepay.config import Config
-import littlepay.main
-from littlepay.main import main, __name__ as MODULE
+from littlepay.main import main
 
 
 @pytest.fixture
 def mock_commands_config(mock_commands_config):
-    return mock_commands_config(MODULE)
+    return mock_commands_config("littlepay.commands.configure")
+
+
+@pytest.fixture
+def mock_commands_batch(mock_commands_batch):
+    return mock_commands_batch("littlepay.commands.batch")
+
+
+@pytest.fixture
+def mock_commands_funding_sources(mock_commands_funding_sources):
+    return mock_commands_funding_sources("littlepay.commands.funding_sources")
 
 
 @pytest.fixture
 def mock_commands_groups(mock_commands_groups):
-    return mock_commands_groups(MODULE)
+    return mock_commands_groups("littlepay.commands.groups")
 
 
 @pytest.fixture
 def mock_commands_products(mock_commands_products):
-    return mock_commands_products(MODULE)
+    return mock_commands_products("littlepay.commands.products")
+
+
+@pytest.fixture
+def mock_commands_reconcile(mock_commands_reconcile):
+    return mock_commands_reconcile("littlepay.commands.reconcile")
+
+
+@pytest.fixture
+def mock_commands_serve(mock_commands_serve):
+    return mock_commands_serve("littlepay.commands.serve")
 
 
 @pytest.fixture
 def mock_commands_switch(mock_commands_switch):
-    return mock_commands_switch(MODULE)
+    return mock_commands_switch("littlepay.commands.switch")
 
 
 def test_main_default(capfd, mock_commands_config):
@@ -70,6 +92,70 @@ def test_main_config_config_path(custom_config_file: Path, mock_commands_config)
     mock_commands_config.assert_called_once_with(new_config_path)
 
 
+def test_main_batch(mock_commands_batch):
+    result = main(argv=["batch", "ops.jsonl"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_batch.assert_called_once()
+    call_args = mock_commands_batch.call_args.args[0]
+    assert isinstance(call_args, Namespace)
+    assert call_args.command == "batch"
+    assert call_args.file == "ops.jsonl"
+    assert call_args.workers == MAX_WORKERS
+
+
+@pytest.mark.parametrize("workers_flag", ["-w", "--workers"])
+def test_main_batch_workers(mock_commands_batch, workers_flag):
+    result = main(argv=["batch", workers_flag, "2", "-"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_batch.call_args.args[0]
+    assert call_args.file == "-"
+    assert call_args.workers == 2
+
+
+def test_main_funding_sources(mock_commands_funding_sources):
+    result = main(argv=["funding_sources"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_funding_sources.assert_called_once()
+    call_args = mock_commands_funding_sources.call_args.args[0]
+    assert isinstance(call_args, Namespace)
+    assert call_args.command == "funding_sources"
+
+
+def test_main_funding_sources_groups(mock_commands_funding_sources):
+    result = main(argv=["funding_sources", "--csv", "groups", "ids.txt"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_funding_sources.assert_called_once()
+    call_args = mock_commands_funding_sources.call_args.args[0]
+    assert call_args.funding_source_command == "groups"
+    assert call_args.file == "ids.txt"
+    assert call_args.csv is True
+    assert call_args.tokens is False
+    assert call_args.workers == MAX_WORKERS
+
+
+@pytest.mark.parametrize("tokens_flag", ["-t", "--tokens"])
+@pytest.mark.parametrize("workers_flag", ["-w", "--workers"])
+def test_main_funding_sources_groups_tokens_workers(mock_commands_funding_sources, tokens_flag, workers_flag):
+    result = main(argv=["funding_sources", "groups", tokens_flag, workers_flag, "2", "-"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_funding_sources.call_args.args[0]
+    assert call_args.file == "-"
+    assert call_args.tokens is True
+    assert call_args.workers == 2
+
+
+def test_main_funding_sources_groups_missing_file(mock_commands_funding_sources):
+    with pytest.raises(SystemExit):
+        main(argv=["funding_sources", "groups"])
+
+    assert mock_commands_funding_sources.call_count == 0
+
+
 def test_main_groups(mock_commands_groups):
     result = main(argv=["groups"])
 
@@ -91,6 +177,15 @@ def test_main_groups_csv(mock_commands_groups):
     assert call_args.csv is True
 
 
+def test_main_groups_refresh(mock_commands_groups):
+    result = main(argv=["groups", "--refresh"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_groups.assert_called_once()
+    call_args = mock_commands_groups.call_args.args[0]
+    assert call_args.refresh is True
+
+
 @pytest.mark.parametrize("filter_flag", ["-f", "--filter"])
 def test_main_groups_filter(mock_commands_groups, filter_flag):
     result = main(argv=["groups", filter_flag, "term"])
@@ -111,6 +206,31 @@ def test_main_groups_filter_multiple(mock_commands_groups, filter_flag):
     assert call_args.group_terms == ["term1", "term2"]
 
 
+def test_main_groups_match_default(mock_commands_groups):
+    result = main(argv=["groups"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_groups.call_args.args[0]
+    assert call_args.match == "substring"
+
+
+@pytest.mark.parametrize("match_flag", ["-m", "--match"])
+@pytest.mark.parametrize("match_value", ["exact", "prefix", "substring"])
+def test_main_groups_match(mock_commands_groups, match_flag, match_value):
+    result = main(argv=["groups", match_flag, match_value, "-f", "term"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_groups.call_args.args[0]
+    assert call_args.match == match_value
+
+
+def test_main_groups_match_unrecognized(mock_commands_groups):
+    with pytest.raises(SystemExit):
+        main(argv=["groups", "--match", "fuzzy"])
+
+    assert mock_commands_groups.call_count == 0
+
+
 def test_main_groups_create(mock_commands_groups):
     result = main(argv=["groups", "create", "label"])
 
@@ -130,6 +250,16 @@ def test_main_groups_funding_sources(mock_commands_groups):
     assert call_args.group_command == "funding_sources"
 
 
+def test_main_groups_funding_sources_sync(mock_commands_groups):
+    result = main(argv=["groups", "funding_sources", "--sync"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_groups.assert_called_once()
+    call_args = mock_commands_groups.call_args.args[0]
+    assert call_args.group_command == "funding_sources"
+    assert call_args.sync is True
+
+
 def test_main_groups_link(mock_commands_groups):
     result = main(argv=["groups", "link", "1234"])
 
@@ -253,6 +383,15 @@ def test_main_products_csv(mock_commands_products):
     assert call_args.csv is True
 
 
+def test_main_products_refresh(mock_commands_products):
+    result = main(argv=["products", "--refresh"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_products.assert_called_once()
+    call_args = mock_commands_products.call_args.args[0]
+    assert call_args.refresh is True
+
+
 @pytest.mark.parametrize("filter_flag", ["-f", "--filter"])
 def test_main_products_filter(mock_commands_products, filter_flag):
     result = main(argv=["products", filter_flag, "term"])
@@ -273,6 +412,16 @@ def test_main_products_filter_multiple(mock_commands_products, filter_flag):
     assert call_args.product_terms == ["term1", "term2"]
 
 
+@pytest.mark.parametrize("match_flag", ["-m", "--match"])
+@pytest.mark.parametrize("match_value", ["exact", "prefix", "substring"])
+def test_main_products_match(mock_commands_products, match_flag, match_value):
+    result = main(argv=["products", match_flag, match_value, "-f", "term"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_products.call_args.args[0]
+    assert call_args.match == match_value
+
+
 @pytest.mark.parametrize("status_flag", ["-s", "--status"])
 @pytest.mark.parametrize("status_value", ["ACTIVE", "INACTIVE", "EXPIRED"])
 def test_main_products_status(mock_commands_products, status_flag, status_value):
@@ -292,6 +441,41 @@ def test_main_products_status_unrecognized(mock_commands_products, status_flag):
     assert mock_commands_products.call_count == 0
 
 
+def test_main_serve(mock_commands_serve):
+    result = main(argv=["serve"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_serve.assert_called_once_with(None)
+
+
+@pytest.mark.parametrize("socket_flag", ["-s", "--socket"])
+def test_main_serve_socket(mock_commands_serve, socket_flag):
+    result = main(argv=["serve", socket_flag, "/the/socket"])
+
+    assert result == RESULT_SUCCESS
+    mock_commands_serve.assert_called_once_with("/the/socket")
+
+
+def test_main_forward(mocker, mock_commands_groups):
+    mock_forward = mocker.patch("littlepay.main.forward", return_value=RESULT_FAILURE)
+
+    result = main(argv=["groups"])
+
+    assert result == RESULT_FAILURE
+    mock_forward.assert_called_once_with(["groups"])
+    mock_commands_groups.assert_not_called()
+
+
+def test_main_forward_no_daemon(mocker, mock_commands_groups):
+    mock_forward = mocker.patch("littlepay.main.forward", return_value=None)
+
+    result = main(argv=["groups"])
+
+    assert result == RESULT_SUCCESS
+    mock_forward.assert_called_once_with(["groups"])
+    mock_commands_groups.assert_called_once()
+
+
 @pytest.mark.parametrize("switch_arg", ["-e", "--env"])
 def test_main_switch_env(mock_commands_switch, switch_arg):
     result = main(argv=["switch", switch_arg, "new_value"])
@@ -339,9 +523,9 @@ def test_main_unrecognized(capfd):
 
 @pytest.mark.parametrize("version_flag", ["-v", "--version"])
 def test_main_version_flag(version_flag, mocker, capfd, mock_commands_config):
-    # littlepay.main.Config (the class)
-    config_cls = mocker.patch.object(littlepay.main, "Config")
-    # littlepay.main.Config() (an instance)
+    # littlepay.config.Config (the class)
+    config_cls = mocker.patch("littlepay.config.Config")
+    # littlepay.config.Config() (an instance)
     config = config_cls.return_value
 
     with pytest.raises(SystemExit) as err:
@@ -351,5 +535,135 @@ def test_main_version_flag(version_flag, mocker, capfd, mock_commands_config):
     assert err.value.code == RESULT_SUCCESS
     assert re.match(r"littlepay \d+\.\d+\.", capture.out)
     mock_commands_config.assert_not_called()
-    # there should have been no calls to any method on littlepay.main.Config()
+    # there should have been no calls to any method on littlepay.config.Config()
     assert len(config.mock_calls) == 0
+
+
+def test_main_lazy_imports():
+    # check in a fresh interpreter, since the test session has already imported everything
+    heavy_modules = ["authlib", "requests", "yaml", "littlepay.api.client", "littlepay.commands", "littlepay.config"]
+    code = f"import sys, littlepay.main; print([m for m in {heavy_modules} if m in sys.modules])"
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_main_lazy_imports_importtime():
+    # import-time benchmark: python -X importtime reports every module imported by littlepay.main
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import littlepay.main"], capture_output=True, text=True, check=True
+    )
+    imported = {line.split("|")[-1].strip() for line in result.stderr.splitlines()}
+
+    assert "littlepay.main" in imported
+    assert "authlib" not in imported
+    assert "requests" not in imported
+    assert "littlepay.api.client" not in imported
+
+
+def test_main_groups_expiry(mock_commands_groups):
+    result = main(argv=["groups", "-f", "label", "expiry", "expiry.csv", "-w", "4"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_groups.call_args.args[0]
+    assert call_args.group_command == "expiry"
+    assert call_args.group_terms == ["label"]
+    assert call_args.file == "expiry.csv"
+    assert call_args.workers == 4
+
+
+def test_main_groups_sweep(mock_commands_groups):
+    result = main(argv=["groups", "sweep", "--grace", "30", "--dry-run", "--resume"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_groups.call_args.args[0]
+    assert call_args.group_command == "sweep"
+    assert call_args.grace == 30
+    assert call_args.dry_run is True
+    assert call_args.resume is True
+    assert call_args.workers == MAX_WORKERS
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["groups", "funding_sources", "--resume"],
+        ["groups", "link", "product_id", "--resume"],
+        ["groups", "migrate", "--resume"],
+        ["groups", "unlink", "-s", "funding_source_id", "--resume"],
+        ["products", "link", "group_id", "--resume"],
+        ["products", "unlink", "group_id", "--resume"],
+    ],
+)
+def test_main_resume(mock_commands_groups, mock_commands_products, argv):
+    result = main(argv=argv)
+
+    assert result == RESULT_SUCCESS
+    mock = mock_commands_groups if argv[0] == "groups" else mock_commands_products
+    assert mock.call_args.args[0].resume is True
+
+
+def test_main_reconcile(mock_commands_reconcile):
+    result = main(argv=["reconcile", "desired.yaml"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_reconcile.call_args.args[0]
+    assert call_args.command == "reconcile"
+    assert call_args.file == "desired.yaml"
+    assert call_args.apply is False
+    assert call_args.workers == MAX_WORKERS
+
+
+def test_main_reconcile_apply(mock_commands_reconcile):
+    result = main(argv=["reconcile", "desired.yaml", "--apply", "-w", "2"])
+
+    assert result == RESULT_SUCCESS
+    call_args = mock_commands_reconcile.call_args.args[0]
+    assert call_args.apply is True
+    assert call_args.workers == 2
+
+
+@pytest.fixture
+def mock_run_for_participants(mocker):
+    mocker.patch("littlepay.config.Config", return_value=mocker.Mock(participants={"one": {}, "two": {}, "three": {}}))
+    return mocker.patch("littlepay.participants.run_for_participants", return_value=RESULT_SUCCESS)
+
+
+def test_main_participants(mock_commands_groups, mock_run_for_participants):
+    result = main(argv=["--participants", "one, three", "groups", "--csv"])
+
+    assert result == RESULT_SUCCESS
+    mock_run_for_participants.assert_called_once()
+    run, participant_ids, csv_output = mock_run_for_participants.call_args.args
+    assert participant_ids == ["one", "three"]
+    assert csv_output is True
+
+    mock_commands_groups.assert_not_called()
+    run()
+    mock_commands_groups.assert_called_once()
+
+
+def test_main_all_participants(mock_commands_products, mock_run_for_participants):
+    result = main(argv=["--all-participants", "products"])
+
+    assert result == RESULT_SUCCESS
+    run, participant_ids, csv_output = mock_run_for_participants.call_args.args
+    assert participant_ids == ["one", "two", "three"]
+    assert csv_output is False
+
+
+def test_main_participants_unsupported(mock_commands_groups, mock_run_for_participants, capfd):
+    result = main(argv=["--participants", "one,four", "groups"])
+    capture = capfd.readouterr()
+
+    assert result == RESULT_FAILURE
+    assert "Unsupported participant: four" in capture.out
+    mock_run_for_participants.assert_not_called()
+
+
+def test_main_participants_exclusive(capfd):
+    with pytest.raises(SystemExit):
+        main(argv=["--participants", "one", "--all-participants", "groups"])
+
+    assert "not allowed with argument" in capfd.readouterr().err
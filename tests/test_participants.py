@@ -0,0 +1,76 @@
+import sys
+import threading
+
+import pytest
+
+from littlepay.commands import RESULT_FAILURE, RESULT_SUCCESS
+from littlepay.config import Config
+from littlepay.participants import run_for_participants
+
+
+@pytest.fixture
+def config(custom_config_file) -> Config:
+    config = Config()
+    config.active = {"env": "qa", "participant": "active"}
+    return config
+
+
+@pytest.fixture
+def run(config):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _run():
+        # both runs are in flight at the same time
+        barrier.wait()
+        participant_id = config.active_participant_id
+        if participant_id == "error":
+            raise RuntimeError("the error")
+        print("id,label")
+        print(f"{participant_id}_group,label")
+        return RESULT_FAILURE if participant_id == "fail" else RESULT_SUCCESS
+
+    return _run
+
+
+def test_run_for_participants(config, run, capfd):
+    result = run_for_participants(run, ["one", "two", "one"])
+    capture = capfd.readouterr()
+
+    assert result == RESULT_SUCCESS
+    assert capture.out.splitlines() == [
+        "[one] id,label",
+        "[one] one_group,label",
+        "[two] id,label",
+        "[two] two_group,label",
+    ]
+    # the active participant is unchanged
+    assert config.active_participant_id == "active"
+
+
+def test_run_for_participants_csv(run, capfd):
+    result = run_for_participants(run, ["one", "two"], csv_output=True)
+    capture = capfd.readouterr()
+
+    assert result == RESULT_SUCCESS
+    assert capture.out.splitlines() == [
+        "participant,id,label",
+        "one,one_group,label",
+        "two,two_group,label",
+    ]
+
+
+def test_run_for_participants_failure(run, capfd):
+    result = run_for_participants(run, ["fail", "error"])
+    capture = capfd.readouterr()
+
+    assert result == RESULT_FAILURE
+    assert "[fail] fail_group,label" in capture.out
+    assert "[error] RuntimeError: the error" in capture.out
+
+
+def test_run_for_participants_restores_stdout(run):
+    stdout = sys.stdout
+
+    run_for_participants(run, ["one", "two"])
+
+    assert sys.stdout is stdout
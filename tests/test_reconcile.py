@@ -0,0 +1,147 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from littlepay.api.groups import GroupFundingSourceResponse
+from littlepay.reconcile import (
+    OP_LINK_FUNDING_SOURCE,
+    OP_LINK_PRODUCT,
+    OP_UNLINK_FUNDING_SOURCE,
+    OP_UNLINK_PRODUCT,
+    OP_UPDATE_EXPIRY,
+    DesiredGroup,
+    load_desired_state,
+    plan_funding_sources,
+    plan_products,
+)
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    def _state_file(content: str, suffix: str = ".yaml") -> Path:
+        path = tmp_path / f"desired{suffix}"
+        path.write_text(content)
+        return path
+
+    return _state_file
+
+
+def test_load_desired_state_yaml(state_file):
+    path = state_file(
+        """
+groups:
+  group1:
+    products: [product1, product2]
+    funding_sources:
+      fs1: 2024-12-31
+      fs2: 2024-12-31T12:00:00Z
+      fs3: "2024-12-31T12:00:00-08:00"
+      fs4: null
+  group2:
+    funding_sources: [fs5]
+  group3:
+"""
+    )
+
+    desired = load_desired_state(path)
+
+    assert desired == [
+        DesiredGroup(
+            group_id="group1",
+            products={"product1", "product2"},
+            funding_sources={
+                "fs1": datetime(2024, 12, 31),
+                "fs2": datetime(2024, 12, 31, 12, tzinfo=timezone.utc),
+                "fs3": datetime.fromisoformat("2024-12-31T12:00:00-08:00"),
+                "fs4": None,
+            },
+        ),
+        DesiredGroup(group_id="group2", funding_sources={"fs5": None}),
+        DesiredGroup(group_id="group3"),
+    ]
+
+
+def test_load_desired_state_json(state_file):
+    path = state_file('{"groups": {"group1": {"products": []}}}', ".json")
+
+    assert load_desired_state(path) == [DesiredGroup(group_id="group1", products=set())]
+
+
+def test_load_desired_state_json_expiry(state_file):
+    path = state_file('{"groups": {"group1": {"funding_sources": {"fs1": "2024-12-31T12:00:00Z"}}}}', ".json")
+
+    assert load_desired_state(path) == [
+        DesiredGroup(group_id="group1", funding_sources={"fs1": datetime(2024, 12, 31, 12, tzinfo=timezone.utc)})
+    ]
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        ('{"groups": {"group1": ["product1"]}}', "group group1 links must be a mapping"),
+        ('{"groups": {"group1": {"products": "product1"}}}', "group group1 products must be a list"),
+        ('{"groups": {"group1": {"funding_sources": "fs1"}}}', "group group1 funding_sources must be a mapping or a list"),
+        ('{"groups": {"group1": {"funding_sources": {"fs1": "not a date"}}}}', "group group1 Invalid isoformat string"),
+    ],
+)
+def test_load_desired_state_invalid_links(state_file, content, message):
+    with pytest.raises(ValueError, match=f"Invalid desired state file: {message}"):
+        load_desired_state(state_file(content, ".json"))
+
+
+@pytest.mark.parametrize(("content", "suffix"), [("{not json", ".json"), ("groups: [1, 2]", ".yaml"), ("a: [", ".yaml")])
+def test_load_desired_state_invalid(state_file, content, suffix):
+    with pytest.raises(ValueError, match="Invalid desired state file"):
+        load_desired_state(state_file(content, suffix))
+
+
+def test_plan_products():
+    ops = plan_products("group1", {"product1", "product2"}, ["product2", "product3"])
+
+    assert ops == [
+        {"op": OP_LINK_PRODUCT, "group_id": "group1", "product_id": "product1"},
+        {"op": OP_UNLINK_PRODUCT, "group_id": "group1", "product_id": "product3"},
+    ]
+
+
+def test_plan_products_unchanged():
+    assert plan_products("group1", {"product1"}, ["product1"]) == []
+
+
+def test_plan_funding_sources():
+    desired = {
+        "new": datetime(2025, 1, 1),
+        "new_no_expiry": None,
+        "same": datetime(2024, 4, 2, 17, 5, 23, tzinfo=timezone.utc),
+        "changed": datetime(2025, 1, 1),
+        "no_expiry": None,
+        "add_expiry": datetime(2025, 1, 1),
+    }
+    live = [
+        GroupFundingSourceResponse(id="same", expiry_date="2024-04-02T17:05:23Z"),
+        GroupFundingSourceResponse(id="changed", expiry_date="2024-04-02T17:05:23Z"),
+        GroupFundingSourceResponse(id="no_expiry", expiry_date="2024-04-02T17:05:23Z"),
+        GroupFundingSourceResponse(id="add_expiry"),
+        GroupFundingSourceResponse(id="removed"),
+    ]
+
+    ops = plan_funding_sources("group1", desired, live)
+
+    assert ops == [
+        {
+            "op": OP_LINK_FUNDING_SOURCE,
+            "group_id": "group1",
+            "funding_source_id": "new",
+            "expiry": "2025-01-01T00:00:00+00:00",
+        },
+        {"op": OP_LINK_FUNDING_SOURCE, "group_id": "group1", "funding_source_id": "new_no_expiry"},
+        {"op": OP_UNLINK_FUNDING_SOURCE, "group_id": "group1", "funding_source_id": "removed"},
+        {
+            "op": OP_UPDATE_EXPIRY,
+            "group_id": "group1",
+            "funding_source_id": "add_expiry",
+            "expiry": "2025-01-01T00:00:00+00:00",
+        },
+        {"op": OP_UPDATE_EXPIRY, "group_id": "group1", "funding_source_id": "changed", "expiry": "2025-01-01T00:00:00+00:00"},
+    ]
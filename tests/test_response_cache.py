@@ -0,0 +1,104 @@
+from pathlib import Path
+import time
+
+import pytest
+
+from littlepay.response_cache import CachedResponse, ResponseCache
+
+
+URL = "https://www.example.com/api/v1/concession_groups"
+
+
+@pytest.fixture
+def cache() -> ResponseCache:
+    return ResponseCache("qa", "participant123")
+
+
+def test_ResponseCache_from_active_config(mocker, custom_response_cache_file: Path):
+    config = mocker.Mock(active_env_name="qa", active_participant_id="participant123")
+
+    cache = ResponseCache.from_active_config(config)
+
+    assert cache.env == "qa"
+    assert cache.participant == "participant123"
+    assert cache.path == custom_response_cache_file
+
+
+def test_CachedResponse_conditional_headers():
+    assert CachedResponse({}, 0).conditional_headers == {}
+    assert CachedResponse({}, 0, etag='"abc"', last_modified="Mon, 01 Apr 2024 00:00:00 GMT").conditional_headers == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Apr 2024 00:00:00 GMT",
+    }
+
+
+def test_ResponseCache_get_missing(cache: ResponseCache):
+    assert cache.get(URL, {"page": 1}) is None
+
+
+def test_ResponseCache_set_get(cache: ResponseCache, custom_response_cache_file: Path):
+    cache.set(URL, {"page": 1}, {"list": [], "total_count": 0}, etag='"abc"')
+
+    assert custom_response_cache_file.exists()
+    cached = cache.get(URL, {"page": 1})
+    assert cached.data == {"list": [], "total_count": 0}
+    assert cached.etag == '"abc"'
+    assert cache.get(URL, {"page": 2}) is None
+
+
+def test_ResponseCache_get_disk(cache: ResponseCache):
+    cache.set(URL, {"page": 1, "per_page": 100}, {"list": [1]}, last_modified="yesterday")
+
+    # a new cache (e.g. in a later process) reads the response saved by the first
+    cached = ResponseCache("qa", "participant123").get(URL, {"per_page": 100, "page": 1})
+
+    assert cached.data == {"list": [1]}
+    assert cached.last_modified == "yesterday"
+    assert ResponseCache("qa", "participant456").get(URL, {"per_page": 100, "page": 1}) is None
+
+
+def test_ResponseCache_fresh(cache: ResponseCache):
+    assert cache.fresh(CachedResponse({}, time.time()))
+    assert not cache.fresh(CachedResponse({}, time.time() - cache.ttl - 1))
+    # responses with validators are always revalidated
+    assert not cache.fresh(CachedResponse({}, time.time(), etag='"abc"'))
+
+
+def test_ResponseCache_touch(cache: ResponseCache):
+    cached = cache.set(URL, None, {"list": []})
+    cached = CachedResponse(cached.data, 0)
+
+    touched = cache.touch(URL, None, cached)
+
+    assert touched.fetched_at > 0
+    assert ResponseCache("qa", "participant123").get(URL).fetched_at == touched.fetched_at
+
+
+def test_ResponseCache_invalidate(cache: ResponseCache):
+    other = f"{URL}/1234/products"
+    cache.set(URL, {"page": 1}, {"list": [1]})
+    cache.set(URL, {"page": 2}, {"list": [2]})
+    cache.set(other, None, {"list": [3]})
+
+    cache.invalidate(URL)
+
+    assert cache.get(URL, {"page": 1}) is None
+    assert cache.get(URL, {"page": 2}) is None
+    assert ResponseCache("qa", "participant123").get(URL, {"page": 1}) is None
+    assert cache.get(other).data == {"list": [3]}
+
+
+def test_ResponseCache_invalidate_missing_file(cache: ResponseCache, custom_response_cache_file: Path):
+    cache.invalidate(URL)
+
+    assert not custom_response_cache_file.exists()
+
+
+def test_ResponseCache_clear(cache: ResponseCache):
+    cache.set(URL, None, {"list": [1]})
+    ResponseCache("qa", "participant456").set(URL, None, {"list": [2]})
+
+    cache.clear()
+
+    assert cache.get(URL) is None
+    assert ResponseCache("qa", "participant456").get(URL).data == {"list": [2]}
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+import pytest
+
+from littlepay.search import MATCH_EXACT, MATCH_PREFIX, MATCH_SUBSTRING, SearchIndex
+
+
+@dataclass
+class Item:
+    id: str
+    label: str
+
+
+ITEMS = [
+    Item("abc-123", "Seniors"),
+    Item("abc-456", "Veterans"),
+    Item("def-789", "Senior Veterans"),
+    Item("ghi-000", None),
+]
+
+
+@pytest.fixture
+def index() -> SearchIndex:
+    return SearchIndex(ITEMS, ("id", "label"))
+
+
+def test_SearchIndex_lazy(index: SearchIndex):
+    assert index.items == ITEMS
+    assert not index._built
+
+    index.search(["abc"])
+
+    assert index._built
+
+
+@pytest.mark.parametrize(
+    ("terms", "expected"),
+    [
+        (["abc"], [0, 1]),
+        (["SENIOR"], [0, 2]),
+        (["vet"], [1, 2]),
+        (["-"], [0, 1, 2, 3]),
+        (["or v"], [2]),
+        (["789", "123"], [0, 2]),
+        (["nothing"], []),
+        ([""], []),
+        ([], []),
+    ],
+)
+def test_SearchIndex_search_substring(index: SearchIndex, terms, expected):
+    assert index.search(terms) == [ITEMS[i] for i in expected]
+    assert index.search(terms, MATCH_SUBSTRING) == [ITEMS[i] for i in expected]
+
+
+@pytest.mark.parametrize(
+    ("terms", "expected"),
+    [(["abc"], [0, 1]), (["senior"], [0, 2]), (["vet"], [1]), (["123"], []), (["def", "ghi"], [2, 3])],
+)
+def test_SearchIndex_search_prefix(index: SearchIndex, terms, expected):
+    assert index.search(terms, MATCH_PREFIX) == [ITEMS[i] for i in expected]
+
+
+@pytest.mark.parametrize(
+    ("terms", "expected"),
+    [(["abc-123"], [0]), (["ABC-456"], [1]), (["abc"], []), (["seniors"], []), (["abc-123", "ghi-000"], [0, 3])],
+)
+def test_SearchIndex_search_exact(index: SearchIndex, terms, expected):
+    assert index.search(terms, MATCH_EXACT) == [ITEMS[i] for i in expected]
+
+
+def test_SearchIndex_search_unsupported(index: SearchIndex):
+    with pytest.raises(ValueError):
+        index.search(["abc"], "fuzzy")
@@ -0,0 +1,258 @@
+from contextlib import closing
+from pathlib import Path
+import sqlite3
+import time
+
+import pytest
+
+from littlepay.api.groups import GroupFundingSourceResponse, GroupResponse
+from littlepay.api.products import ProductResponse
+from littlepay.search import MATCH_EXACT, MATCH_PREFIX, MATCH_SUBSTRING
+import littlepay.snapshot
+from littlepay.snapshot import (
+    CONCESSION_GROUPS,
+    PRODUCTS,
+    Snapshot,
+    group_funding_sources_key,
+    group_products_key,
+    products_key,
+    search_fields,
+)
+
+
+GROUPS = [GroupResponse("id0", "zero", "participant123"), GroupResponse("id1", "one", "participant123")]
+
+
+@pytest.fixture
+def snapshot() -> Snapshot:
+    return Snapshot("qa", "participant123")
+
+
+@pytest.fixture
+def fetch(mocker):
+    return mocker.Mock(side_effect=lambda: (g for g in GROUPS))
+
+
+def test_keys():
+    assert group_products_key("1234") == "concession_groups/1234/products"
+    assert group_funding_sources_key("1234") == "concession_groups/1234/fundingsources"
+    assert products_key() == "products"
+    assert products_key("ACTIVE") == "products?status=ACTIVE"
+
+
+def test_Snapshot_from_active_config(mocker, custom_snapshot_file: Path):
+    config = mocker.Mock(active_env_name="qa", active_participant_id="participant123")
+
+    snapshot = Snapshot.from_active_config(config)
+
+    assert snapshot.env == "qa"
+    assert snapshot.participant == "participant123"
+    assert snapshot.path == custom_snapshot_file
+
+
+def test_Snapshot_get_missing(snapshot: Snapshot):
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) is None
+
+
+def test_Snapshot_put_get(snapshot: Snapshot, custom_snapshot_file: Path):
+    snapshot.put(CONCESSION_GROUPS, (g for g in GROUPS))
+
+    assert custom_snapshot_file.exists()
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) == GROUPS
+
+
+def test_Snapshot_put_get_dates(snapshot: Snapshot, expected_expiry, expected_expiry_str):
+    key = group_funding_sources_key("1234")
+    funding_source = GroupFundingSourceResponse(id="0", expiry_date=expected_expiry_str, created_date=expected_expiry_str)
+
+    snapshot.put(key, [funding_source])
+    result = snapshot.get(key, GroupFundingSourceResponse)
+
+    assert result == [funding_source]
+    assert result[0].expiry_date == expected_expiry
+    assert result[0].updated_date is None
+
+
+def test_Snapshot_get_stale(mocker, snapshot: Snapshot):
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+    mocker.patch("littlepay.snapshot.time.time", return_value=time.time() + snapshot.ttl + 1)
+
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) is None
+
+
+def test_Snapshot_keyed_by_env_participant(snapshot: Snapshot):
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+
+    assert Snapshot("prod", "participant123").get(CONCESSION_GROUPS, GroupResponse) is None
+    assert Snapshot("qa", "participant456").get(CONCESSION_GROUPS, GroupResponse) is None
+
+
+def test_Snapshot_load(snapshot: Snapshot, fetch):
+    assert snapshot.load(CONCESSION_GROUPS, GroupResponse, fetch) == GROUPS
+    assert snapshot.load(CONCESSION_GROUPS, GroupResponse, fetch) == GROUPS
+
+    fetch.assert_called_once()
+
+
+def test_Snapshot_load_refresh(snapshot: Snapshot, fetch):
+    snapshot.load(CONCESSION_GROUPS, GroupResponse, fetch)
+    snapshot.load(CONCESSION_GROUPS, GroupResponse, fetch, refresh=True)
+
+    assert fetch.call_count == 2
+
+
+def test_Snapshot_invalidate(snapshot: Snapshot):
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+    snapshot.put(group_products_key("id0"), [])
+
+    snapshot.invalidate(CONCESSION_GROUPS)
+
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) is None
+    assert snapshot.get(group_products_key("id0"), GroupResponse) == []
+
+
+def test_Snapshot_invalidate_missing_file(snapshot: Snapshot, custom_snapshot_file: Path):
+    snapshot.invalidate(CONCESSION_GROUPS)
+
+    assert not custom_snapshot_file.exists()
+
+
+def test_Snapshot_invalidate_all(snapshot: Snapshot):
+    other = Snapshot("prod", "participant123")
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+    snapshot.put(group_products_key("id0"), [])
+    other.put(CONCESSION_GROUPS, GROUPS)
+
+    snapshot.invalidate()
+
+    assert snapshot.get(CONCESSION_GROUPS, GroupResponse) is None
+    assert snapshot.get(group_products_key("id0"), GroupResponse) is None
+    assert other.get(CONCESSION_GROUPS, GroupResponse) == GROUPS
+
+
+def test_search_fields():
+    assert search_fields(CONCESSION_GROUPS) == ("id", "label")
+    assert search_fields(products_key("ACTIVE")) == ("id", "code", "description")
+    assert search_fields(group_products_key("id0")) == ()
+
+
+def test_Snapshot_put_search_values(snapshot: Snapshot, custom_snapshot_file: Path):
+    snapshot.put(CONCESSION_GROUPS, [GroupResponse("ID0", "Zero", "participant123")])
+
+    with closing(sqlite3.connect(custom_snapshot_file)) as conn:
+        rows = conn.execute("SELECT position, field, value FROM search_values ORDER BY field").fetchall()
+
+    assert rows == [(0, "id", "id0"), (0, "label", "zero")]
+
+
+@pytest.mark.parametrize(
+    "terms,match,expected",
+    [
+        (["ZER"], MATCH_SUBSTRING, [0]),
+        (["er", "ne"], MATCH_SUBSTRING, [0, 1]),
+        (["id"], MATCH_SUBSTRING, [0, 1]),
+        (["o"], MATCH_PREFIX, [1]),
+        (["id1"], MATCH_EXACT, [1]),
+        (["one"], MATCH_EXACT, []),
+        (["", "zero"], MATCH_SUBSTRING, [0]),
+        ([""], MATCH_SUBSTRING, []),
+    ],
+)
+def test_Snapshot_search(snapshot: Snapshot, mocker, terms, match, expected):
+    items = snapshot.put(CONCESSION_GROUPS, GROUPS)
+    search_index = mocker.spy(littlepay.snapshot, "SearchIndex")
+
+    assert snapshot.search(CONCESSION_GROUPS, items, terms, match) == [items[i] for i in expected]
+    if any(terms):
+        search_index.assert_not_called()
+
+
+def test_Snapshot_search_other_process(snapshot: Snapshot, mocker):
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+    other = Snapshot("qa", "participant123")
+    search_index = mocker.spy(littlepay.snapshot, "SearchIndex")
+
+    items = other.get(CONCESSION_GROUPS, GroupResponse)
+
+    assert other.search(CONCESSION_GROUPS, items, ["one"]) == [GROUPS[1]]
+    search_index.assert_not_called()
+
+
+def test_Snapshot_search_replaced_items(snapshot: Snapshot):
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+    changed = snapshot.put(CONCESSION_GROUPS, [GROUPS[1], GroupResponse("id2", "zero again", "participant123")])
+
+    assert snapshot.search(CONCESSION_GROUPS, changed, ["zero"]) == [changed[1]]
+
+
+def test_Snapshot_search_without_stored_values(snapshot: Snapshot, custom_snapshot_file: Path, mocker):
+    items = snapshot.put(CONCESSION_GROUPS, GROUPS)
+    with closing(sqlite3.connect(custom_snapshot_file)) as conn, conn:
+        conn.execute("DELETE FROM search_versions")
+    search_index = mocker.spy(littlepay.snapshot, "SearchIndex")
+
+    assert snapshot.search(CONCESSION_GROUPS, items, ["one"]) == [GROUPS[1]]
+    search_index.assert_called_once_with(items, ("id", "label"))
+
+
+def test_Snapshot_search_without_fts(snapshot: Snapshot, mocker):
+    # as on an SQLite without the FTS5 trigram tokenizer
+    snapshot._fts = False
+    items = snapshot.put(CONCESSION_GROUPS, GROUPS)
+    search_index = mocker.spy(littlepay.snapshot, "SearchIndex")
+
+    assert snapshot.search(CONCESSION_GROUPS, items, ["one"]) == [GROUPS[1]]
+    search_index.assert_called_once_with(items, ("id", "label"))
+
+
+def test_Snapshot_search_not_loaded(snapshot: Snapshot):
+    assert snapshot.search(CONCESSION_GROUPS, GROUPS, ["one"]) == [GROUPS[1]]
+
+
+def test_Snapshot_search_unsupported(snapshot: Snapshot):
+    items = snapshot.put(CONCESSION_GROUPS, GROUPS)
+
+    with pytest.raises(ValueError, match="Unsupported match"):
+        snapshot.search(CONCESSION_GROUPS, items, ["one"], "fuzzy")
+    with pytest.raises(ValueError, match="not searchable"):
+        snapshot.search(group_products_key("id0"), items, ["one"])
+
+
+def test_Snapshot_invalidate_search_values(snapshot: Snapshot, custom_snapshot_file: Path):
+    snapshot.put(CONCESSION_GROUPS, GROUPS)
+
+    snapshot.invalidate(CONCESSION_GROUPS)
+
+    with closing(sqlite3.connect(custom_snapshot_file)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM search_values").fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM search_versions").fetchone() == (0,)
+
+
+def test_Snapshot_search_benchmark(snapshot: Snapshot):
+    # a new process reads the snapshot and searches it once: compare with filtering the items with a linear scan
+    products = [
+        ProductResponse(f"id{i}", f"CODE{i}", "ACTIVE", "", f"Product number {i}", "participant123") for i in range(5000)
+    ]
+    snapshot.put(PRODUCTS, products)
+    reader = Snapshot("qa", "participant123")
+    items = reader.get(PRODUCTS, ProductResponse)
+
+    def linear():
+        return [p for p in items if any(term in v.lower() for term in ["4999"] for v in (p.id, p.code, p.description))]
+
+    def search():
+        return reader.search(PRODUCTS, items, ["4999"])
+
+    def best(func):
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    linear_result, linear_time = best(linear)
+    search_result, search_time = best(search)
+
+    assert search_result == linear_result == [items[4999]]
+    assert search_time < linear_time
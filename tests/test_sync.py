@@ -0,0 +1,107 @@
+import pytest
+
+from littlepay.api.groups import GroupFundingSourceResponse
+from littlepay.snapshot import Snapshot, group_funding_sources_key, group_funding_sources_sync_key
+from littlepay.sync import (
+    EVENT_ADDED,
+    EVENT_EXPIRY_CHANGED,
+    EVENT_REMOVED,
+    FundingSourceEvent,
+    high_water_mark,
+    sync_group_funding_sources,
+)
+
+
+def _funding_source(id, updated_date, expiry_date=None):
+    return GroupFundingSourceResponse(id=id, updated_date=updated_date, expiry_date=expiry_date)
+
+
+@pytest.fixture
+def snapshot() -> Snapshot:
+    return Snapshot("qa", "participant123")
+
+
+@pytest.fixture
+def mock_client(mocker):
+    def _mock_client(*funding_sources):
+        client = mocker.Mock()
+        client.get_concession_group_linked_funding_sources.return_value = (f for f in funding_sources)
+        return client
+
+    return _mock_client
+
+
+def test_FundingSourceEvent_csv(expected_expiry):
+    event = FundingSourceEvent(EVENT_ADDED, "group", "funding_source", expected_expiry)
+
+    assert FundingSourceEvent.csv_header() == "event,group_id,funding_source_id,expiry_date,previous_expiry_date"
+    assert event.csv() == f"added,group,funding_source,{expected_expiry.isoformat()},"
+
+
+def test_high_water_mark():
+    funding_sources = [
+        _funding_source("0", "2024-04-02T00:00:00Z"),
+        _funding_source("1", "2024-04-03T00:00:00Z"),
+        _funding_source("2", None),
+    ]
+
+    assert high_water_mark(funding_sources) == funding_sources[1].updated_date
+    assert high_water_mark([_funding_source("2", None)]) is None
+    assert high_water_mark([]) is None
+
+
+def test_sync_group_funding_sources_first_sync(snapshot, mock_client):
+    client = mock_client(_funding_source("0", "2024-04-02T00:00:00Z"), _funding_source("1", "2024-04-03T00:00:00Z"))
+
+    events = list(sync_group_funding_sources(client, snapshot, "group"))
+
+    assert [(e.event, e.funding_source_id) for e in events] == [(EVENT_ADDED, "0"), (EVENT_ADDED, "1")]
+    assert len(snapshot.get(group_funding_sources_sync_key("group"), GroupFundingSourceResponse)) == 2
+    assert len(snapshot.get(group_funding_sources_key("group"), GroupFundingSourceResponse)) == 2
+
+
+def test_sync_group_funding_sources_no_changes(snapshot, mock_client):
+    funding_sources = [_funding_source("0", "2024-04-02T00:00:00Z"), _funding_source("1", "2024-04-03T00:00:00Z")]
+    list(sync_group_funding_sources(mock_client(*funding_sources), snapshot, "group"))
+
+    events = list(sync_group_funding_sources(mock_client(*funding_sources), snapshot, "group"))
+
+    assert events == []
+
+
+def test_sync_group_funding_sources_changes(snapshot, mock_client):
+    first = mock_client(
+        _funding_source("0", "2024-04-02T00:00:00Z", "2025-01-01T00:00:00Z"),
+        _funding_source("1", "2024-04-03T00:00:00Z", "2025-01-01T00:00:00Z"),
+        _funding_source("2", "2024-04-03T00:00:00Z", "2025-01-01T00:00:00Z"),
+    )
+    list(sync_group_funding_sources(first, snapshot, "group"))
+
+    second = mock_client(
+        # unchanged
+        _funding_source("0", "2024-04-02T00:00:00Z", "2025-01-01T00:00:00Z"),
+        # updated with a new expiry
+        _funding_source("1", "2024-04-05T00:00:00Z", "2026-01-01T00:00:00Z"),
+        # added
+        _funding_source("3", "2024-04-05T00:00:00Z", "2026-01-01T00:00:00Z"),
+        # "2" was removed
+    )
+    events = list(sync_group_funding_sources(second, snapshot, "group"))
+
+    assert [(e.event, e.funding_source_id) for e in events] == [
+        (EVENT_EXPIRY_CHANGED, "1"),
+        (EVENT_ADDED, "3"),
+        (EVENT_REMOVED, "2"),
+    ]
+    assert events[0].previous_expiry_date.year == 2025
+    assert events[0].expiry_date.year == 2026
+    assert events[2].expiry_date is None
+    assert events[2].previous_expiry_date.year == 2025
+
+
+def test_sync_group_funding_sources_updated_same_expiry(snapshot, mock_client):
+    list(sync_group_funding_sources(mock_client(_funding_source("0", "2024-04-02T00:00:00Z")), snapshot, "group"))
+
+    events = list(sync_group_funding_sources(mock_client(_funding_source("0", "2024-04-09T00:00:00Z")), snapshot, "group"))
+
+    assert events == []